@@ -0,0 +1,408 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from metrics import metrics
+from startup import lazy_import, load_now
+
+sr = lazy_import('speech_recognition')
+
+
+@dataclass
+class RecognitionResult:
+    text: str
+    confidence: float
+    backend: str
+    latency: float = 0.0
+
+
+class BackendError(Exception):
+    """The backend could not be reached or failed; 'no speech' is not an error"""
+
+
+class ASRBackend:
+    name = "backend"
+    remote = False
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        """Return a result, None when no speech was recognized, or raise BackendError"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load models ahead of the first utterance"""
+
+    def close(self):
+        pass
+
+
+class RecognizerBackend(ASRBackend):
+    """A backend calling speech_recognition, which is only imported on first use or warm-up"""
+
+    def __init__(self, recognizer: Optional["sr.Recognizer"] = None):
+        self._recognizer = recognizer
+
+    @property
+    def recognizer(self) -> "sr.Recognizer":
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def warm_up(self):
+        load_now(sr)
+
+
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+    remote = True
+
+    def __init__(self, recognizer: Optional["sr.Recognizer"] = None, default_confidence: float = 0.8):
+        super().__init__(recognizer)
+        self.default_confidence = default_confidence
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        try:
+            response = self.recognizer.recognize_google(audio, show_all=True)
+        except sr.RequestError as e:
+            raise BackendError(str(e))
+        except sr.UnknownValueError:
+            return None
+        alternatives = response.get('alternative', []) if isinstance(response, dict) else []
+        if not alternatives:
+            return None
+        best = alternatives[0]
+        return RecognitionResult(best['transcript'].lower(), best.get('confidence', self.default_confidence), self.name)
+
+
+class SphinxBackend(RecognizerBackend):
+    name = "sphinx"
+
+    def __init__(self, recognizer: Optional["sr.Recognizer"] = None, confidence: float = 0.5):
+        super().__init__(recognizer)
+        self.confidence = confidence
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        try:
+            text = self.recognizer.recognize_sphinx(audio)
+        except sr.RequestError as e:
+            raise BackendError(str(e))
+        except sr.UnknownValueError:
+            return None
+        return RecognitionResult(text.lower(), self.confidence, self.name) if text else None
+
+
+# Set in each SphinxPoolBackend worker process by _init_sphinx_worker
+_sphinx_decoder = None
+
+
+def _load_sphinx_decoder(language: str):
+    """The decoder recognize_sphinx() builds on every call, built once"""
+    from pocketsphinx import pocketsphinx
+
+    language_directory = os.path.join(os.path.dirname(os.path.realpath(sr.__file__)), "pocketsphinx-data", language)
+    if not os.path.isdir(language_directory):
+        raise RuntimeError(f"missing PocketSphinx language data directory: {language_directory}")
+    config = pocketsphinx.Config() if hasattr(pocketsphinx, 'Config') else pocketsphinx.Decoder.default_config()
+    config.set_string("-hmm", os.path.join(language_directory, "acoustic-model"))
+    config.set_string("-lm", os.path.join(language_directory, "language-model.lm.bin"))
+    config.set_string("-dict", os.path.join(language_directory, "pronounciation-dictionary.dict"))
+    config.set_string("-logfn", os.devnull)
+    return pocketsphinx.Decoder(config)
+
+
+def _init_sphinx_worker(language: str):
+    global _sphinx_decoder
+    try:
+        _sphinx_decoder = _load_sphinx_decoder(language)
+    except Exception as e:
+        _sphinx_decoder = e  # reported by every call, as recognize_sphinx() would
+
+
+def _sphinx_worker_ready() -> int:
+    return os.getpid()
+
+
+def _sphinx_decode(memory_name: str, size: int) -> Optional[str]:
+    """Decode 16 kHz 16-bit mono PCM from a shared memory block; None if nothing was recognized"""
+    from multiprocessing import shared_memory
+
+    if isinstance(_sphinx_decoder, Exception):
+        raise RuntimeError(str(_sphinx_decoder))
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        _sphinx_decoder.start_utt()
+        _sphinx_decoder.process_raw(bytes(memory.buf[:size]), False, True)
+        _sphinx_decoder.end_utt()
+    finally:
+        memory.close()
+    hypothesis = _sphinx_decoder.hyp()
+    return hypothesis.hypstr if hypothesis is not None and hypothesis.hypstr else None
+
+
+class SphinxPoolBackend(ASRBackend):
+    """
+    Sphinx in a pool of worker processes instead of a thread of this one.
+    Decoding is CPU-bound and holds the GIL for long stretches, which stalls
+    the overlay, the timers and everything else in the assistant's process.
+    Each worker loads the acoustic and language models once, when it starts
+    (recognize_sphinx() loads them on every call), and the audio reaches it
+    through a shared memory block rather than pickled bytes. With more than
+    one worker, overlapping utterances are decoded in parallel.
+    """
+    name = "sphinx"
+
+    def __init__(self, workers: int = 2, language: str = "en-US", confidence: float = 0.5):
+        self.workers = workers
+        self.language = language
+        self.confidence = confidence
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.pool is None:
+                import multiprocessing
+
+                # Spawned, not forked: a fork copies locks held by the TTS, scheduler, UI and
+                # HTTP threads, and a worker could deadlock on one. Workers need no inherited state.
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_sphinx_worker,
+                                                initargs=(self.language,),
+                                                mp_context=multiprocessing.get_context('spawn'))
+            return self.pool
+
+    def warm_up(self):
+        """Start every worker, so none loads the models while the user waits"""
+        pool = self._pool()
+        for future in [pool.submit(_sphinx_worker_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        from multiprocessing import shared_memory
+
+        # The included models need 16-bit mono 16 kHz audio
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(raw)))
+        try:
+            memory.buf[:len(raw)] = raw
+            text = self._pool().submit(_sphinx_decode, memory.name, len(raw)).result()
+        except BrokenProcessPool as e:
+            with self.lock:
+                self.pool = None  # a worker died; start a fresh pool next time
+            raise BackendError(f"Sphinx worker died: {e}")
+        except Exception as e:
+            raise BackendError(str(e))
+        finally:
+            memory.close()
+            memory.unlink()
+        return RecognitionResult(text.lower(), self.confidence, self.name) if text else None
+
+    def close(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+class StubBackend(ASRBackend):
+    """Canned backend for trying the manager without network or models"""
+
+    def __init__(self, name: str, text: str = "", confidence: float = 0.9, delay: float = 0.0,
+                 fail: bool = False, remote: bool = False):
+        self.name = name
+        self.text = text
+        self.confidence = confidence
+        self.delay = delay
+        self.fail = fail
+        self.remote = remote
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        time.sleep(self.delay)
+        if self.fail:
+            raise BackendError(f"{self.name} unavailable")
+        return RecognitionResult(self.text, self.confidence, self.name) if self.text else None
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures or slow answers, then
+    rejects calls for reset_timeout seconds. After that, one trial call is let
+    through (half-open), and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 3, slow_threshold: float = 3.0, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.slow_threshold = slow_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float):
+        with self.lock:
+            if ok and latency <= self.slow_threshold:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"ASR circuit breaker opened after {self.failures} failed or slow calls")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class BackendStats:
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self.calls = 0
+        self.errors = 0
+        self.latency = None  # exponentially weighted, seconds
+        self.error_rate = 0.0  # exponentially weighted
+
+    def record(self, ok: bool, latency: float):
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.latency = latency if self.latency is None else self.latency + self.smoothing * (latency - self.latency)
+        self.error_rate += self.smoothing * ((0.0 if ok else 1.0) - self.error_rate)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'calls': self.calls, 'errors': self.errors,
+                'latency': round(self.latency or 0.0, 3), 'error_rate': round(self.error_rate, 3)}
+
+
+class RecognizerManager:
+    """
+    Runs ASR backends and picks a result.
+
+    mode="hedged": ask the preferred backend first and start the others only
+    if it has not answered within hedge_after seconds; first confident result
+    wins. mode="race": start every backend at once; first confident result
+    wins. mode="best": wait for all backends (up to timeout) and take the
+    highest confidence.
+
+    In hedged and race modes an unsure result (below min_confidence, as
+    Sphinx always is) does not end the wait, but once answer_after seconds
+    have passed the best result received so far is returned instead of
+    waiting on for the slow backend.
+
+    Remote backends sit behind a CircuitBreaker: while it is open they are
+    skipped, so recognition goes straight to the offline engine.
+    """
+
+    def __init__(self, backends: List[ASRBackend], mode: str = "hedged", min_confidence: float = 0.6,
+                 hedge_after: float = 1.5, timeout: float = 10.0, answer_after: float = 2.5):
+        self.backends = backends
+        self.mode = mode
+        self.min_confidence = min_confidence
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+        self.answer_after = answer_after
+        self.breakers = {b.name: CircuitBreaker() for b in backends if b.remote}
+        self.backend_stats = {b.name: BackendStats() for b in backends}
+        self.executor = ThreadPoolExecutor(max_workers=2 * len(backends), thread_name_prefix='asr-backend')
+
+    @classmethod
+    def default(cls, recognizer: Optional["sr.Recognizer"] = None, mode: str = "hedged",
+                sphinx_workers: int = 0) -> "RecognizerManager":
+        """Google, then Sphinx; in sphinx_workers worker processes, or in-process if 0"""
+        sphinx = SphinxPoolBackend(sphinx_workers) if sphinx_workers > 0 else SphinxBackend(recognizer)
+        return cls([GoogleBackend(recognizer), sphinx], mode=mode)
+
+    def warm_up(self):
+        for backend in self.backends:
+            backend.warm_up()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for backend in self.backends:
+            backend.close()
+
+    def _call(self, backend: ASRBackend, audio):
+        """Returns (ok, result); ok is False when the backend raised"""
+        start = time.perf_counter()
+        ok = True
+        try:
+            result = backend.recognize(audio)
+        except Exception as e:
+            ok = False
+            print(f"ASR backend {backend.name} failed: {e}")
+            result = None
+        latency = time.perf_counter() - start
+        self.backend_stats[backend.name].record(ok, latency)
+        metrics.observe('asr_seconds', latency, backend=backend.name)
+        if not ok:
+            metrics.inc('errors_total', component='asr', backend=backend.name)
+        breaker = self.breakers.get(backend.name)
+        if breaker is not None:
+            breaker.record(ok, latency)
+        if result is not None:
+            result.latency = latency
+        return ok, result
+
+    def available_backends(self) -> List[ASRBackend]:
+        return [b for b in self.backends if b.name not in self.breakers or self.breakers[b.name].allow()]
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        backends = self.available_backends()
+        if not backends:
+            return None
+        if self.mode == "race":
+            result = self._collect(audio, backends, start_all=True, wait_for_all=False)
+        elif self.mode == "best":
+            result = self._collect(audio, backends, start_all=True, wait_for_all=True)
+        else:
+            result = self._collect(audio, backends, start_all=False, wait_for_all=False)
+        if result is not None and result.backend != self.backends[0].name:
+            metrics.inc('asr_fallbacks_total', backend=result.backend)
+        return result
+
+    def _collect(self, audio, backends: List[ASRBackend], start_all: bool, wait_for_all: bool) -> Optional[RecognitionResult]:
+        deadline = time.monotonic() + self.timeout
+        answer_deadline = time.monotonic() + self.answer_after
+        waiting = list(backends if start_all else backends[:1])
+        remaining = [] if start_all else list(backends[1:])
+        pending = {self.executor.submit(self._call, b, audio) for b in waiting}
+        results = []
+        heard_nothing = False
+        while pending:
+            wait_time = self.hedge_after if remaining else deadline - time.monotonic()
+            if results and not wait_for_all:
+                wait_time = min(wait_time, answer_deadline - time.monotonic())
+            done, pending = wait(pending, timeout=max(0.0, wait_time), return_when=FIRST_COMPLETED)
+            for future in done:
+                ok, result = future.result()
+                if ok and result is None:
+                    heard_nothing = True
+                if result is None:
+                    continue
+                if not wait_for_all and result.confidence >= self.min_confidence:
+                    return result
+                results.append(result)
+            # Hedge: start the next backend when the current one is slow, failed
+            # or was unsure, but not when it answered that nobody spoke
+            if remaining and (not done or (not pending and not heard_nothing)):
+                pending.add(self.executor.submit(self._call, remaining.pop(0), audio))
+            if time.monotonic() >= deadline:
+                break
+            if results and not wait_for_all and time.monotonic() >= answer_deadline:
+                break
+        return max(results, key=lambda r: r.confidence, default=None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        report = {name: stats.as_dict() for name, stats in self.backend_stats.items()}
+        for name, breaker in self.breakers.items():
+            report[name]['breaker'] = breaker.state
+        return report
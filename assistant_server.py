@@ -0,0 +1,448 @@
+"""
+Server mode: one VoxFusion backend for many thin clients.
+
+    python voxfusion.py --engine server --server-port 8765
+
+    POST   /sessions                  {"volume": 0.4} (optional) -> {"session": id}
+    POST   /sessions/<id>/turns       {"text": "..."}  -> {"heard", "replies", "actions"}
+    POST   /sessions/<id>/audio       WAV body          -> same, after recognition
+    GET    /sessions/<id>/events      -> replies (alarms, reminders) since the last call
+    DELETE /sessions/<id>
+    GET    /stats
+
+Every session has its own conversation, joke, alarms, volume and awake
+state; the Ollama client, ASR backends, response cache and target catalog
+are shared. Turns run on a fixed pool of workers, one at a time per session.
+Things the server cannot do for a client (open a URL, launch a program,
+change its volume) come back as "actions" for the client to carry out.
+"""
+import json
+import threading
+import time
+import uuid
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+import speech_recognition as sr
+
+from asr_backends import RecognizerManager
+from command_executor import CommandExecutor
+from metrics import metrics
+from ollama_client import OllamaClient
+from response_cache import ResponseCache
+from system_backend import SystemBackend
+from target_catalog import TargetCatalog
+from tts_worker import PRIORITY_NORMAL
+from ui_thread import HeadlessUI
+from voice_assistant import VoiceAssistant
+from window_backend import WindowBackend
+
+
+class ClientActions(SystemBackend):
+    """Collects what the host would have opened or run, for the client to do instead"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.actions: List[Dict[str, Any]] = []
+
+    def add(self, action: str, **fields):
+        with self.lock:
+            self.actions.append({'action': action, **fields})
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            actions, self.actions = self.actions, []
+        return actions
+
+    def warm_up(self):
+        pass
+
+    def open_url(self, url: str):
+        self.add('open_url', url=url)
+
+    def open_path(self, path: str) -> bool:
+        self.add('open_path', path=path)
+        return True
+
+    def launch(self, command: str):
+        self.add('launch', command=command)
+
+    def shell(self, command: str):
+        self.add('shell', command=command)
+
+    def kill(self, process_name: str):
+        self.add('kill', process=process_name)
+
+    def battery(self):
+        return None  # the server's battery says nothing about the client's
+
+
+class ClientVolume:
+    """
+    A client's volume, as last reported or set. Changes go back to the client
+    as actions; a fade is one action the client plays out itself.
+    """
+
+    def __init__(self, actions: ClientActions, level: float = 0.5):
+        self.actions = actions
+        self.level = min(1.0, max(0.0, level))
+        self.muted = False
+
+    def warm_up(self):
+        pass
+
+    def get_volume(self) -> float:
+        return self.level
+
+    def set_volume(self, level: float) -> float:
+        self.level = round(min(1.0, max(0.0, level)), 4)
+        self.actions.add('volume', level=self.level)
+        return self.level
+
+    def increase_volume(self, amount: float = 0.1) -> float:
+        return self.set_volume(self.level + amount)
+
+    def decrease_volume(self, amount: float = 0.1) -> float:
+        return self.set_volume(self.level - amount)
+
+    def mute(self):
+        self.muted = True
+        self.actions.add('mute')
+
+    def unmute(self):
+        self.muted = False
+        self.actions.add('unmute')
+
+    def ramp_to(self, level: float, seconds: float):
+        self.level = round(min(1.0, max(0.0, level)), 4)
+        self.actions.add('fade', level=self.level, seconds=seconds)
+
+    def duck(self):
+        pass
+
+    def unduck(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stats(self):
+        return {'level': self.level, 'muted': self.muted}
+
+
+class NoWindows(WindowBackend):
+    """The server cannot see a client's windows; closing apps falls back to kill actions"""
+
+    def warm_up(self):
+        pass
+
+    def windows(self) -> List:
+        return []
+
+    def active_window(self):
+        return None
+
+
+class SessionSpeech:
+    """TTSWorker stand-in that keeps what the assistant says until the client collects it"""
+    busy = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: List[str] = []
+        self.on_speaking = None
+
+    def say(self, text: str, priority: int = PRIORITY_NORMAL) -> Future:
+        with self.lock:
+            self.pending.append(text)
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def speak_now(self, text: str, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> bool:
+        return self.say(text, priority).result()
+
+    def drain(self) -> List[str]:
+        with self.lock:
+            pending, self.pending = self.pending, []
+        return pending
+
+    def wait_idle(self, timeout: Optional[float] = None):
+        pass
+
+    def interrupt(self, keep_priority: int = PRIORITY_NORMAL):
+        pass
+
+    def stop(self):
+        pass
+
+
+class SessionAssistant(VoiceAssistant):
+    """
+    One client's assistant: the full VoiceAssistant turn logic with shared
+    model, recognizers and cache, and no local speaker, screen or desktop.
+    Sessions start awake; the client opening one is the activation.
+    """
+
+    def __init__(self, llm: OllamaClient, asr: RecognizerManager, response_cache: ResponseCache,
+                 catalog: TargetCatalog, volume: float = 0.5):
+        self.actions = ClientActions()
+        self.speech = SessionSpeech()
+        volume = ClientVolume(self.actions, volume)
+        executor = CommandExecutor(catalog, system=self.actions, windows=NoWindows())
+        super().__init__(volume, executor, response_cache, llm=llm, tts=self.speech, asr=asr, ui=HeadlessUI())
+        self.duck_during_speech = False
+        self.is_active = True
+
+    def _schedule(self, kind: str, text: str, time_str: str, repeat: bool = False):
+        self.scheduler.start()  # only sessions that set alarms get a scheduler thread
+        return super()._schedule(kind, text, time_str, repeat)
+
+    def go_to_sleep(self, message: str):
+        self.is_active = False
+        self.speak(message)
+        self.conversation.clear()
+
+    def close(self):
+        self.scheduler.stop()
+
+
+class Session:
+    def __init__(self, session_id: str, assistant: SessionAssistant):
+        self.id = session_id
+        self.assistant = assistant
+        self.lock = threading.Lock()  # one turn at a time
+        self.created = time.time()
+        self.last_seen = self.created
+        self.turns = 0
+
+    def collect(self) -> Dict[str, Any]:
+        return {'replies': self.assistant.speech.drain(), 'actions': self.assistant.actions.drain()}
+
+    def handle(self, text: str) -> Dict[str, Any]:
+        with self.lock:
+            self.turns += 1
+            self.assistant.handle_command(text.lower())
+            return {'heard': text, **self.collect()}
+
+
+class AssistantServer:
+    """
+    Keeps sessions in least-recently-used order. Sessions idle for longer
+    than idle_timeout are evicted on the next request (unless they still have
+    alarms or reminders pending), and the oldest go first once there are more
+    than max_sessions.
+    """
+
+    def __init__(self, llm: OllamaClient, asr: RecognizerManager, response_cache: Optional[ResponseCache] = None,
+                 catalog: Optional[TargetCatalog] = None, host: str = "127.0.0.1", port: int = 8765,
+                 workers: int = 8, idle_timeout: float = 900, max_sessions: int = 1000):
+        self.llm = llm
+        self.asr = asr
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.catalog = catalog if catalog is not None else TargetCatalog()
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.workers = ThreadPoolExecutor(workers, thread_name_prefix='turn')
+        self.turns = 0
+        self.evicted = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='assistant-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        print(f"VoxFusion server on {self.url}")
+        threading.Thread(target=self.asr.warm_up, name='asr-warm-up', daemon=True).start()
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.workers.shutdown(wait=False)
+        self.asr.close()
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.assistant.close()
+
+    # Sessions
+
+    def create_session(self, volume: float = 0.5) -> Session:
+        """volume: the client's current level (0.0-1.0), so relative changes start from it"""
+        assistant = SessionAssistant(self.llm, self.asr, self.response_cache, self.catalog, volume)
+        session = Session(uuid.uuid4().hex, assistant)
+        with self.lock:
+            self.sessions[session.id] = session
+        self.evict()
+        metrics.inc('sessions_created_total')
+        return session
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        self.evict()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_seen = time.time()
+                self.sessions.move_to_end(session_id)
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.assistant.close()
+        return True
+
+    def evict(self):
+        now = time.time()
+        evicted = []
+        with self.lock:
+            for session in list(self.sessions.values()):
+                if len(self.sessions) > self.max_sessions:
+                    evicted.append(self.sessions.pop(session.id))
+                elif now - session.last_seen <= self.idle_timeout:
+                    break  # the rest were seen more recently
+                elif not session.assistant.scheduler.pending():
+                    evicted.append(self.sessions.pop(session.id))
+            self.evicted += len(evicted)
+        for session in evicted:
+            session.assistant.close()
+            metrics.inc('sessions_evicted_total')
+
+    # Turns
+
+    def turn(self, session: Session, text: Optional[str] = None, audio: Optional[bytes] = None) -> Dict[str, Any]:
+        """Run one turn on the worker pool and wait for it"""
+        started = time.perf_counter()
+        result = self.workers.submit(self._turn, session, text, audio).result()
+        metrics.observe('server_turn_seconds', time.perf_counter() - started)
+        return result
+
+    def _turn(self, session: Session, text: Optional[str], audio: Optional[bytes]) -> Dict[str, Any]:
+        with self.lock:
+            self.turns += 1
+        if audio is not None:
+            recognized = self.asr.recognize(self.decode_wav(audio))
+            if recognized is None:
+                return {'heard': None, **session.collect()}
+            text = recognized.text
+        return session.handle(text)
+
+    @staticmethod
+    def decode_wav(data: bytes) -> "sr.AudioData":
+        with wave.open(BytesIO(data), 'rb') as wav:
+            return sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'sessions': len(self.sessions),
+                'turns': self.turns,
+                'evicted': self.evicted,
+                'llm': self.llm.stats(),
+                'asr': self.asr.stats(),
+                'response_cache': self.response_cache.stats(),
+            }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse one connection
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def route(self):
+                """(session or None, action) for /sessions/<id>/<action>"""
+                parts = self.path.strip('/').split('/')
+                if len(parts) < 2 or parts[0] != 'sessions':
+                    return None, None
+                return server.get_session(parts[1]), (parts[2] if len(parts) > 2 else '')
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    self.send_json(200, server.stats())
+                    return
+                session, action = self.route()
+                if session is None:
+                    self.send_json(404, {'error': 'unknown session'})
+                elif action == 'events':
+                    self.send_json(200, session.collect())
+                else:
+                    self.send_json(404, {'error': f'unknown path {self.path}'})
+
+            def do_POST(self):
+                body = self.read_body()
+                if self.path == "/sessions":
+                    try:
+                        volume = float(json.loads(body or b'{}').get('volume', 0.5))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        self.send_json(400, {'error': str(e)})
+                        return
+                    self.send_json(201, {'session': server.create_session(volume).id})
+                    return
+                session, action = self.route()
+                if session is None:
+                    self.send_json(404, {'error': 'unknown session'})
+                    return
+                try:
+                    if action == 'turns':
+                        text = json.loads(body or b'{}').get('text', '').strip()
+                        if not text:
+                            self.send_json(400, {'error': 'missing "text"'})
+                            return
+                        self.send_json(200, server.turn(session, text=text))
+                    elif action == 'audio':
+                        self.send_json(200, server.turn(session, audio=body))
+                    else:
+                        self.send_json(404, {'error': f'unknown path {self.path}'})
+                except (ValueError, EOFError, wave.Error) as e:
+                    self.send_json(400, {'error': str(e)})
+                except Exception as e:
+                    print(f"Error handling turn: {e}")
+                    metrics.inc('errors_total', component='server')
+                    self.send_json(500, {'error': str(e)})
+
+            def do_DELETE(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) == 2 and parts[0] == 'sessions' and server.close_session(parts[1]):
+                    self.send_json(200, {'closed': parts[1]})
+                else:
+                    self.send_json(404, {'error': 'unknown session'})
+
+        return Handler
@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+
+class MicrophoneSource:
+    """Reads fixed-size 16-bit mono frames from the default (or given) microphone"""
+
+    def __init__(self, device_index: Optional[int] = None, sample_rate: int = 16000, frame_ms: int = 30):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=self.frame_size)
+        self.stream = None
+
+    def open(self):
+        self.microphone.__enter__()
+        self.stream = self.microphone.stream
+
+    def close(self):
+        if self.stream is not None:
+            self.microphone.__exit__(None, None, None)
+            self.stream = None
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        data = self.stream.read(self.frame_size)
+        return np.frombuffer(data, dtype=np.int16)
+
+
+class WavFileSource:
+    """
+    Reads frames from a 16-bit WAV file instead of a microphone, so capture
+    can be exercised without audio hardware. Stereo files are downmixed.
+    With realtime=True frames are paced at the speed they would be recorded.
+    """
+
+    def __init__(self, path: str, frame_ms: int = 30, realtime: bool = False):
+        self.path = path
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self.wav = None
+        with wave.open(path, 'rb') as wav:
+            self.sample_rate = wav.getframerate()
+        self.frame_size = self.sample_rate * frame_ms // 1000
+
+    def open(self):
+        self.wav = wave.open(self.path, 'rb')
+        if self.wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: only 16-bit WAV files are supported")
+        self.channels = self.wav.getnchannels()
+        self.started = time.monotonic()
+        self.frames_read = 0
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        data = self.wav.readframes(self.frame_size)
+        if len(data) < self.frame_size * 2 * self.channels:
+            return None
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        if self.realtime:
+            self.frames_read += 1
+            delay = self.started + self.frames_read * self.frame_ms / 1000 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return samples
+
+
+class RingBuffer:
+    """
+    Preallocated int16 ring buffer that is written twice ("mirrored"), so any
+    window up to capacity samples long is one contiguous slice. Utterances are
+    handed out as views into it without copying. A view stays valid until the
+    writer has moved capacity samples past its start.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=np.int16)
+        self.written = 0  # total samples written since start
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        pos = self.written % self.capacity
+        first = min(n, self.capacity - pos)
+        for offset in (pos, pos + self.capacity):
+            self.data[offset:offset + first] = samples[:first]
+        if first < n:
+            rest = n - first
+            self.data[:rest] = samples[first:]
+            self.data[self.capacity:self.capacity + rest] = samples[first:]
+        self.written += n
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Zero-copy view of absolute sample positions [start, end)"""
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        offset = start % self.capacity
+        return self.data[offset:offset + (end - start)]
+
+
+class NoiseFloor:
+    """
+    Running estimate of background energy, updated from frames the VAD
+    classifies as silence. Adapts quickly during the first frames and then
+    follows slow changes (a fan turning on) without dead-air calibration.
+    """
+
+    def __init__(self, initial: float = 300.0, adapt_rate: float = 0.05, warmup_frames: int = 10):
+        self.level = initial
+        self.adapt_rate = adapt_rate
+        self.warmup_frames = warmup_frames
+        self.frames_seen = 0
+
+    def update(self, energy: float):
+        self.frames_seen += 1
+        rate = 0.5 if self.frames_seen <= self.warmup_frames else self.adapt_rate
+        self.level += rate * (energy - self.level)
+
+
+@dataclass
+class Utterance:
+    samples: np.ndarray  # view into the ring buffer
+    sample_rate: int
+    start: int  # absolute sample positions
+    end: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def to_audio_data(self) -> "sr.AudioData":
+        return sr.AudioData(self.samples.tobytes(), self.sample_rate, 2)
+
+
+class ContinuousCapture:
+    """
+    Reads the microphone (or a WAV file) continuously on one thread into a
+    RingBuffer and cuts utterances with frame-level energy VAD against an
+    adaptive NoiseFloor. No audio is dropped between utterances, and there
+    is no per-phrase ambient-noise calibration.
+    """
+
+    def __init__(self, source, buffer_seconds: float = 30.0, threshold_ratio: float = 3.0,
+                 min_energy: float = 200.0, onset_ms: int = 90, hangover_ms: int = 600,
+                 preroll_ms: int = 300, max_utterance_s: float = 8.0,
+                 on_speech_start: Optional[Callable[[], None]] = None,
+                 echo_guard: Optional[Callable[[], bool]] = None, echo_ratio: float = 2.0):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.frame_size = source.frame_size
+        frame_ms = 1000 * self.frame_size / self.sample_rate
+        self.ring = RingBuffer(int(buffer_seconds * self.sample_rate))
+        self.noise_floor = NoiseFloor()
+        self.threshold_ratio = threshold_ratio
+        self.min_energy = min_energy
+        self.onset_frames = max(1, round(onset_ms / frame_ms))
+        self.hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self.preroll = int(preroll_ms * self.sample_rate / 1000)
+        self.max_utterance = int(max_utterance_s * self.sample_rate)
+        self.on_speech_start = on_speech_start
+        # While echo_guard() is true (the assistant is talking) speech must be
+        # echo_ratio times louder, so the assistant's own voice is not treated as barge-in
+        self.echo_guard = echo_guard
+        self.echo_ratio = echo_ratio
+        self.utterances: "queue.Queue[Optional[Utterance]]" = queue.Queue()
+        self.running = False
+        self.finished = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.source.open()
+        self.running = True
+        self.finished.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+    def next_utterance(self, timeout: Optional[float] = None) -> Optional[Utterance]:
+        """Next cut utterance, or None on timeout or once the source is exhausted"""
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def next_audio(self, timeout: Optional[float] = None) -> Optional["sr.AudioData"]:
+        utterance = self.next_utterance(timeout)
+        return utterance.to_audio_data() if utterance is not None else None
+
+    def is_speech(self, energy: float) -> bool:
+        threshold = max(self.min_energy, self.noise_floor.level * self.threshold_ratio)
+        if self.echo_guard is not None and self.echo_guard():
+            threshold *= self.echo_ratio
+        return energy > threshold
+
+    def _run(self):
+        speech_start = None
+        voiced_run = 0
+        silent_run = 0
+        try:
+            while self.running:
+                frame = self.source.read_frame()
+                if frame is None:
+                    break
+                self.ring.write(frame)
+                energy = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+                voiced = self.is_speech(energy)
+
+                if speech_start is None:
+                    if voiced:
+                        voiced_run += 1
+                        if voiced_run >= self.onset_frames:
+                            onset = self.ring.written - voiced_run * self.frame_size
+                            speech_start = max(0, onset - self.preroll)
+                            silent_run = 0
+                            if self.on_speech_start is not None:
+                                self.on_speech_start()
+                    else:
+                        voiced_run = 0
+                        self.noise_floor.update(energy)
+                    continue
+
+                silent_run = 0 if voiced else silent_run + 1
+                if not voiced:
+                    self.noise_floor.update(energy)
+                too_long = self.ring.written - speech_start >= self.max_utterance
+                if silent_run >= self.hangover_frames or too_long:
+                    self._emit(speech_start, self.ring.written)
+                    speech_start = None
+                    voiced_run = 0
+            if speech_start is not None:
+                self._emit(speech_start, self.ring.written)
+        except Exception as e:
+            print(f"Capture error: {e}")
+        finally:
+            self.source.close()
+            self.running = False
+            self.finished.set()
+            self.utterances.put(None)
+
+    def _emit(self, start: int, end: int):
+        samples = self.ring.view(start, end)
+        self.utterances.put(Utterance(samples, self.sample_rate, end - len(samples), end))
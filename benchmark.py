@@ -0,0 +1,397 @@
+"""
+Benchmarks for VoxFusion that run without audio hardware.
+
+    python benchmark.py router
+    python benchmark.py e2e [--corpus FILE_OR_DIR] [--save-baseline]
+    python benchmark.py server [--sessions 1,2,4,8,16,32]
+
+`e2e` replays a corpus through the real VoiceAssistant.run() loop with the
+microphone, recognizer, speech engine, overlay, volume, launcher and desktop
+windows replaced by fakes (fake_backends.py) and Gemma served by
+fake_ollama.py. A corpus is a text file with one utterance per line, or a
+directory of WAV files each with a same-named .txt transcript. Results are compared with
+benchmark_baseline.json; the exit status is 1 if a metric regressed.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from intent_router import IntentRouter
+
+ROUTER_CORPUS = [
+    "increase volume",
+    "volume down please",
+    "unmute",
+    "mute the sound",
+    "what is the volume level",
+    "how much battery do i have",
+    "open youtube",
+    "open powerpoint",
+    "close chrome",
+    "search python decorators on google",
+    "find lofi music on youtube",
+    "leet code problem number 42",
+    "set alarm for 7:30 am",
+    "remind me to call mom at 6 pm",
+    "write a program on binary search",
+    "lock the computer",
+    "what is the capital of france",
+    "tell me a joke",
+    "how does photosynthesis work",
+    "who won the world cup in 2018",
+]
+
+
+def bench_router(iterations: int = 20000):
+    router = IntentRouter()
+    corpus = ROUTER_CORPUS
+    start = time.perf_counter()
+    for i in range(iterations):
+        router.route(corpus[i % len(corpus)])
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"Routed {iterations} utterances in {elapsed:.3f}s ({rate:,.0f} utterances/s, {elapsed / iterations * 1e6:.1f} us each)")
+    return rate
+
+
+# Wake, commands, questions (some repeated) and a sleep/wake cycle
+E2E_CORPUS = [
+    "maya",
+    "increase volume",
+    "increase volume",
+    "what is the volume level",
+    "fade to 20% over 2 seconds",
+    "open youtube",
+    "what is the capital of france",
+    "and how many people live there",
+    "search python decorators on google",
+    "set alarm for 7:30 am",
+    "list my alarms",
+    "cancel alarm",
+    "how much battery do i have",
+    "tell me a joke",
+    "another joke",
+    "mute",
+    "unmute",
+    "open github",
+    "open get hub",
+    "lunch note pad",
+    "could you crank the sound up a bit",
+    "close youtube",
+    "close notepad",
+    "go to sleep",
+    "maya",
+    "what is the capital of france",
+    "find lofi music on youtube",
+    "close github",
+    "go to sleep",
+]
+
+# (metric, direction): +1 means higher is worse, -1 means lower is worse
+E2E_METRICS = [
+    ('turn_p50_ms', 1), ('turn_p95_ms', 1), ('turn_p99_ms', 1),
+    ('first_speech_p50_ms', 1), ('first_speech_p95_ms', 1),
+    ('router_utterances_per_s', -1), ('peak_rss_mb', 1),
+]
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def load_corpus(path=None):
+    """ScriptedAudio for every utterance in a transcript file or WAV directory"""
+    from fake_backends import ScriptedAudio
+
+    if path is None:
+        return [ScriptedAudio(text) for text in E2E_CORPUS]
+    if os.path.isdir(path):
+        utterances = []
+        for wav_path in sorted(glob.glob(os.path.join(path, '*.wav'))):
+            with open(os.path.splitext(wav_path)[0] + '.txt', 'r', encoding='utf-8') as f:
+                utterances.append(ScriptedAudio.from_wav(wav_path, f.read().strip()))
+        return utterances
+    with open(path, 'r', encoding='utf-8') as f:
+        return [ScriptedAudio(line.strip()) for line in f if line.strip()]
+
+
+def bench_e2e(corpus, repeat: int = 5, asr_delay: float = 0.05, token_delay: float = 0.005,
+              words_per_second: float = 0.0, window_latency: float = 0.01, speculative: bool = False,
+              tts_startup: float = 0.0, phrase_cache: bool = False, intent_classifier: bool = False,
+              verbose: bool = False):
+    """
+    Turn latency runs from the moment an utterance is captured until the
+    assistant is ready to listen again (reply spoken); first-speech latency
+    until the first word of the reply is spoken.
+    """
+    from asr_backends import RecognizerManager
+    from command_executor import CommandExecutor
+    from fake_backends import (FakePlayer, FakeSystemBackend, FakeTTSEngine, FakeUI, FakeWindowBackend,
+                               ScriptedASRBackend, ScriptedCapture)
+    from fake_ollama import FakeOllamaServer
+    from ollama_client import OllamaClient
+    from phrase_cache import PhraseCache, standard_phrases, voice_key
+    from response_cache import ResponseCache
+    from tts_worker import TTSWorker
+    from voice_assistant import VoiceAssistant
+    from volume_backends import MemoryBackend
+    from volume_controller import VolumeController
+
+    server = FakeOllamaServer(token_delay=token_delay).start()
+    turn_latencies = []
+    first_speech = []
+    lock = threading.Lock()
+    current = {'started': None, 'spoke': False}
+
+    def end_turn():
+        with lock:
+            if current['started'] is not None:
+                turn_latencies.append(time.perf_counter() - current['started'])
+            current['started'] = None
+
+    def on_audio(index):
+        end_turn()
+        with lock:
+            current['started'] = time.perf_counter()
+            current['spoke'] = False
+
+    def on_say(text):
+        with lock:
+            if current['started'] is not None and not current['spoke']:
+                current['spoke'] = True
+                first_speech.append(time.perf_counter() - current['started'])
+
+    def on_exhausted():
+        end_turn()
+        raise KeyboardInterrupt  # ends VoiceAssistant.run() through its normal shutdown path
+
+    windows = FakeWindowBackend(latency=window_latency)
+    classifier = None
+    if intent_classifier:
+        from intent_classifier import IntentClassifier
+        classifier = IntentClassifier()
+    executor = CommandExecutor(system=FakeSystemBackend(windows), windows=windows, classifier=classifier)
+    cache = None
+    if phrase_cache:
+        # Rendered up front, as an earlier session would have left it
+        cache = PhraseCache(standard_phrases(executor.catalog), cache_dir=tempfile.mkdtemp(prefix='phrase-cache-'),
+                            player=FakePlayer(on_say))
+        engine = FakeTTSEngine(words_per_second)
+        key = voice_key(engine, 150, 1.0)
+        text = cache.next_render(key)
+        while text is not None:
+            cache.render(text, key, engine)
+            text = cache.next_render(key)
+    tts = TTSWorker(engine_factory=lambda: FakeTTSEngine(words_per_second, on_say, tts_startup), phrase_cache=cache)
+    assistant = VoiceAssistant(VolumeController(MemoryBackend(latency=0.002)), executor, ResponseCache(),
+                               llm=OllamaClient(host=server.url), tts=tts)
+    assistant.ui = FakeUI()
+    assistant.speculative = speculative
+    assistant.asr = RecognizerManager([ScriptedASRBackend(asr_delay)])
+    assistant.continuous_capture = ScriptedCapture(list(corpus) * repeat, on_audio, on_exhausted)
+
+    started = time.perf_counter()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        assistant.run()
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    results = {
+        'turns': len(turn_latencies),
+        'wall_seconds': round(elapsed, 3),
+        'turn_p50_ms': round(percentile(turn_latencies, 0.50) * 1000, 2),
+        'turn_p95_ms': round(percentile(turn_latencies, 0.95) * 1000, 2),
+        'turn_p99_ms': round(percentile(turn_latencies, 0.99) * 1000, 2),
+        'first_speech_p50_ms': round(percentile(first_speech, 0.50) * 1000, 2),
+        'first_speech_p95_ms': round(percentile(first_speech, 0.95) * 1000, 2),
+    }
+    if cache is not None:
+        results['phrase_cache'] = cache.stats()
+        shutil.rmtree(cache.cache_dir, ignore_errors=True)
+    if classifier is not None:
+        results['intent_classifier'] = classifier.stats()
+    if speculative:
+        stats = assistant.speculation_stats
+        results['speculation'] = {'used': stats['used'], 'discarded': stats['discarded'],
+                                  'saved_ms': round(stats['saved_seconds'] * 1000, 2),
+                                  'wasted_ms': round(stats['wasted_seconds'] * 1000, 2)}
+    return results
+
+
+# Turns each load-test client cycles through: commands plus questions for the LLM
+SERVER_CORPUS = [
+    "increase volume",
+    "what is the capital of france",
+    "open youtube",
+    "tell me a joke",
+    "set alarm for 7:30 am",
+    "how does photosynthesis work",
+    "search python decorators on google",
+    "list my alarms",
+]
+
+
+def bench_server(session_counts, turns: int = 20, workers: int = 8, token_delay: float = 0.005):
+    """
+    Load test for assistant_server: for each session count, that many clients
+    each open a session and send `turns` text turns back to back over one
+    keep-alive connection. Reports throughput and turn latency per level.
+    """
+    import http.client
+    from asr_backends import RecognizerManager
+    from assistant_server import AssistantServer
+    from fake_backends import ScriptedASRBackend
+    from fake_ollama import FakeOllamaServer
+    from ollama_client import OllamaClient
+
+    fake_ollama = FakeOllamaServer(token_delay=token_delay).start()
+    server = AssistantServer(OllamaClient(host=fake_ollama.url, max_connections=workers),
+                             RecognizerManager([ScriptedASRBackend()]), port=0, workers=workers).start()
+    host, port = server.httpd.server_address[:2]
+
+    def client(latencies, errors):
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+
+        def post(path, payload):
+            connection.request("POST", path, json.dumps(payload), {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            body = json.loads(response.read())
+            if response.status >= 400:
+                raise RuntimeError(body.get('error'))
+            return body
+
+        try:
+            session = post("/sessions", {})['session']
+            for i in range(turns):
+                started = time.perf_counter()
+                post(f"/sessions/{session}/turns", {'text': SERVER_CORPUS[i % len(SERVER_CORPUS)]})
+                latencies.append(time.perf_counter() - started)
+            connection.request("DELETE", f"/sessions/{session}")
+            connection.getresponse().read()
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            connection.close()
+
+    results = []
+    print(f"{'sessions':>8}{'turns':>8}{'seconds':>9}{'turns/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    try:
+        for count in session_counts:
+            latencies, errors = [], []
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                clients = [threading.Thread(target=client, args=(latencies, errors)) for _ in range(count)]
+                for thread in clients:
+                    thread.start()
+                for thread in clients:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+            row = {
+                'sessions': count,
+                'turns': len(latencies),
+                'seconds': round(elapsed, 3),
+                'turns_per_s': round(len(latencies) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                'errors': len(errors),
+            }
+            results.append(row)
+            print(f"{count:>8}{row['turns']:>8}{elapsed:>9.2f}{row['turns_per_s']:>10.1f}"
+                  f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['errors']:>8}")
+    finally:
+        server.stop()
+        fake_ollama.stop()
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance: float) -> bool:
+    """Print a comparison table; returns False if any metric regressed by more than tolerance"""
+    ok = True
+    print(f"{'metric':<26}{'current':>12}{'baseline':>12}{'change':>10}")
+    for metric, direction in E2E_METRICS:
+        current, previous = results.get(metric), baseline.get(metric)
+        if current is None or not previous:
+            print(f"{metric:<26}{str(current):>12}{'-':>12}")
+            continue
+        change = (current - previous) / previous
+        regressed = change * direction > tolerance
+        ok = ok and not regressed
+        print(f"{metric:<26}{current:>12.2f}{previous:>12.2f}{change:>+10.1%}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VoxFusion micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    router_parser = subparsers.add_parser("router", help="intent routing throughput")
+    router_parser.add_argument("--iterations", type=int, default=20000)
+    e2e_parser = subparsers.add_parser("e2e", help="replay a corpus through the assistant with fake backends")
+    e2e_parser.add_argument("--corpus", help="transcript file (one utterance per line) or directory of WAV + .txt files")
+    e2e_parser.add_argument("--repeat", type=int, default=5, help="replay the corpus this many times")
+    e2e_parser.add_argument("--asr-delay", type=float, default=0.05, help="seconds the fake recognizer takes")
+    e2e_parser.add_argument("--token-delay", type=float, default=0.005, help="seconds per token from the fake Ollama")
+    e2e_parser.add_argument("--window-latency", type=float, default=0.01, help="seconds the fake desktop takes to react")
+    e2e_parser.add_argument("--speculative", action="store_true", help="start Gemma alongside routing")
+    e2e_parser.add_argument("--tts-startup", type=float, default=0.0,
+                            help="seconds the fake speech engine takes before the first word")
+    e2e_parser.add_argument("--phrase-cache", action="store_true", help="play fixed and templated phrases from pre-rendered audio")
+    e2e_parser.add_argument("--intent-classifier", action="store_true",
+                            help="send commands the patterns miss through the embedding classifier")
+    e2e_parser.add_argument("--words-per-second", type=float, default=0.0, help="fake speech rate (0: instant)")
+    e2e_parser.add_argument("--baseline", default="benchmark_baseline.json")
+    e2e_parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    e2e_parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression before failing (0.2 = 20%%)")
+    e2e_parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    server_parser = subparsers.add_parser("server", help="load-test the multi-session server")
+    server_parser.add_argument("--sessions", default="1,2,4,8,16,32", help="comma-separated concurrent session counts")
+    server_parser.add_argument("--turns", type=int, default=20, help="turns per session")
+    server_parser.add_argument("--workers", type=int, default=8, help="server worker threads")
+    server_parser.add_argument("--token-delay", type=float, default=0.005, help="seconds per token from the fake Ollama")
+    args = parser.parse_args()
+
+    if args.benchmark == "router":
+        bench_router(args.iterations)
+    elif args.benchmark == "e2e":
+        results = bench_e2e(load_corpus(args.corpus), args.repeat, args.asr_delay, args.token_delay,
+                            args.words_per_second, args.window_latency, args.speculative,
+                            args.tts_startup, args.phrase_cache, args.intent_classifier, args.verbose)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['router_utterances_per_s'] = round(bench_router())
+        results['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(results, indent=2))
+
+        if args.save_baseline:
+            with open(args.baseline, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"Saved baseline to {args.baseline}")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if not compare_to_baseline(results, baseline, args.tolerance):
+                sys.exit(1)
+        else:
+            print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    elif args.benchmark == "server":
+        bench_server([int(count) for count in args.sessions.split(',')], args.turns, args.workers, args.token_delay)
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CodeWindow:
+    """
+    Code-development window that fills in line by line while Gemma streams
+    the program. Widgets are built and updated only on the UI thread (open it
+    through UIThread.call); generation runs on its own thread and hands
+    complete lines over through a queue that the window polls. Cancel, or
+    closing the window, stops reading and closes the stream, which aborts the
+    request on the server. Every window keeps its own widgets, so several can
+    generate at once.
+    """
+
+    instruction = "Write a complete, well-commented Python program on the following topic:"
+
+    def __init__(self, root, topic: str, llm, model: Optional[str] = None,
+                 options: Optional[Dict[str, Any]] = None, poll_ms: int = 30):
+        import tkinter as tk
+
+        self.tk = tk
+        self.topic = topic
+        self.llm = llm
+        self.model = model
+        self.options = options if options is not None else {'temperature': 0.3, 'max_tokens': 500}
+        self.poll_ms = poll_ms
+        self.lines: "queue.Queue" = queue.Queue()
+        self.cancelled = threading.Event()
+        self.chunks = None  # the generation stream, closed on cancel
+        self.started = time.perf_counter()
+        self.first_line_after = None
+        self.line_count = 0
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Code Development: {topic}")
+        self.window.geometry("800x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        label = tk.Label(self.window, text=f"Generated Program on: {topic}", font=("Arial", 14))
+        label.pack(pady=10)
+
+        controls = tk.Frame(self.window)
+        controls.pack(pady=5)
+        self.status_label = tk.Label(controls, text=f"Generating code for {topic}...", font=("Arial", 10), fg="blue")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        self.cancel_button = tk.Button(controls, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(side=tk.LEFT)
+
+        scrollbar = tk.Scrollbar(self.window)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.text_widget = tk.Text(self.window, wrap=tk.NONE, yscrollcommand=scrollbar.set, font=("Consolas", 12))
+        self.text_widget.pack(expand=True, fill=tk.BOTH)
+        self.text_widget.config(state='disabled')
+        scrollbar.config(command=self.text_widget.yview)
+
+        threading.Thread(target=self._generate, name=f'codegen-{topic}', daemon=True).start()
+        self.window.after(self.poll_ms, self._poll)
+
+    # Generation thread
+
+    def _generate(self):
+        try:
+            chunks = self.chunks = self.llm.stream(f"{self.instruction} {self.topic}", options=self.options,
+                                                   model=self.model)
+            if self.cancelled.is_set():
+                chunks.close()  # cancelled before the stream existed
+            try:
+                buffer = ""
+                for chunk in chunks:
+                    if self.cancelled.is_set():
+                        break
+                    buffer += chunk['response'] or ''
+                    *complete, buffer = buffer.split('\n')
+                    for line in complete:
+                        self._emit(line)
+                if buffer and not self.cancelled.is_set():
+                    self._emit(buffer)
+            finally:
+                # Closing the stream drops the connection, so Ollama stops generating
+                chunks.close()
+            self.lines.put(('done', None))
+        except Exception as e:
+            self.lines.put(('error', str(e)))
+
+    def _emit(self, line: str):
+        # Drop markdown code fences such as ```python
+        if line.strip().startswith('```'):
+            return
+        line = line.replace('```', '')
+        if not self.line_count and not line.strip():
+            return  # leading blank lines
+        self.line_count += 1
+        self.lines.put(('line', line + '\n'))
+
+    # UI thread
+
+    def _poll(self):
+        try:
+            if not self.window.winfo_exists():
+                return
+        except self.tk.TclError:
+            return
+        finished = False
+        text = []
+        while True:
+            try:
+                kind, value = self.lines.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'line':
+                text.append(value)
+                continue
+            finished = True
+            if kind == 'error':
+                text.append(f"Error generating code: {value}\n")
+                self.status_label.config(text="Error during code generation.")
+            elif self.cancelled.is_set():
+                self.status_label.config(text="Code generation cancelled.")
+            else:
+                self.status_label.config(text="Code generation completed.")
+        if text:
+            if self.first_line_after is None:
+                self.first_line_after = time.perf_counter() - self.started
+                print(f"Code window '{self.topic}': first line visible after {self.first_line_after:.2f}s")
+                self.status_label.config(text=f"Generating code for {self.topic}... "
+                                              f"(first line after {self.first_line_after:.2f}s)")
+            self.text_widget.config(state='normal')
+            self.text_widget.insert(self.tk.END, ''.join(text))
+            self.text_widget.see(self.tk.END)
+            self.text_widget.config(state='disabled')
+        if finished:
+            self.cancel_button.config(state='disabled')
+            return
+        self.window.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        self._stop()
+        self.status_label.config(text="Cancelling...")
+
+    def close(self):
+        self._stop()
+        self.window.destroy()
+
+    def _stop(self):
+        self.cancelled.set()
+        # Ends a read that is waiting on the model, instead of at the next chunk
+        if self.chunks is not None:
+            self.chunks.close()
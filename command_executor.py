@@ -1,304 +1,278 @@
 import os
-import re
-import subprocess
-import webbrowser
-import pygetwindow as gw
-import pyautogui
-import time
 import urllib.parse
-from typing import Dict, Any, TYPE_CHECKING
-import ollama
-import tkinter as tk
-import psutil
+from typing import Callable, Dict, Any, Optional, TYPE_CHECKING
+
+from intent_router import IntentRouter, ParsedCommand
+from metrics import metrics
+from target_catalog import CATALOG_KINDS, CLOSABLE_KINDS, CatalogMatch, TargetCatalog
+from system_backend import SystemBackend
+from window_backend import WindowBackend, WindowIndex, wait_until
 
 if TYPE_CHECKING:
     from voice_assistant import VoiceAssistant
 
+# Title suffixes of the browsers whose tabs close commands look through
+BROWSER_TITLES = ('google chrome', 'mozilla firefox', 'microsoft edge')
+
 class CommandExecutor:
     # ...existing code from CommandExecutor class...
-    def __init__(self):
-        self.applications = {
-            'notepad': {'command': 'notepad.exe', 'window_title': 'Notepad'},
-            'calculator': {'command': 'calc.exe', 'window_title': 'Calculator'},
-            'cmd': {'command': 'cmd.exe', 'window_title': 'Command Prompt'},
-            'chrome': {'command': r'C:\Program Files\Google\Chrome\Application\chrome.exe', 'window_title': 'Google Chrome'},
-            'edge': {'command': r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe', 'window_title': 'Microsoft Edge'},
-            'paint': {'command': 'mspaint.exe', 'window_title': 'Paint'},
-            'file explorer': {'command': 'explorer.exe', 'window_title': 'File Explorer'},
-            'explorer': {'command': 'explorer.exe', 'window_title': 'File Explorer'},
-            'control panel': {'command': 'control.exe', 'window_title': 'Control Panel'},
-            'settings': {'command': 'ms-settings:', 'window_title': 'Settings'},
-            'vs code': {'command': r'C:\Users\panen\AppData\Local\Programs\Microsoft VS Code\Code.exe', 'window_title': 'Visual Studio Code'},
-            'vs': {'command': r'C:\Users\panen\AppData\Local\Programs\Microsoft VS Code\Code.exe', 'window_title': 'Visual Studio Code'},
-            'excel': {'command': r'C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE', 'window_title': 'Microsoft Excel'},
-            'word': {'command': r'C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE', 'window_title': 'Microsoft Word'},    
-            'ppt': {'command':  r'C:\Program Files\Microsoft Office\root\Office16\POWERPNT.EXE', 'window_title': 'Microsoft PowerPoint', 'alternative_command': 'start powerpnt'},
-            'mail': {'command': r'C:\Program Files\Microsoft Office\root\Office16\OUTLOOK.EXE', 'window_title': 'Outlook', 'alternative_command': 'start outlook'}
+    # Deadlines (seconds) for a window to confirm focus, a tab switch and a close
+    focus_timeout = 1.0
+    tab_timeout = 0.3
+    close_timeout = 1.0
+    max_tabs = 30
+    # Lowest phonetic/spelling confidence at which a misheard command or target is acted on
+    near_miss_confidence = 0.75
+
+    def __init__(self, catalog: TargetCatalog = None, system: SystemBackend = None, windows: WindowBackend = None,
+                 classifier=None, classifier_factory: Optional[Callable[[], Any]] = None):
+        self.catalog = catalog if catalog is not None else TargetCatalog()
+        self.classifier = classifier  # intent_classifier.IntentClassifier, for commands the regexes miss
+        self.classifier_factory = classifier_factory  # builds the classifier during warm_up() instead
+        self.system = system if system is not None else SystemBackend()
+        self.windows = windows if windows is not None else WindowBackend()
+        self.window_index = WindowIndex(self.windows)
+        self.router = IntentRouter()
+        self.handlers = {
+            'write_program': lambda cmd, assistant: self.open_code_development_window(cmd.get('topic'), assistant),
+            'set_alarm': lambda cmd, assistant: assistant.set_alarm(cmd.get('time'), bool(cmd.get('repeat'))),
+            'set_reminder': lambda cmd, assistant: assistant.set_reminder(cmd.get('text'), cmd.get('time'), bool(cmd.get('repeat'))),
+            'cancel_schedule': lambda cmd, assistant: assistant.cancel_scheduled(cmd.get('kind'), cmd.get('time')),
+            'list_schedule': lambda cmd, assistant: assistant.list_scheduled(cmd.get('kind')),
+            'snooze': lambda cmd, assistant: assistant.snooze(int(cmd.get('minutes') or 5)),
+            'leetcode_problem': lambda cmd, assistant: self.open_leetcode_problem(cmd.get('problem_num'), assistant),
+            'youtube_search': lambda cmd, assistant: self.youtube_search(cmd.get('query'), assistant),
+            'search': lambda cmd, assistant: self.search_target(cmd.get('query'), assistant),
+            'open': lambda cmd, assistant: self.open_target(cmd.get('target'), assistant),
+            'close': lambda cmd, assistant: self.close_target(cmd.get('target'), assistant),
+            'volume_up': self.volume_up,
+            'volume_down': self.volume_down,
+            'mute': self.mute,
+            'unmute': self.unmute,
+            'volume_level': self.volume_level,
+            'volume_set': self.volume_set,
+            'battery': self.battery_status,
+            'shutdown': self.shutdown,
+            'restart': self.restart,
+            'sleep': self.sleep,
+            'lock': self.lock,
         }
 
-        self.websites = {
-            'chatgpt': 'https://chat.openai.com',
-            'kaggle': 'https://www.kaggle.com',
-            'leetcode': 'https://leetcode.com',
-            'youtube': 'https://youtube.com',
-            'github': 'https://github.com',
-            'google': 'https://google.com',
-            'linkedin': 'https://linkedin.com',
-            'facebook': 'https://facebook.com',
-            'twitter': 'https://twitter.com',
-            'instagram': 'https://instagram.com',
-            'netflix': 'https://netflix.com',
-            'amazon': 'https://amazon.com',
-            'reddit': 'https://reddit.com',
-            'wikipedia': 'https://wikipedia.org',
-            'gmail': 'https://mail.google.com',
-            'whatsapp': 'https://web.whatsapp.com',
-            'discord': 'https://discord.com',
-            'spotify': 'https://spotify.com',
-            'insta': 'https://instagram.com',
-        }
+    @property
+    def applications(self) -> Dict[str, Any]:
+        return self.catalog.entries['applications']
 
-        self.special_folders = {
-            'documents': os.path.expanduser('~/Documents'),
-            'downloads': os.path.expanduser('~/Downloads'),
-            'desktop': os.path.expanduser('~/Desktop'),
-            'pictures': os.path.expanduser('~/Pictures'),
-            'music': os.path.expanduser('~/Music'),
-            'videos': os.path.expanduser('~/Videos'),
-            'd drive': 'D:\\',
-            'c drive': 'C:\\'
-        }
+    @property
+    def websites(self) -> Dict[str, str]:
+        return self.catalog.entries['websites']
+
+    @property
+    def special_folders(self) -> Dict[str, str]:
+        return self.catalog.entries['special_folders']
 
     def try_execute_command(self, command: str, assistant: "VoiceAssistant") -> bool:
         """
         Try to execute the command, return True if it was a recognized command,
         False if it should be handled as a conversation
         """
-        command_lower = command.lower()
-        
-        # Check for basic commands that shouldn't trigger conversation
-        basic_commands = [
-            'increase volume', 'volume up', 'decrease volume', 'volume down',
-            'mute', 'unmute', 'volume level', 'battery', 'power', 'shutdown',
-            'restart', 'reboot', 'sleep', 'lock'
-        ]
-        
-        if any(cmd in command_lower for cmd in basic_commands):
-            self.execute_command(command, assistant)
-            return True
-            
-        # New feature: detect "write a program on" command
-        write_program_match = re.match(r'write a program on (.+)', command_lower)
-        if write_program_match:
-            topic = write_program_match.group(1).strip()
-            self.open_code_development_window(topic, assistant)
-            return True
-            
-        # Check for alarm and reminder commands
-        alarm_match = re.match(r'set alarm for (.+)', command_lower)
-        if alarm_match:
-            alarm_time = alarm_match.group(1).strip()
-            assistant.set_alarm(alarm_time)
-            return True
-        
-        reminder_match = re.match(r'remind me to (.+) at (.+)', command_lower)
-        if reminder_match:
-            reminder_text = reminder_match.group(1).strip()
-            reminder_time = reminder_match.group(2).strip()
-            assistant.set_reminder(reminder_text, reminder_time)
-            return True
-        
-        # Check for more complex commands
-        understood = self.understand_command(command)
-        print(f"Understood: {understood}")
-
-        intent = understood.get('intent', '').lower()
-        target = understood.get('target', '')
-        query = understood.get('query', '')
-        problem_num = understood.get('problem_num', '')
-
-        if intent in ['open', 'close', 'search', 'youtube_search', 'leetcode_problem']:
-            self.execute_command(command, assistant)
-            return True
-        
-        return False
+        with metrics.timer('route_seconds'):
+            parsed = self.router.route(command)
+            if not parsed.is_command:
+                parsed = self.near_miss(parsed) or self.classify(parsed) or parsed
+        if parsed.confidence < 1.0:
+            print(f"Understood (guessed, {parsed.confidence:.2f}): {parsed.intent} {parsed.slots}")
+        else:
+            print(f"Understood: {parsed.intent} {parsed.slots}")
 
-    def execute_command(self, command: str, assistant: "VoiceAssistant"):
-        command_lower = command.lower()
-        
-        # Volume control commands
-        if 'increase volume' in command_lower or 'volume up' in command_lower:
-            new_volume = assistant.volume_controller.increase_volume()
-            assistant.speak(f"Volume increased to {int(new_volume * 100)} percent")
-            return
-        elif 'decrease volume' in command_lower or 'volume down' in command_lower:
-            new_volume = assistant.volume_controller.decrease_volume()
-            assistant.speak(f"Volume decreased to {int(new_volume * 100)} percent")
-            return
-        elif 'mute' in command_lower:
-            assistant.volume_controller.mute()
-            assistant.speak("Volume muted")
-            return
-        elif 'unmute' in command_lower:
-            assistant.volume_controller.unmute()
-            assistant.speak("Volume unmuted")
-            return
-        elif 'volume' in command_lower and 'level' in command_lower:
-            current_volume = assistant.volume_controller.get_volume()
-            assistant.speak(f"Current volume is at {int(current_volume * 100)} percent")
-            return
-        
-        # Battery status
-        elif 'battery' in command_lower or 'power' in command_lower:
-            battery = psutil.sensors_battery()
-            if battery:
-                percent = battery.percent
-                status = "plugged in" if battery.power_plugged else "not plugged in"
-                assistant.speak(f"Battery is at {percent} percent and {status}")
-            else:
-                assistant.speak("Could not check battery status")
-            return
-        
-        # System commands
-        elif 'shutdown' in command_lower:
-            assistant.speak("Shutting down the computer")
-            os.system("shutdown /s /t 1")
-            return
-        elif 'restart' in command_lower or 'reboot' in command_lower:
-            assistant.speak("Restarting the computer")
-            os.system("shutdown /r /t 1")
-            return
-        elif 'sleep' in command_lower:
-            assistant.speak("Putting the computer to sleep")
-            os.system("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
-            return
-        elif 'lock' in command_lower:
-            assistant.speak("Locking the computer")
-            os.system("rundll32.exe user32.dll,LockWorkStation")
-            return
-        
-        # Application and website commands
-        understood = self.understand_command(command)
-        print(f"Understood: {understood}")
+        if not parsed.is_command:
+            return False
+
+        self.dispatch(parsed, assistant)
+        return True
+
+    def near_miss(self, parsed: ParsedCommand) -> Optional[ParsedCommand]:
+        """
+        What a misrecognized utterance probably meant, before it goes to Gemma;
+        open/close only count when their target is in the catalog.
+        """
+        guess = self.router.near_miss(parsed.text, self.near_miss_confidence)
+        if guess is None:
+            return None
+        if guess.intent in ('open', 'close'):
+            target = self.lookup(guess.get('target'), CATALOG_KINDS if guess.intent == 'open' else CLOSABLE_KINDS)
+            if target is None:
+                return None
+            guess.confidence = min(guess.confidence, target.confidence)
+            guess.slots['target'] = target.name
+        metrics.inc('near_miss_total', intent=guess.intent)
+        return guess
+
+    def classify(self, parsed: ParsedCommand) -> Optional[ParsedCommand]:
+        """The intent classifier's reading of an utterance neither the regexes nor near_miss() placed"""
+        if self.classifier is None:
+            return None
+        try:
+            found = self.classifier.classify(parsed.text)
+        except Exception as e:
+            print(f"Error classifying intent: {e}")
+            return None
+        if found is None:
+            return None
+        intent, confidence, exemplar = found
+        slots = {}
+        if intent in ('open', 'close'):
+            # Only a catalog name spelled out after the verb phrase counts as the target
+            words, verb = parsed.text.lower().split(), exemplar.split()
+            starts = [i for i in range(len(words) - len(verb) + 1) if words[i:i + len(verb)] == verb]
+            if not starts:
+                return None
+            kinds = CATALOG_KINDS if intent == 'open' else CLOSABLE_KINDS
+            target = self.catalog.lookup(' '.join(words[starts[0] + len(verb):]), kinds)
+            if target is None:
+                return None
+            slots['target'] = target.name
+        return ParsedCommand(intent, slots, parsed.text, min(confidence, 0.99))  # a guess, even on an exact exemplar
+
+    def lookup(self, target: str, kinds=CATALOG_KINDS) -> Optional[CatalogMatch]:
+        """Catalog entry named in target, spelled exactly or else near enough"""
+        match = self.catalog.lookup(target, kinds)
+        if match is None:
+            match = self.catalog.fuzzy_lookup(target, kinds, self.near_miss_confidence)
+            if match is not None:
+                print(f"Heard '{target}' as {match.name} ({match.confidence:.2f})")
+                metrics.inc('near_miss_total', intent=match.kind)
+        return match
 
-        intent = understood.get('intent', '').lower()
-        target = understood.get('target', '')
-        query = understood.get('query', '')
-        problem_num = understood.get('problem_num', '')
+    def execute_command(self, command: str, assistant: "VoiceAssistant"):
+        self.dispatch(self.router.route(command), assistant)
 
+    def dispatch(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        handler = self.handlers.get(parsed.intent)
+        if handler is None:
+            return
         try:
-            if intent == 'open':
-                self.open_target(target, assistant)
-            elif intent == 'close':
-                self.close_target(target, assistant)
-            elif intent == 'search':
-                self.search_target(query, assistant)
-            elif intent == 'youtube_search':
-                self.youtube_search(query, assistant)
-            elif intent == 'leetcode_problem':
-                self.open_leetcode_problem(problem_num, assistant)
+            with metrics.timer('command_seconds', intent=parsed.intent):
+                handler(parsed, assistant)
         except Exception as e:
+            metrics.inc('errors_total', component='command', intent=parsed.intent)
             print(f"Error executing command: {e}")
             if assistant.is_active:
                 assistant.speak("Sorry, I couldn't execute that command.")
 
+    def warm_up(self):
+        """Import the window, input and system modules and build the intent classifier ahead of the first command"""
+        self.windows.warm_up()
+        self.system.warm_up()
+        if self.classifier is None and self.classifier_factory is not None:
+            self.classifier = self.classifier_factory()
+        if self.classifier is not None:
+            self.classifier.warm_up()
+
     def understand_command(self, command: str) -> Dict[str, Any]:
-        command_lower = command.lower()
-
-        leetcode_match = re.match(
-            r'(?:leetcode|leet code|lead code) problem (?:number )?(\d+)',
-            command_lower
-        )
-        if leetcode_match:
-            return {
-                'intent': 'leetcode_problem',
-                'problem_num': leetcode_match.group(1)
-            }
-
-        youtube_search_match = re.match(
-            r'(?:search|find) (.+?) (?:in|on) youtube', 
-            command_lower
-        )
-        if youtube_search_match:
-            return {
-                'intent': 'youtube_search',
-                'query': youtube_search_match.group(1)
-            }
-
-        search_match = re.match(
-            r'(?:search|find) (.+?) (?:in|on) (.+)',
-            command_lower
-        )
-        if search_match:
-            return {
-                'intent': 'search',
-                'query': search_match.group(1),
-                'target': search_match.group(2)
-            }
-
-        open_match = re.match(
-            r'(?:open|start|launch) (.+)',
-            command_lower
-        )
-        if open_match:
-            return {
-                'intent': 'open',
-                'target': open_match.group(1)
-            }
-
-        close_match = re.match(
-            r'(?:close|exit|quit) (.+)',
-            command_lower
-        )
-        if close_match:
-            return {
-                'intent': 'close',
-                'target': close_match.group(1)
-            }
-
-        return {'intent': 'unknown', 'target': command}
+        parsed = self.router.route(command)
+        return {'intent': parsed.intent, **parsed.slots}
+
+    # Volume control commands
+    def volume_up(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        new_volume = assistant.volume_controller.increase_volume()
+        assistant.speak(f"Volume increased to {int(new_volume * 100)} percent")
+
+    def volume_down(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        new_volume = assistant.volume_controller.decrease_volume()
+        assistant.speak(f"Volume decreased to {int(new_volume * 100)} percent")
+
+    def mute(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.volume_controller.mute()
+        assistant.speak("Volume muted")
+
+    def unmute(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.volume_controller.unmute()
+        assistant.speak("Volume unmuted")
+
+    def volume_level(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        current_volume = assistant.volume_controller.get_volume()
+        assistant.speak(f"Current volume is at {int(current_volume * 100)} percent")
+
+    def volume_set(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        percent = min(100, int(parsed.get('level')))
+        seconds = parsed.get('seconds')
+        if seconds:
+            # Returns at once; the volume thread fades in the background
+            assistant.volume_controller.ramp_to(percent / 100, float(seconds))
+            assistant.speak(f"Fading volume to {percent} percent over {seconds} seconds")
+        else:
+            assistant.volume_controller.set_volume(percent / 100)
+            assistant.speak(f"Volume set to {percent} percent")
+
+    # Battery status
+    def battery_status(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        battery = self.system.battery()
+        if battery:
+            percent = battery.percent
+            status = "plugged in" if battery.power_plugged else "not plugged in"
+            assistant.speak(f"Battery is at {percent} percent and {status}")
+        else:
+            assistant.speak("Could not check battery status")
+
+    # System commands
+    def shutdown(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.speak("Shutting down the computer")
+        self.system.shell("shutdown /s /t 1")
+
+    def restart(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.speak("Restarting the computer")
+        self.system.shell("shutdown /r /t 1")
+
+    def sleep(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.speak("Putting the computer to sleep")
+        self.system.shell("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
+
+    def lock(self, parsed: ParsedCommand, assistant: "VoiceAssistant"):
+        assistant.speak("Locking the computer")
+        self.system.shell("rundll32.exe user32.dll,LockWorkStation")
 
     def open_target(self, target: str, assistant: "VoiceAssistant"):
         target_lower = target.lower()
+        self.window_index.invalidate()  # a window or tab is about to appear
 
-        for folder_name, path in self.special_folders.items():
-            if folder_name in target_lower:
-                if os.path.exists(path):
-                    os.startfile(path)
-                    assistant.speak(f"Opening {folder_name}")
-                    return
-                else:
-                    assistant.speak(f"Sorry, I couldn't find the {folder_name} folder.")
-                    return
+        match = self.lookup(target_lower)
 
-        for site_name, url in self.websites.items():
-            if site_name in target_lower:
-                webbrowser.open(url)
-                assistant.speak(f"Opening {site_name}")
-                return
+        if match and match.kind == 'special_folders':
+            folder_name, path = match.name, match.value
+            if self.system.open_path(path):
+                assistant.speak(f"Opening {folder_name}")
+            else:
+                assistant.speak(f"Sorry, I couldn't find the {folder_name} folder.")
+            return
 
-        for app_name, app_info in self.applications.items():
-            if app_name in target_lower:
-                try:
-                    subprocess.Popen(app_info['command'])
-                    assistant.speak(f"Opening {app_name}")
-                    return
-                except Exception as e:
-                    print(f"Error opening {app_name}: {e}")
-                    if app_info['command'].startswith('ms-'):
-                        try:
-                            os.system(f'start {app_info["command"]}')
-                            assistant.speak(f"Opening {app_name}")
-                            return
-                        except:
-                            pass
-                    assistant.speak(f"Sorry, I couldn't open {app_name}. It may not be installed.")
-                    return
+        if match and match.kind == 'websites':
+            site_name, url = match.name, match.value
+            self.system.open_url(url)
+            assistant.speak(f"Opening {site_name}")
+            return
+
+        if match and match.kind == 'applications':
+            app_name, app_info = match.name, match.value
+            try:
+                self.system.launch(app_info['command'])
+                assistant.speak(f"Opening {app_name}")
+                return
+            except Exception as e:
+                print(f"Error opening {app_name}: {e}")
+                if app_info['command'].startswith('ms-'):
+                    try:
+                        self.system.shell(f'start {app_info["command"]}')
+                        assistant.speak(f"Opening {app_name}")
+                        return
+                    except:
+                        pass
+                assistant.speak(f"Sorry, I couldn't open {app_name}. It may not be installed.")
+                return
 
         if '.' in target and ' ' not in target:
             if not target.startswith(('http://', 'https://')):
                 target = 'https://' + target
-            webbrowser.open(target)
+            self.system.open_url(target)
             assistant.speak(f"Opening website")
         else:
             assistant.speak(f"Sorry, I don't know how to open {target}.")
@@ -306,231 +280,180 @@ class CommandExecutor:
     def close_target(self, target: str, assistant: "VoiceAssistant"):
         target_lower = target.lower()
 
-        for site_name, url in self.websites.items():
-            if site_name in target_lower:
-                browsers = {
-                    'chrome': {'name': 'Google Chrome', 'shortcut': 'chrome'},
-                    'firefox': {'name': 'Mozilla Firefox', 'shortcut': 'firefox'},
-                    'edge': {'name': 'Microsoft Edge', 'shortcut': 'msedge'}
-                }
-                
-                for browser_key, browser_info in browsers.items():
-                    try:
-                        windows = gw.getWindowsWithTitle(browser_info['name'])
-                        if not windows:
-                            continue
-
-                        for window in windows:
-                            win_title = window.title.lower()
-                            site_url = url.replace('https://', '').replace('www.', '')
-                            
-                            tab_patterns = [
-                                f"{site_name}",
-                                f"{site_url}",
-                                f"{site_name.replace(' ', '')}",
-                                f"{site_url.split('.')[0]}",
-                                f"{site_name.split()[0]}"
-                            ]
-                            tab_patterns = [p for p in tab_patterns if p]
-                            
-                            if any(pattern in win_title for pattern in tab_patterns):
-                                try:
-                                    current_active = gw.getActiveWindow()
-                                    window.activate()
-                                    time.sleep(0.5)
-                                    
-                                    window.restore()
-                                    window.maximize()
-                                    time.sleep(0.3)
-                                    
-                                    try:
-                                        left, top, width, height = window.left, window.top, window.width, window.height
-                                        tab_count = len(window.title.split(' - ')) - 1
-                                        tab_width = width / max(1, tab_count)
-                                        
-                                        for i in range(tab_count):
-                                            tab_x = left + (i * tab_width) + 50
-                                            tab_y = top + 10
-                                            pyautogui.click(tab_x, tab_y)
-                                            time.sleep(0.2)
-                                            
-                                            current_title = gw.getActiveWindow().title.lower()
-                                            if any(pattern in current_title for pattern in tab_patterns):
-                                                break
-                                    except Exception as e:
-                                        print(f"Error focusing tab: {e}")
-                                    
-                                    pyautogui.hotkey('ctrl', 'w')
-                                    time.sleep(0.5)
-                                    
-                                    new_title = window.title.lower()
-                                    if not any(pattern in new_title for pattern in tab_patterns):
-                                        assistant.speak(f"Closed {site_name}")
-                                        if current_active:
-                                            try:
-                                                current_active.activate()
-                                            except:
-                                                pass
-                                        return
-                                    
-                                    pyautogui.hotkey('alt', 'f4')
-                                    time.sleep(0.5)
-                                    assistant.speak(f"Closed {site_name} window")
-                                    if current_active:
-                                        try:
-                                            current_active.activate()
-                                        except:
-                                            pass
-                                    return
-                                    
-                                except Exception as e:
-                                    print(f"Error closing {site_name}: {e}")
-                                    continue
-                        
-                        assistant.speak(f"Couldn't find an open {site_name} tab to close")
-                        return
+        match = self.lookup(target_lower, kinds=CLOSABLE_KINDS)
 
-                    except Exception as e:
-                        print(f"Error checking {browser_info['name']} windows: {e}")
-                        continue
-    
-        for app_name, app_info in self.applications.items():
-            if app_name in target_lower:
-                try:
-                    windows = gw.getWindowsWithTitle(app_info['window_title'])
-                    if windows:
-                        for window in windows:
-                            if (target_lower in window.title.lower() or 
-                                app_name in window.title.lower()):
-                                try:
-                                    window.close()
-                                    assistant.speak(f"Closed {app_name}")
-                                    return
-                                except Exception as e:
-                                    print(f"Error closing window {window.title}: {e}")
-
-                    if app_info['command'].endswith('.exe'):
-                        try:
-                            process_name = os.path.basename(app_info['command'])
-                            subprocess.call(f'taskkill /f /im {process_name}', shell=True)
-                            assistant.speak(f"Closed {app_name}")
-                            return
-                        except Exception as e:
-                            print(f"Error killing process {app_name}: {e}")
-                            if 'alternative_command' in app_info:
-                                try:
-                                    os.system(app_info['alternative_command'])
-                                    assistant.speak(f"Closed {app_name}")
-                                    return
-                                except Exception as e:
-                                    print(f"Error with alternative close: {e}")
-                            
-                            assistant.speak(f"Sorry, I couldn't close {app_name}.")
-                            return
-                except Exception as e:
-                    print(f"Error closing {app_name}: {e}")
-                    assistant.speak(f"Sorry, I couldn't close {app_name}.")
-                    return
+        if match and match.kind == 'websites':
+            self.close_site_tab(match.name, match.value, assistant)
+            return
 
         try:
-            windows = gw.getWindowsWithTitle(target)
-            if windows:
+            if match and match.kind == 'applications':
+                app_name, app_info = match.name, match.value
+                windows = self.window_index.find([app_info['window_title'].lower()])
                 for window in windows:
-                    if target_lower in window.title.lower():
-                        try:
-                            window.close()
-                            assistant.speak(f"Closed {target}")
-                            return
-                        except Exception as e:
-                            print(f"Error closing window {window.title}: {e}")
-                            assistant.speak(f"Sorry, I couldn't close {target}.")
+                    title = self.windows.title(window).lower()
+                    if target_lower in title or app_name in title:
+                        if self._close_window(window):
+                            assistant.speak(f"Closed {app_name}")
                             return
+
+                if app_info['command'].endswith('.exe'):
+                    try:
+                        process_name = os.path.basename(app_info['command'])
+                        self.system.kill(process_name)
+                        self.window_index.invalidate()
+                        assistant.speak(f"Closed {app_name}")
+                        return
+                    except Exception as e:
+                        print(f"Error killing process {app_name}: {e}")
+                        if 'alternative_command' in app_info:
+                            try:
+                                self.system.shell(app_info['alternative_command'])
+                                self.window_index.invalidate()
+                                assistant.speak(f"Closed {app_name}")
+                                return
+                            except Exception as e:
+                                print(f"Error with alternative close: {e}")
+
+                        assistant.speak(f"Sorry, I couldn't close {app_name}.")
+                        return
+        except Exception as e:
+            print(f"Error closing {target}: {e}")
+            assistant.speak(f"Sorry, I couldn't close {target}.")
+            return
+
+        try:
+            for window in self.window_index.find([target_lower]):
+                if self._close_window(window):
+                    assistant.speak(f"Closed {target}")
+                else:
+                    assistant.speak(f"Sorry, I couldn't close {target}.")
+                return
         except Exception as e:
             print(f"Error closing window {target}: {e}")
 
         assistant.speak(f"Sorry, I couldn't find {target} to close it.")
 
+    def close_site_tab(self, site_name: str, url: str, assistant: "VoiceAssistant"):
+        """
+        A browser window's title is its active tab's title. If the site is the
+        active tab somewhere it is closed directly; otherwise each browser
+        window's tabs are cycled with Ctrl+Tab until the site shows up. Every
+        step waits for the window to confirm (focus, title change) against a
+        deadline instead of sleeping a fixed time.
+        """
+        site_url = url.replace('https://', '').replace('http://', '').replace('www.', '').rstrip('/')
+        patterns = {site_name, site_url, site_name.replace(' ', ''), site_url.split('.')[0], site_name.split()[0]}
+        patterns = [pattern.lower() for pattern in patterns if pattern]
+
+        def shows_site(window) -> bool:
+            # Match the page title only, so "google" does not match "- Google Chrome"
+            title = self.windows.title(window).lower()
+            page, _, browser = title.rpartition(' - ')
+            if browser in BROWSER_TITLES:
+                title = page
+            return any(pattern in title for pattern in patterns)
+
+        try:
+            browsers = self.window_index.find(BROWSER_TITLES)
+        except Exception as e:
+            print(f"Error listing browser windows: {e}")
+            browsers = []
+        # Direct path first: windows whose active tab already is the site
+        browsers.sort(key=lambda window: not shows_site(window))
+
+        previous = None
+        try:
+            previous = self.windows.active_window()
+        except Exception:
+            pass
+
+        try:
+            for window in browsers:
+                try:
+                    if not self._focus(window):
+                        continue
+                    if not shows_site(window) and not self._find_tab(window, shows_site):
+                        continue
+
+                    self.windows.hotkey('ctrl', 'w')
+                    # The title turns into the next tab's, or the window goes. If the next tab is the
+                    # same site it never changes, so the window is not closed as a fallback: that
+                    # would take every other tab with it.
+                    closed = wait_until(lambda: not shows_site(window), self.close_timeout)
+                    self.window_index.invalidate()
+                    if closed:
+                        assistant.speak(f"Closed {site_name}")
+                    else:
+                        print(f"{site_name} still showing {self.close_timeout}s after Ctrl+W")
+                        assistant.speak(f"I tried to close {site_name}, but it still seems to be open")
+                    return
+                except Exception as e:
+                    print(f"Error closing {site_name}: {e}")
+                    continue
+        finally:
+            if previous is not None:
+                try:
+                    if self.windows.title(previous):
+                        self.windows.activate(previous)
+                except Exception:
+                    pass
+
+        assistant.speak(f"Couldn't find an open {site_name} tab to close")
+
+    def _focus(self, window) -> bool:
+        self.windows.activate(window)
+        return wait_until(lambda: self.windows.active_window() == window, self.focus_timeout)
+
+    def _find_tab(self, window, matches: Callable[[Any], bool]) -> bool:
+        """Cycle the focused window's tabs until matches(window); stops after one full round"""
+        first_title = self.windows.title(window)
+        moved = False
+        for _ in range(self.max_tabs):
+            before = self.windows.title(window)
+            self.windows.hotkey('ctrl', 'tab')
+            changed = wait_until(lambda: self.windows.title(window) != before, self.tab_timeout)
+            if matches(window):
+                return True
+            if not changed and not moved:
+                return False  # nothing switched: a single tab
+            # An unchanged title after a switch is a neighbour with the same title; keep going
+            moved = moved or changed
+            if changed and self.windows.title(window) == first_title:
+                return False  # back at the start
+        return False
+
+    def _close_window(self, window) -> bool:
+        try:
+            self.windows.close(window)
+        except Exception as e:
+            print(f"Error closing window {self.windows.title(window)}: {e}")
+            return False
+        self.window_index.invalidate()
+        return True
+
     def search_target(self, query: str, assistant: "VoiceAssistant"):
-        webbrowser.open(f'https://www.google.com/search?q={query}')
+        self.system.open_url(f'https://www.google.com/search?q={query}')
         assistant.speak(f"Searching for {query}")
 
     def youtube_search(self, query: str, assistant: "VoiceAssistant"):
         encoded_query = urllib.parse.quote_plus(query)
         url = f"https://www.youtube.com/results?search_query={encoded_query}"
-        webbrowser.open(url)
+        self.system.open_url(url)
         assistant.speak(f"Searching YouTube for {query}")
 
     def open_leetcode_problem(self, problem_num: str, assistant: "VoiceAssistant"):
         if problem_num:
-            webbrowser.open(f'https://leetcode.com/problemset/all/?search={problem_num}')
+            self.system.open_url(f'https://leetcode.com/problemset/all/?search={problem_num}')
             assistant.speak(f"Opening LeetCode problem {problem_num}")
 
     def open_code_development_window(self, topic: str, assistant: "VoiceAssistant"):
         """
-        Generates code for the given topic using ollama.
-        Displays the generated code in a Tkinter window.
-        Removes unwanted characters like backticks from the generated code.
+        Opens a window that shows a Python program on the given topic while
+        Gemma is still writing it (see code_window.py). The window is built on
+        the assistant's UI thread, so several can be open at once.
         """
-        import threading
-
-        def clean_code(raw_code: str) -> str:
-            # Remove unwanted backticks and trim whitespace
-            cleaned = raw_code.replace('```', '').strip()
-            return cleaned
-
-        def generate_code():
-            status_label.config(text=f"Generating code for {topic}...")
-            try:
-                instruction = "Write a complete, well-commented Python program on the following topic:"
-                prompt = f"{instruction} {topic}"
-                response = ollama.generate(
-                    model='gemma:2b',
-                    prompt=prompt,
-                    options={'temperature': 0.3, 'max_tokens': 500}
-                )
-                raw_code = response.get('response', '').strip()
-                code = clean_code(raw_code)
-                status_label.config(text="Code generation completed.")
-            except Exception as e:
-                code = f"Error generating code: {e}"
-                status_label.config(text="Error during code generation.")
-
-            # Insert code in chunks to improve UI responsiveness
-            text_widget.config(state='normal')
-            text_widget.delete('1.0', tk.END)
-            chunk_size = 500
-            for i in range(0, len(code), chunk_size):
-                text_widget.insert(tk.END, code[i:i+chunk_size])
-                text_widget.update()
-            text_widget.config(state='disabled')
-
-        def run_window():
-            window = tk.Tk()
-            window.title(f"Code Development: {topic}")
-            window.geometry("800x600")
-
-            label = tk.Label(window, text=f"Generated Program on: {topic}", font=("Arial", 14))
-            label.pack(pady=10)
-
-            global status_label
-            status_label = tk.Label(window, text="", font=("Arial", 10), fg="blue")
-            status_label.pack(pady=5)
-
-            scrollbar = tk.Scrollbar(window)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-            global text_widget
-            text_widget = tk.Text(window, wrap=tk.NONE, yscrollcommand=scrollbar.set, font=("Consolas", 12))
-            text_widget.pack(expand=True, fill=tk.BOTH)
-            text_widget.config(state='disabled')
-
-            scrollbar.config(command=text_widget.yview)
-
-            # Automatically generate code on window open
-            generate_code()
-
-            window.mainloop()
+        from code_window import CodeWindow
 
-        # Run the Tkinter window in a separate thread to avoid blocking
-        threading.Thread(target=run_window, daemon=True).start()
+        assistant.ui.call(CodeWindow, topic, assistant.llm, assistant.model)
     pass
\ No newline at end of file
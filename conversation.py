@@ -0,0 +1,125 @@
+import hashlib
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+# Openers and pronouns that make a question lean on earlier turns ("and how many people live there")
+_FOLLOW_UP = re.compile(
+    r"^(?:and|but|so|also|then|what about|how about|why not|really)\b|"
+    r"\b(?:it|its|it's|that|this|those|these|there|then|they|them|their|he|him|his|she|her|one|more|else|again)\b")
+
+
+def is_follow_up(prompt: str) -> bool:
+    """Whether a prompt probably depends on the conversation so far"""
+    return bool(_FOLLOW_UP.search(' '.join(prompt.lower().split())))
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    tokens: int
+
+
+class ConversationContext:
+    """
+    Token-budgeted conversation memory for Gemma prompts.
+
+    Recent turns are kept verbatim. Once they exceed max_tokens, the oldest
+    are folded into a short extractive summary (question plus the first
+    sentence of the answer), which is itself capped at summary_tokens.
+
+    After a generation that ran to completion, Ollama returns its `context`
+    (the token ids of prompt and reply). The next prompt then only carries
+    the new question plus that context, so the server does not re-evaluate
+    the history. The context is dropped, and the history is sent as text
+    again, when the reply did not come from a completed generation (cached
+    or cut short), when turns are evicted, or when it grows past max_tokens.
+    """
+
+    def __init__(self, max_tokens: int = 512, summary_tokens: int = 96):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.turns: "deque[Turn]" = deque()
+        self.summary = ""
+        self.tokens = 0
+        self.ollama_context: Optional[List[int]] = None
+        self.context_reuses = 0
+        self.text_rebuilds = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = ""
+        self.tokens = 0
+        self.ollama_context = None
+
+    def digest(self) -> str:
+        """Fingerprint of the history a reply could depend on"""
+        history = [self.summary] + [f"{turn.user}\n{turn.assistant}" for turn in self.turns]
+        return hashlib.sha1('\n'.join(history).encode('utf-8')).hexdigest()[:16]
+
+    def build(self, instruction: str, prompt: str) -> Tuple[str, Optional[List[int]]]:
+        """Return (full_prompt, context) for the next generate call"""
+        if self.ollama_context is not None:
+            self.context_reuses += 1
+            return f"User: {prompt}\nAssistant:", self.ollama_context
+        if self.turns or self.summary:
+            self.text_rebuilds += 1
+        # Append-only layout, so the server-side prompt cache can reuse the prefix
+        lines = [instruction]
+        if self.summary:
+            lines.append(f"Earlier in this conversation: {self.summary}")
+        for turn in self.turns:
+            lines.append(f"User: {turn.user}\nAssistant: {turn.assistant}")
+        lines.append(f"User: {prompt}\nAssistant:")
+        return '\n'.join(lines), None
+
+    def add(self, user: str, assistant: str, context: Optional[Sequence[int]] = None):
+        turn = Turn(user, assistant, estimate_tokens(user) + estimate_tokens(assistant))
+        self.turns.append(turn)
+        self.tokens += turn.tokens
+        evicted = self._enforce_budget()
+        if context is not None and not evicted and len(context) <= self.max_tokens:
+            self.ollama_context = list(context)
+        else:
+            self.ollama_context = None
+
+    def _enforce_budget(self) -> bool:
+        evicted = False
+        while self.tokens > self.max_tokens and len(self.turns) > 1:
+            turn = self.turns.popleft()
+            self.tokens -= turn.tokens
+            self._summarize(turn)
+            self.evictions += 1
+            evicted = True
+        return evicted
+
+    def _summarize(self, turn: Turn):
+        first_sentence = re.split(r'(?<=[.!?])\s+', turn.assistant.strip(), maxsplit=1)[0]
+        line = f"Q: {turn.user} A: {first_sentence}"
+        words = f"{self.summary} {line}".split()
+        # Keep the most recent part of the summary within its budget
+        while words and estimate_tokens(' '.join(words)) > self.summary_tokens:
+            words.pop(0)
+        self.summary = ' '.join(words)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'turns': len(self.turns),
+            'tokens': self.tokens,
+            'summary_tokens': estimate_tokens(self.summary),
+            'context_reuses': self.context_reuses,
+            'text_rebuilds': self.text_rebuilds,
+            'evictions': self.evictions,
+        }
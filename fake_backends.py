@@ -0,0 +1,329 @@
+"""
+Stand-ins for the hardware and OS pieces of the assistant (microphone,
+speech recognizer, speech engine, audio player, overlay, launcher and
+desktop windows), so the real VoiceAssistant loop can run headless. Used by
+`benchmark.py e2e`; volume has volume_backends.MemoryBackend.
+"""
+import queue
+import threading
+import time
+import urllib.parse
+import wave
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from asr_backends import ASRBackend, BackendError, RecognitionResult
+from phrase_cache import WavPlayer, wav_seconds
+from system_backend import SystemBackend
+from ui_thread import HeadlessUI
+from window_backend import WindowBackend
+
+
+@dataclass
+class ScriptedAudio:
+    """One replayed utterance: what was said, and optionally the recorded samples"""
+    transcript: str
+    frame_data: bytes = b""
+    sample_rate: int = 16000
+    sample_width: int = 2
+
+    def get_raw_data(self, convert_rate=None, convert_width=None) -> bytes:
+        return self.frame_data
+
+    @classmethod
+    def from_wav(cls, path: str, transcript: str) -> "ScriptedAudio":
+        with wave.open(path, 'rb') as wav:
+            return cls(transcript, wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+
+
+class ScriptedCapture:
+    """
+    Plays the part of ContinuousCapture: next_audio() hands out the scripted
+    utterances one at a time. on_audio(index) is called as each is handed out
+    and on_exhausted once the script has run out.
+    """
+
+    def __init__(self, utterances: List[ScriptedAudio], on_audio: Optional[Callable[[int], None]] = None,
+                 on_exhausted: Optional[Callable[[], None]] = None):
+        self.utterances = list(utterances)
+        self.index = 0
+        self.on_audio = on_audio
+        self.on_exhausted = on_exhausted
+
+    def next_audio(self, timeout: Optional[float] = None) -> Optional[ScriptedAudio]:
+        if self.index >= len(self.utterances):
+            if self.on_exhausted is not None:
+                self.on_exhausted()
+            return None
+        audio = self.utterances[self.index]
+        if self.on_audio is not None:
+            self.on_audio(self.index)
+        self.index += 1
+        return audio
+
+
+class ScriptedASRBackend(ASRBackend):
+    """Returns the transcript attached to ScriptedAudio after a fixed delay"""
+    name = "scripted"
+
+    def __init__(self, delay: float = 0.0, confidence: float = 0.95, name: Optional[str] = None,
+                 remote: bool = False, fail: bool = False):
+        self.delay = delay
+        self.confidence = confidence
+        if name is not None:
+            self.name = name
+        self.remote = remote
+        self.fail = fail  # raise BackendError instead of answering
+
+    def recognize(self, audio) -> Optional[RecognitionResult]:
+        time.sleep(self.delay)
+        if self.fail:
+            raise BackendError(f"{self.name} unavailable")
+        text = getattr(audio, 'transcript', '')
+        return RecognitionResult(text.lower(), self.confidence, self.name) if text else None
+
+
+class FakeTTSEngine:
+    """
+    pyttsx3-compatible engine that "speaks" at words_per_second (0: instantly)
+    and fires started-word callbacks, so interrupting works as with pyttsx3.
+    on_say(text) is called as each utterance starts, after `startup` seconds
+    of synthesis. save_to_file() writes silence as long as the speech would be.
+    """
+
+    def __init__(self, words_per_second: float = 0.0, on_say: Optional[Callable[[str], None]] = None,
+                 startup: float = 0.0):
+        self.words_per_second = words_per_second
+        self.on_say = on_say
+        self.startup = startup
+        self.pending: List[str] = []
+        self.files: List[tuple] = []
+        self.callbacks = {}
+        self.properties = {'voice': 'fake'}
+        self.stopped = False
+        self.spoken: List[str] = []
+        self.saved: List[str] = []
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def save_to_file(self, text: str, path: str):
+        self.files.append((text, path))
+
+    def connect(self, topic: str, callback):
+        self.callbacks[topic] = callback
+
+    def say(self, text: str):
+        self.pending.append(text)
+
+    def stop(self):
+        self.stopped = True
+
+    def runAndWait(self):
+        self.stopped = False
+        if self.startup and (self.pending or self.files):
+            time.sleep(self.startup)
+        files, self.files = self.files, []
+        for text, path in files:
+            seconds = len(text.split()) / self.words_per_second if self.words_per_second else 0.01
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(8000)
+                wav.writeframes(b'\0\0' * int(seconds * 8000))
+            self.saved.append(text)
+        pending, self.pending = self.pending, []
+        for text in pending:
+            if self.on_say is not None:
+                self.on_say(text)
+            self.spoken.append(text)
+            on_word = self.callbacks.get('started-word')
+            location = 0
+            for word in text.split():
+                if on_word is not None:
+                    on_word(None, location, len(word))
+                if self.stopped:
+                    return
+                if self.words_per_second:
+                    time.sleep(1.0 / self.words_per_second)
+                location += len(word) + 1
+
+
+class FakePlayer(WavPlayer):
+    """Plays a WAV file by waiting out its length; on_play(path) is called as playback starts"""
+    name = "fake"
+
+    def __init__(self, on_play: Optional[Callable[[str], None]] = None):
+        self.on_play = on_play
+        self.played: List[str] = []
+
+    def play(self, path: str, stop: threading.Event) -> bool:
+        if self.on_play is not None:
+            self.on_play(path)
+        self.played.append(path)
+        return not stop.wait(wav_seconds(path))
+
+
+class FakeUI(HeadlessUI):
+    """No-op replacement for UIThread"""
+
+
+class FakeBattery:
+    percent = 80
+    power_plugged = True
+
+
+class FakeWindow:
+    """A desktop window; browsers have tabs and their title is the active tab's"""
+
+    def __init__(self, backend: "FakeWindowBackend", name: str, tabs: Optional[List[str]] = None):
+        self.backend = backend
+        self.name = name
+        self.tabs = list(tabs or [])
+        self.active_tab = 0
+        self.closed = False
+
+    @property
+    def title(self) -> str:
+        self.backend.settle()
+        if self.closed:
+            return ''
+        if self.tabs:
+            return f"{self.tabs[self.active_tab]} - {self.name}"
+        return self.name
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+    In-memory desktop. Focus, tab switches and closes take effect `latency`
+    seconds after the keystroke, like a real window manager, so callers have
+    to wait for them to land.
+    """
+
+    def __init__(self, latency: float = 0.01, browser: str = "Google Chrome"):
+        self.latency = latency
+        self.browser = browser
+        self.lock = threading.RLock()
+        self.open_windows: List[FakeWindow] = []
+        self.active: Optional[FakeWindow] = None
+        self.pending = []  # (due, action)
+        self.keystrokes = 0
+        self.enumerations = 0
+
+    def warm_up(self):
+        pass
+
+    def open_window(self, name: str, tabs: Optional[List[str]] = None) -> FakeWindow:
+        with self.lock:
+            window = FakeWindow(self, name, tabs)
+            self.open_windows.append(window)
+            self.active = window
+            return window
+
+    def open_tab(self, title: str):
+        """Open a tab in the first browser window, starting one if needed"""
+        with self.lock:
+            browsers = [window for window in self.open_windows if window.name == self.browser]
+            if not browsers:
+                self.open_window(self.browser, [title])
+                return
+            window = browsers[0]
+            window.tabs.append(title)
+            window.active_tab = len(window.tabs) - 1
+
+    def _later(self, action: Callable[[], None]):
+        with self.lock:
+            self.pending.append((time.perf_counter() + self.latency, action))
+
+    def settle(self):
+        with self.lock:
+            now = time.perf_counter()
+            due = [action for when, action in self.pending if when <= now]
+            self.pending = [(when, action) for when, action in self.pending if when > now]
+            for action in due:
+                action()
+
+    def _remove(self, window: FakeWindow):
+        window.closed = True
+        if window in self.open_windows:
+            self.open_windows.remove(window)
+        if self.active is window:
+            self.active = self.open_windows[-1] if self.open_windows else None
+
+    def windows(self) -> List:
+        self.settle()
+        with self.lock:
+            self.enumerations += 1
+            return list(self.open_windows)
+
+    def active_window(self):
+        self.settle()
+        return self.active
+
+    def activate(self, window):
+        def focus():
+            if not window.closed:
+                self.active = window
+        self._later(focus)
+
+    def close(self, window):
+        self._later(lambda: self._remove(window))
+
+    def hotkey(self, *keys: str):
+        self.keystrokes += 1
+        self.settle()
+        window = self.active
+        if window is None:
+            return
+        if keys == ('ctrl', 'tab') and window.tabs:
+            def next_tab():
+                window.active_tab = (window.active_tab + 1) % len(window.tabs)
+            self._later(next_tab)
+        elif keys == ('ctrl', 'w') and window.tabs:
+            def close_tab():
+                del window.tabs[window.active_tab]
+                if not window.tabs:
+                    self._remove(window)
+                else:
+                    window.active_tab = min(window.active_tab, len(window.tabs) - 1)
+            self._later(close_tab)
+        elif keys == ('alt', 'f4'):
+            self.close(window)
+
+
+class FakeSystemBackend(SystemBackend):
+    """
+    Records what would have been opened, launched or run instead of doing it.
+    With a FakeWindowBackend, opened URLs show up there as browser tabs.
+    """
+
+    def __init__(self, windows: Optional[FakeWindowBackend] = None):
+        self.calls: "queue.Queue" = queue.Queue()
+        self.windows = windows
+
+    def warm_up(self):
+        pass
+
+    def open_url(self, url: str):
+        self.calls.put(('open_url', url))
+        if self.windows is not None:
+            self.windows.open_tab(urllib.parse.urlsplit(url).netloc.replace('www.', '') or url)
+
+    def open_path(self, path: str) -> bool:
+        self.calls.put(('open_path', path))
+        return True
+
+    def launch(self, command: str):
+        self.calls.put(('launch', command))
+
+    def shell(self, command: str):
+        self.calls.put(('shell', command))
+
+    def kill(self, process_name: str):
+        self.calls.put(('kill', process_name))
+
+    def battery(self):
+        return FakeBattery()
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the Ollama HTTP API, for trying the assistant without a
+real model. Point the client at it with OLLAMA_HOST, e.g.
+
+    python fake_ollama.py --port 11435
+    OLLAMA_HOST=http://127.0.0.1:11435 python voxfusion.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "This is a canned answer from the fake Ollama server. "
+    "It streams one word at a time. "
+    "Each sentence takes a little while to arrive. "
+    "This fourth sentence should never be generated when the client stops early. "
+    "Neither should this one."
+)
+
+
+class FakeOllamaServer:
+    """
+    Serves /api/generate with a fixed reply, streamed word by word with a
+    configurable delay, and /api/embeddings with hashed word features. Keeps counters so callers can check whether a client
+    aborted a stream before it was finished, and how many TCP connections
+    it opened.
+
+    Like Ollama, the model has to be loaded first (load_delay seconds) and
+    is unloaded keep_alive seconds after the last request. An empty prompt
+    only loads it. Responses carry load/prompt-eval/eval durations.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply: str = DEFAULT_REPLY, token_delay: float = 0.02,
+                 load_delay: float = 0.0):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.load_delay = load_delay
+        self.loaded_until = 0.0  # monotonic time the model gets unloaded
+        self.requests = 0
+        self.tokens_sent = 0
+        self.aborted = 0
+        self.connections = 0
+        self.loads = 0
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.embedder = None
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def load_model(self) -> float:
+        """Returns the seconds spent loading (0 when the model was still resident)"""
+        with self.load_lock:
+            with self.lock:
+                loaded = time.monotonic() < self.loaded_until
+                if not loaded:
+                    self.loads += 1
+            if not loaded:
+                time.sleep(self.load_delay)
+            with self.lock:
+                self.loaded_until = float('inf')  # stays resident while the request runs
+        return 0.0 if loaded else self.load_delay
+
+    def release_model(self, keep_alive):
+        keep_alive = 300 if keep_alive is None else keep_alive
+        if isinstance(keep_alive, str):
+            keep_alive = float(keep_alive.rstrip('s'))
+        with self.lock:
+            self.loaded_until = time.monotonic() + keep_alive
+
+    @staticmethod
+    def timings(load: float, request, tokens, eval_seconds: float):
+        """Duration fields plus a fake `context`: one id per word of earlier context, prompt and reply"""
+        prompt_words = len(request.get("prompt", "").split())
+        context = list(request.get("context") or [])
+        return {
+            "total_duration": int((load + eval_seconds) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_words,
+            "prompt_eval_duration": 0,
+            "eval_count": len(tokens),
+            "eval_duration": int(eval_seconds * 1e9),
+            "context": context + list(range(len(context), len(context) + prompt_words + len(tokens))),
+        }
+
+    def tokens(self, prompt: str):
+        words = self.reply.split(' ')
+        return [w + ' ' for w in words[:-1]] + [words[-1]]
+
+    def embed(self, text: str):
+        if self.embedder is None:
+            from intent_classifier import HashingEmbedder
+            self.embedder = HashingEmbedder()
+        return self.embedder.embed(text).tolist()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/embeddings":
+                    with server.lock:
+                        server.requests += 1
+                    self._send_json({"embedding": server.embed(request.get("prompt", ""))})
+                    return
+                if self.path != "/api/generate":
+                    self._send_json({"error": f"unsupported path {self.path}"}, status=404)
+                    return
+                with server.lock:
+                    server.requests += 1
+                prompt = request.get("prompt", "")
+                keep_alive = request.get("keep_alive")
+                load = server.load_model()
+                try:
+                    tokens = server.tokens(prompt) if prompt else []
+                    if not request.get("stream", True):
+                        eval_seconds = server.token_delay * len(tokens)
+                        time.sleep(eval_seconds)
+                        with server.lock:
+                            server.tokens_sent += len(tokens)
+                        self._send_json({"model": request.get("model"), "response": ''.join(tokens), "done": True,
+                                         **server.timings(load, request, tokens, eval_seconds)})
+                        return
+                    self._stream(request, tokens, load)
+                finally:
+                    server.release_model(keep_alive)
+
+            def _stream(self, request, tokens, load):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                started = time.monotonic()
+                try:
+                    for token in tokens:
+                        time.sleep(server.token_delay)
+                        self._write_chunk({"model": request.get("model"), "response": token, "done": False})
+                        with server.lock:
+                            server.tokens_sent += 1
+                    timings = server.timings(load, request, tokens, time.monotonic() - started)
+                    self._write_chunk({"model": request.get("model"), "response": "", "done": True, **timings})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client closed the stream early: this is how generation gets aborted
+                    with server.lock:
+                        server.aborted += 1
+                    self.close_connection = True
+
+            def _write_chunk(self, payload):
+                data = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--load-delay", type=float, default=0.0, help="seconds to 'load' the model after it was unloaded")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, token_delay=args.token_delay, load_delay=args.load_delay)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import metrics
+
+# Example phrasings per intent. "chat" holds utterances that belong to Gemma,
+# so a question that happens to share words with a command lands there.
+# Intents that need a number or a time (alarms, set volume) are left to the
+# regexes, and so are shutdown/restart/sleep/lock: they must never act on a guess.
+INTENT_EXEMPLARS: Dict[str, List[str]] = {
+    'volume_up': [
+        "turn it up", "turn the volume up", "louder please", "make it louder", "crank the sound up",
+        "raise the volume", "pump up the volume", "i can't hear it", "boost the sound", "more volume",
+        "bump the volume up a bit", "it's too quiet",
+    ],
+    'volume_down': [
+        "turn it down", "turn the volume down", "quieter please", "make it quieter", "lower the volume",
+        "reduce the sound", "it's too loud", "less volume", "bring the volume down a bit", "a bit softer",
+    ],
+    'mute': [
+        "silence the sound", "kill the sound", "shut the sound off", "turn the sound off", "no sound",
+        "be quiet", "cut the audio",
+    ],
+    'unmute': [
+        "turn the sound back on", "bring the sound back", "sound on", "restore the audio", "audio back on",
+    ],
+    'volume_level': [
+        "how loud is it", "what's the volume at", "what is the current volume", "how high is the volume",
+        "tell me the volume",
+    ],
+    'battery': [
+        "how much charge is left", "how much juice do i have", "is my laptop charging", "battery status",
+        "how long will the battery last", "am i plugged in", "check the charge",
+    ],
+    'snooze': [
+        "not now", "wake me later", "give me five more minutes", "remind me again later", "postpone the alarm",
+    ],
+    'open': [
+        "pull up", "bring up", "fire up", "show me", "take me to", "go to", "load up", "i want to use",
+        "get me to", "switch on",
+    ],
+    'close': [
+        "get rid of", "shut down the app", "kill the app", "i'm done with", "close down", "dismiss the window",
+        "make it go away",
+    ],
+    'chat': [
+        "what is the capital of france", "tell me a joke", "who wrote hamlet", "how does photosynthesis work",
+        "what's the weather like today", "explain quantum computing", "how are you", "what's your name",
+        "tell me about the history of rome", "what is the meaning of life", "can you help me with my homework",
+        "what time is it in tokyo", "recommend a good book", "how do i cook pasta", "why is the sky blue",
+        "tell me something interesting", "what does a volume of a sphere formula look like",
+        "how loud is a jet engine", "what do you think about music", "what is the volume of a cylinder",
+        "how big is the earth",
+    ],
+}
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'please', 'could', 'would', 'can', 'you', 'me', 'my', 'for', 'to', 'it', 'bit',
+    'little', 'just', 'now', 'some', 'of', 'and', 'hey', 'maya', 'kindly', 'will',
+}
+
+
+class HashingEmbedder:
+    """
+    Stand-in for an embedding model: word, word-pair and character-trigram
+    features hashed into a fixed-size vector. Needs no model and takes
+    microseconds, but only knows surface overlap, so it relies on the
+    exemplars covering the ways people phrase things.
+    """
+    name = "hashing"
+    threshold = 0.7  # cosine it takes to act on a guess
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        words = [word for word in re.findall(r"[a-z0-9']+", text.lower()) if word not in STOP_WORDS]
+        features = [(f"w:{word}", 1.0) for word in words]
+        features += [(f"b:{first} {second}", 1.0) for first, second in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += [(f"c:{padded[i:i + 3]}", 0.3) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text):
+            code = zlib.crc32(feature.encode('utf-8'))
+            vector[code % self.dim] += weight if (code // self.dim) & 1 else -weight
+        return vector
+
+
+class OllamaEmbedder:
+    """Embeddings from a local model served by Ollama (e.g. nomic-embed-text)"""
+    threshold = 0.7
+
+    def __init__(self, llm, model: str = "nomic-embed-text"):
+        self.llm = llm
+        self.model = model
+        self.name = f"ollama:{model}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.llm.embed(text, model=self.model), dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class IntentClassifier:
+    """
+    Catches commands the regexes miss ("could you crank the sound up a bit")
+    before they go to Gemma. Every exemplar is embedded once into a
+    row-normalized matrix, grouped by intent; an utterance is embedded once
+    (recent ones are remembered) and scored against all exemplars with a
+    single matrix-vector product. The best exemplar per intent is its score.
+    classify() answers only when the winner is not "chat", reaches the
+    threshold and beats the runner-up by margin; otherwise the utterance
+    stays a chat turn.
+    """
+
+    def __init__(self, embedder=None, exemplars: Optional[Dict[str, Sequence[str]]] = None,
+                 threshold: Optional[float] = None, margin: float = 0.15, cache_size: int = 1024):
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.exemplars = exemplars if exemplars is not None else INTENT_EXEMPLARS
+        self.threshold = threshold if threshold is not None else self.embedder.threshold
+        self.margin = margin
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.matrix = None
+        self.intents: List[str] = []
+        self.offsets = None  # first row of each intent in the matrix
+        self.phrases: List[str] = []  # exemplar behind each row
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.classified = 0
+        self.to_chat = 0
+
+    def warm_up(self):
+        """Embed the exemplars ahead of the first utterance"""
+        self._build()
+
+    def _build(self):
+        with self.lock:
+            if self.matrix is not None:
+                return
+            started = time.perf_counter()
+            rows, offsets = [], []
+            for intent, phrases in self.exemplars.items():
+                offsets.append(len(rows))
+                rows.extend(self.embedder.embed(phrase) for phrase in phrases)
+            self.intents = list(self.exemplars)
+            self.phrases = [phrase for phrases in self.exemplars.values() for phrase in phrases]
+            self.offsets = np.array(offsets)
+            self.matrix = _normalize(np.vstack(rows))
+            print(f"Intent classifier: {len(rows)} exemplars, {self.matrix.shape[1]} dimensions "
+                  f"({self.embedder.name}, {time.perf_counter() - started:.2f}s)")
+
+    def embed(self, text: str) -> np.ndarray:
+        text = ' '.join(text.lower().split())
+        with self.lock:
+            vector = self.cache.get(text)
+            if vector is not None:
+                self.cache.move_to_end(text)
+                self.cache_hits += 1
+                return vector
+        vector = _normalize(self.embedder.embed(text))
+        with self.lock:
+            self.cache_misses += 1
+            self.cache[text] = vector
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return vector
+
+    def cosines(self, text: str) -> np.ndarray:
+        """Cosine of the utterance with every exemplar"""
+        self._build()
+        return self.matrix @ self.embed(text)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Best cosine per intent"""
+        best = np.maximum.reduceat(self.cosines(text), self.offsets)
+        return dict(zip(self.intents, best.tolist()))
+
+    def classify(self, text: str) -> Optional[Tuple[str, float, str]]:
+        """(intent, confidence, closest exemplar) if the utterance is confidently a command, else None"""
+        started = time.perf_counter()
+        cosines = self.cosines(text)
+        best = np.maximum.reduceat(cosines, self.offsets)
+        ranked = np.argsort(best)[::-1]
+        metrics.observe('intent_classifier_seconds', time.perf_counter() - started)
+        intent, score = self.intents[ranked[0]], float(best[ranked[0]])
+        runner_up = float(best[ranked[1]]) if len(ranked) > 1 else 0.0
+        if intent == 'chat' or score < self.threshold or score - runner_up < self.margin:
+            self.to_chat += 1
+            metrics.inc('intent_classifier_total', outcome='chat')
+            return None
+        self.classified += 1
+        metrics.inc('intent_classifier_total', outcome=intent)
+        start = self.offsets[ranked[0]]
+        end = self.offsets[ranked[0] + 1] if ranked[0] + 1 < len(self.offsets) else len(cosines)
+        return intent, score, self.phrases[start + int(np.argmax(cosines[start:end]))]
+
+    def stats(self):
+        return {
+            'embedder': self.embedder.name,
+            'classified': self.classified,
+            'to_chat': self.to_chat,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
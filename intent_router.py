@@ -0,0 +1,153 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from phonetic_index import PhoneticIndex
+
+
+@dataclass
+class ParsedCommand:
+    """Result of routing one utterance: the intent plus the slots its handler needs"""
+    intent: str
+    slots: Dict[str, str] = field(default_factory=dict)
+    text: str = ""
+    confidence: float = 1.0  # below 1.0 when only the phonetic fallback matched
+
+    @property
+    def is_command(self) -> bool:
+        return self.intent != 'unknown'
+
+    def get(self, name: str, default: str = '') -> str:
+        return self.slots.get(name, default)
+
+
+@dataclass
+class CommandSpec:
+    """
+    One row of the command table.
+    Anchored patterns must match from the start of the utterance (verb-led
+    commands such as "open ..."). Keyword patterns may appear anywhere but only
+    as whole words, so 'unmute' never matches 'mute' and 'power' never matches
+    inside 'powerpoint'.
+    """
+    intent: str
+    pattern: str
+    anchored: bool = True
+
+
+# Earlier rows win when several could match the same utterance
+COMMAND_TABLE: List[CommandSpec] = [
+    CommandSpec('write_program', r'write a program on (?P<topic>.+)'),
+    CommandSpec('set_alarm', r'set (?:an )?alarm for (?P<time>.+?)(?: (?P<repeat>every day|daily))?$'),
+    CommandSpec('set_reminder', r'remind me to (?P<text>.+) at (?P<time>.+?)(?: (?P<repeat>every day|daily))?$'),
+    CommandSpec('cancel_schedule', r'(?:cancel|delete|remove) (?:all |my |the )?(?P<kind>alarm|reminder)s?(?: (?:for|at) (?P<time>.+))?$'),
+    CommandSpec('list_schedule', r'(?:list|show|what are) (?:all )?(?:my |the )?(?P<kind>alarm|reminder)s'),
+    CommandSpec('snooze', r'snooze(?: (?:for )?(?P<minutes>\d+) minutes?)?'),
+    CommandSpec('leetcode_problem', r'(?:leetcode|leet code|lead code) problem (?:number )?(?P<problem_num>\d+)'),
+    CommandSpec('youtube_search', r'(?:search|find) (?P<query>.+?) (?:in|on) youtube'),
+    CommandSpec('search', r'(?:search|find) (?P<query>.+?) (?:in|on) (?P<target>.+)'),
+    CommandSpec('volume_set', r'(?:set|fade|ramp|turn)(?: the)?(?: volume)?(?: up| down)? to (?P<level>\d+)(?: ?%| percent)?'
+                              r'(?: over (?P<seconds>\d+(?:\.\d+)?) seconds?)?$'),
+    CommandSpec('open', r'(?:open|start|launch) (?P<target>.+)'),
+    CommandSpec('close', r'(?:close|exit|quit) (?P<target>.+)'),
+    CommandSpec('volume_up', r'increase volume|volume up', anchored=False),
+    CommandSpec('volume_down', r'decrease volume|volume down', anchored=False),
+    CommandSpec('unmute', r'unmute', anchored=False),
+    CommandSpec('mute', r'mute', anchored=False),
+    CommandSpec('volume_level', r'volume level|volume\b.*\blevel', anchored=False),
+    CommandSpec('battery', r'battery|power', anchored=False),
+    CommandSpec('shutdown', r'shutdown', anchored=False),
+    CommandSpec('restart', r'restart|reboot', anchored=False),
+    CommandSpec('sleep', r'sleep', anchored=False),
+    CommandSpec('lock', r'lock', anchored=False),
+]
+
+
+# Spoken verbs the phonetic fallback accepts for target commands ("closed you tube", "lunch notepad")
+NEAR_MISS_VERBS: Dict[str, str] = {
+    'open': 'open', 'opened': 'open', 'opening': 'open', 'start': 'open', 'starting': 'open',
+    'launch': 'open', 'launched': 'open',
+    'close': 'close', 'closed': 'close', 'closing': 'close', 'clothes': 'close', 'exit': 'close', 'quit': 'close',
+}
+
+# Whole utterances the phonetic fallback maps to an intent. Only harmless
+# ones: a misheard "lock" or "shutdown" must never act.
+NEAR_MISS_PHRASES: Dict[str, str] = {
+    'increase volume': 'volume_up', 'volume up': 'volume_up',
+    'decrease volume': 'volume_down', 'volume down': 'volume_down',
+    'mute': 'mute', 'unmute': 'unmute',
+    'volume level': 'volume_level', 'battery': 'battery', 'snooze': 'snooze',
+}
+
+
+class IntentRouter:
+    """
+    Compiles the command table once into a single alternation regex.
+    Each row becomes a named group, so one match both picks the intent and
+    captures its slots; every utterance is parsed exactly once.
+    """
+
+    _slot_group = re.compile(r'\(\?P<(\w+)>')
+    # Whole-utterance matches need more than the target names do
+    phrase_confidence = 0.9
+
+    def __init__(self, table: Optional[List[CommandSpec]] = None):
+        self.table = list(table if table is not None else COMMAND_TABLE)
+        self.compile()
+        self.verbs = PhoneticIndex(NEAR_MISS_VERBS)
+        self.phrases = PhoneticIndex(NEAR_MISS_PHRASES)
+
+    def compile(self):
+        alternatives = []
+        self.group_intents: Dict[str, str] = {}
+        self.group_slots: Dict[str, Dict[str, str]] = {}
+        for index, spec in enumerate(self.table):
+            group = f"r{index}"
+            slots = {}
+
+            def rename(match, group=group, slots=slots):
+                slots[f"{group}_{match.group(1)}"] = match.group(1)
+                return f"(?P<{group}_{match.group(1)}>"
+
+            body = self._slot_group.sub(rename, spec.pattern)
+            if not spec.anchored:
+                body = rf".*?\b(?:{body})\b"
+            alternatives.append(f"(?P<{group}>{body})")
+            self.group_intents[group] = spec.intent
+            self.group_slots[group] = slots
+        self.pattern = re.compile('|'.join(alternatives), re.DOTALL)
+
+    def route(self, command: str) -> ParsedCommand:
+        text = ' '.join(command.lower().split())
+        match = self.pattern.match(text)
+        if match is None:
+            return ParsedCommand('unknown', {'target': text}, text)
+        # The outer group of a row closes last, so lastgroup names the row
+        group = match.lastgroup
+        slots = {name: match.group(qualified).strip()
+                 for qualified, name in self.group_slots[group].items()
+                 if match.group(qualified) is not None}
+        return ParsedCommand(self.group_intents[group], slots, text)
+
+    def near_miss(self, text: str, min_confidence: float = 0.75) -> Optional[ParsedCommand]:
+        """
+        Phonetic fallback for an utterance route() did not understand: a short
+        utterance of two or three words that sounds like one of
+        NEAR_MISS_PHRASES (same primary key, or phrase_confidence), or a first
+        word that sounds like an open/close verb. For the latter the caller
+        still has to check that the target exists.
+        """
+        words = text.split()
+        if not words:
+            return None
+        # A lone word that isn't a command is a different word ("mutt", "batter"), not a mishearing
+        if 1 < len(words) <= 3:
+            found = self.phrases.match(text)
+            if found is not None and found[1] >= min_confidence and (
+                    found[1] >= self.phrase_confidence or self.phrases.sounds_like(text, found[0])):
+                return ParsedCommand(NEAR_MISS_PHRASES[found[0]], {}, text, found[1])
+        if len(words) > 1:
+            found = self.verbs.match(words[0])
+            if found is not None and found[1] >= min_confidence:
+                return ParsedCommand(NEAR_MISS_VERBS[found[0]], {'target': ' '.join(words[1:])}, text, found[1])
+        return None
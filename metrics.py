@@ -0,0 +1,200 @@
+"""
+Latency histograms and counters for every stage of a turn, exported over a
+local HTTP endpoint:
+
+    python voxfusion.py --metrics-port 9464
+    curl http://127.0.0.1:9464/metrics        # Prometheus text format
+    curl http://127.0.0.1:9464/metrics.json   # counts, sums and percentiles
+
+Recording is a no-op (a single attribute check) until metrics.enable() is
+called.
+"""
+import contextlib
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+# Upper bounds in seconds, from router-fast to model-load-slow
+_DISABLED_TIMER = contextlib.nullcontext()
+
+DEFAULT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> Dict[str, Any]:
+        def bound(q):
+            value = self.quantile(q)
+            return '+Inf' if value == float('inf') else value
+
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': bound(0.5),
+            'p90': bound(0.9),
+            'p99': bound(0.99),
+        }
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metrics:
+    """Registry of labelled histograms (seconds) and counters"""
+
+    def __init__(self, prefix: str = 'voxfusion'):
+        self.prefix = prefix
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name: str, **labels):
+        """Context manager observing its duration; a shared no-op while disabled"""
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return self._timer(name, labels)
+
+    @contextlib.contextmanager
+    def _timer(self, name: str, labels: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def to_prometheus(self) -> str:
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, h.buckets, list(h.counts), h.count, h.sum) for key, h in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            full = f"{self.prefix}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} counter")
+                typed.add(full)
+            lines.append(f"{full}{_label_text(labels)} {value:g}")
+        for (name, labels), buckets, counts, count, total in histograms:
+            full = f"{self.prefix}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} histogram")
+                typed.add(full)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                bucket_labels = _label_text(labels, 'le="' + le + '"')
+                lines.append(f"{full}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{full}_sum{_label_text(labels)} {total:.6f}")
+            lines.append(f"{full}_count{_label_text(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'counters': {f"{name}{_label_text(labels)}": value for (name, labels), value in sorted(self.counters.items())},
+                'histograms': {f"{name}{_label_text(labels)}": h.as_dict() for (name, labels), h in sorted(self.histograms.items())},
+            }
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+
+    def __init__(self, registry: Metrics, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.to_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.to_dict(), indent=2).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+metrics = Metrics()
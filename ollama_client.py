@@ -0,0 +1,291 @@
+import json
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional
+
+from metrics import metrics
+from startup import lazy_import
+
+ollama = lazy_import('ollama')
+
+
+@dataclass
+class GenerationTimings:
+    """Durations reported by Ollama for one request, in seconds"""
+    total: float = 0.0
+    load: float = 0.0
+    prompt_eval: float = 0.0
+    eval: float = 0.0
+    prompt_tokens: int = 0
+    eval_tokens: int = 0
+
+    @classmethod
+    def from_response(cls, response) -> "GenerationTimings":
+        def seconds(key):
+            return (response.get(key) or 0) / 1e9
+
+        return cls(
+            total=seconds('total_duration'),
+            load=seconds('load_duration'),
+            prompt_eval=seconds('prompt_eval_duration'),
+            eval=seconds('eval_duration'),
+            prompt_tokens=response.get('prompt_eval_count') or 0,
+            eval_tokens=response.get('eval_count') or 0,
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.eval_tokens / self.eval if self.eval else 0.0
+
+
+class GenerationStream:
+    """
+    Iterator over the chunks of a streamed /api/generate that records the
+    timings of the final chunk and keeps it in `final`, e.g. for the
+    `context` it carries. final stays None when the stream was closed before
+    the model finished.
+
+    The request goes out on the first next(), from the reading thread, on
+    the shared client's pooled connections, and a connection read to the
+    end goes back to the pool. close() may be called from any thread. While
+    a read is blocked on a stalled model it shuts that connection's socket
+    down, so the read returns at once and Ollama stops generating. A close
+    that arrives while the model is still loading takes effect when the
+    response starts, before the first chunk is handed out.
+    """
+
+    def __init__(self, client: "OllamaClient", payload: Dict[str, Any], speculative: bool = False):
+        self.client = client
+        self.payload = payload
+        self.speculative = speculative
+        self.final = None
+        self.response = None
+        self.lines = None
+        self.lock = threading.Lock()
+        self.closed = False
+        self.reading = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self.lock:
+            if self.closed:
+                raise StopIteration
+            self.reading = True
+        try:
+            chunk = self._read()
+        except Exception:
+            if not self.closed:
+                self.client._failed()
+                self.close()
+                raise
+            chunk = None
+        finally:
+            with self.lock:
+                self.reading = False
+                closed = self.closed
+            if closed:
+                self._release()
+        if chunk is None:
+            self.close()
+            raise StopIteration
+        if chunk.get('done'):
+            self.final = chunk
+            self.client._record(chunk, self.speculative)
+            # Read to the end of the response, so its connection can be reused
+            for _ in self.lines:
+                pass
+            self.close()
+        return chunk
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Next chunk, or None at the end of the stream"""
+        if self.response is None:
+            # The httpx.Client inside ollama.Client: same pool, headers and authentication
+            http = self.client.client._client
+            self.response = http.send(http.build_request('POST', '/api/generate', json=self.payload), stream=True)
+            if self.closed:
+                return None
+            if self.response.status_code >= 400:
+                self.response.read()
+                raise ollama.ResponseError(self.response.text, self.response.status_code)
+            self.lines = self.response.iter_lines()
+        for line in self.lines:
+            if line.strip():
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise ollama.ResponseError(chunk['error'])
+                return chunk
+        return None
+
+    def _release(self):
+        if self.response is not None:
+            self.response.close()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            reading = self.reading
+        if not reading:
+            self._release()
+            return
+        network_stream = self.response.extensions.get('network_stream') if self.response is not None else None
+        sock = network_stream.get_extra_info('socket') if network_stream is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class OllamaClient:
+    """
+    One ollama.Client (and so one pooled HTTP connection set) shared by every
+    caller, instead of the module-level ollama.generate per request. Streams
+    (see GenerationStream) go over the same pool and can be cancelled from
+    any thread.
+
+    preload() asks the server to load the model without generating, so the
+    first question after waking does not wait for gemma:2b to load. Every
+    request passes keep_alive, which keeps the model resident for that many
+    seconds after the last use.
+    """
+
+    def __init__(self, model: str = 'gemma:2b', host: Optional[str] = None, keep_alive: float = 300,
+                 timeout: float = 60.0, max_connections: int = 4):
+        self.model = model
+        self.host = host  # None: OLLAMA_HOST or the default local server
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self.lock = threading.Lock()
+        self.preloading = None
+        self.requests = 0
+        self.preloads = 0
+        self.errors = 0
+        self.last_timings: Optional[GenerationTimings] = None
+        self.totals = GenerationTimings()
+        self.speculative_requests = 0  # speculate() streams, counted apart from requests and totals
+        self.speculative_totals = GenerationTimings()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self.lock:
+                if self._client is None:
+                    import httpx
+                    limits = httpx.Limits(max_connections=self.max_connections,
+                                          max_keepalive_connections=self.max_connections)
+                    self._client = ollama.Client(host=self.host, timeout=self.timeout, limits=limits)
+        return self._client
+
+    def _failed(self):
+        self.errors += 1
+        metrics.inc('errors_total', component='llm')
+
+    def _record(self, response, speculative: bool = False):
+        timings = GenerationTimings.from_response(response)
+        if speculative:
+            # Kept apart: a discarded speculation is not a reply the user waited for
+            with self.lock:
+                self.speculative_totals.eval += timings.eval
+                self.speculative_totals.eval_tokens += timings.eval_tokens
+            return timings
+        metrics.observe('llm_load_seconds', timings.load)
+        metrics.observe('llm_prompt_eval_seconds', timings.prompt_eval)
+        metrics.observe('llm_eval_seconds', timings.eval)
+        with self.lock:
+            self.last_timings = timings
+            for field in ('total', 'load', 'prompt_eval', 'eval', 'prompt_tokens', 'eval_tokens'):
+                setattr(self.totals, field, getattr(self.totals, field) + getattr(timings, field))
+        return timings
+
+    def generate(self, prompt: str, options: Optional[Mapping[str, Any]] = None,
+                 model: Optional[str] = None, **kwargs):
+        self.requests += 1
+        try:
+            response = self.client.generate(model=model or self.model, prompt=prompt, options=options,
+                                            keep_alive=self.keep_alive, **kwargs)
+        except Exception:
+            self._failed()
+            raise
+        self._record(response)
+        return response
+
+    def stream(self, prompt: str, options: Optional[Mapping[str, Any]] = None,
+               model: Optional[str] = None, speculative: bool = False, **kwargs) -> "GenerationStream":
+        """
+        Streamed generate(). Closing the returned iterator closes the HTTP
+        stream, which makes Ollama stop generating. Speculative streams are
+        counted in speculative_requests and speculative_totals instead.
+        """
+        if speculative:
+            self.speculative_requests += 1
+        else:
+            self.requests += 1
+        payload = {'model': model or self.model, 'prompt': prompt, 'options': options,
+                   'keep_alive': self.keep_alive, 'stream': True, **kwargs}
+        return GenerationStream(self, {k: v for k, v in payload.items() if v is not None}, speculative)
+
+    def embed(self, text: str, model: str) -> List[float]:
+        """Embedding of text from an embedding model (not the generation model)"""
+        self.requests += 1
+        try:
+            response = self.client.embeddings(model=model, prompt=text, keep_alive=self.keep_alive)
+        except Exception:
+            self._failed()
+            raise
+        return response['embedding']
+
+    def preload(self, wait: bool = False) -> Optional[threading.Thread]:
+        """Load the model in the background (no-op while a preload is already running)"""
+        with self.lock:
+            if self.preloading is not None and self.preloading.is_alive():
+                thread = self.preloading
+            else:
+                thread = self.preloading = threading.Thread(target=self._preload, name='ollama-preload', daemon=True)
+                thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _preload(self):
+        start = time.perf_counter()
+        try:
+            # An empty prompt only loads the model and refreshes keep_alive
+            response = self.client.generate(model=self.model, prompt='', keep_alive=self.keep_alive)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error preloading {self.model}: {e}")
+            return
+        load = GenerationTimings.from_response(response).load
+        with self.lock:
+            self.preloads += 1
+            self.totals.load += load
+        print(f"Preloaded {self.model} in {time.perf_counter() - start:.2f}s (model load {load:.2f}s)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            totals = self.totals
+            last = self.last_timings
+        report = {
+            'requests': self.requests,
+            'preloads': self.preloads,
+            'errors': self.errors,
+            'load_seconds': round(totals.load, 3),
+            'prompt_eval_seconds': round(totals.prompt_eval, 3),
+            'eval_seconds': round(totals.eval, 3),
+            'tokens_per_second': round(totals.tokens_per_second, 1),
+        }
+        if self.speculative_requests:
+            report['speculative'] = {'requests': self.speculative_requests,
+                                     'eval_seconds': round(self.speculative_totals.eval, 3),
+                                     'eval_tokens': self.speculative_totals.eval_tokens}
+        if last is not None:
+            report['last'] = {'load': round(last.load, 3), 'prompt_eval': round(last.prompt_eval, 3),
+                              'eval': round(last.eval, 3), 'eval_tokens': last.eval_tokens}
+        return report
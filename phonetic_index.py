@@ -0,0 +1,488 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+VOWELS = set('AEIOUY')
+SLAVO_GERMANIC = ('W', 'K', 'CZ', 'WITZ')
+
+
+def double_metaphone(word: str, max_length: int = 4) -> Tuple[str, str]:
+    """
+    Primary and alternate Double Metaphone keys (Lawrence Philips' rules).
+    Words that sound alike share a key ("net flicks" and "netflix" both give
+    NTFL with the default length); the alternate key covers a second
+    plausible pronunciation, which is how "get hub" meets "github" (KTP).
+    """
+    word = ''.join(char for char in word.upper() if char.isalpha() or char == 'Ç')
+    if not word:
+        return '', ''
+    length = len(word)
+    last = length - 1
+    text = word + '     '  # padding so lookahead never runs off the end
+    slavo_germanic = any(part in word for part in SLAVO_GERMANIC)
+    primary: List[str] = []
+    secondary: List[str] = []
+    lengths = [0, 0]
+
+    def at(start: int, *options: str) -> bool:
+        return start >= 0 and text.startswith(options, start)
+
+    def vowel(index: int) -> bool:
+        return 0 <= index < length and text[index] in VOWELS
+
+    def add(main: str, alternate: Optional[str] = None):
+        alternate = main if alternate is None else alternate
+        primary.append(main)
+        secondary.append(alternate)
+        lengths[0] += len(main)
+        lengths[1] += len(alternate)
+
+    index = 0
+    if at(0, 'GN', 'KN', 'PN', 'WR', 'PS'):
+        index = 1
+    if text[0] == 'X':
+        add('S')  # Xavier
+        index = 1
+
+    while index < length and (lengths[0] < max_length or lengths[1] < max_length):
+        char = text[index]
+
+        if char in VOWELS:
+            if index == 0:
+                add('A')
+            index += 1
+
+        elif char == 'B':
+            add('P')
+            index += 2 if text[index + 1] == 'B' else 1
+
+        elif char == 'Ç':
+            add('S')
+            index += 1
+
+        elif char == 'C':
+            if (index > 1 and not vowel(index - 2) and at(index - 1, 'ACH')
+                    and text[index + 2] != 'I' and (text[index + 2] != 'E' or at(index - 2, 'BACHER', 'MACHER'))):
+                add('K')
+                index += 2
+            elif index == 0 and at(index, 'CAESAR'):
+                add('S')
+                index += 2
+            elif at(index, 'CHIA'):
+                add('K')
+                index += 2
+            elif at(index, 'CH'):
+                if index > 0 and at(index, 'CHAE'):
+                    add('K', 'X')
+                elif index == 0 and (at(index + 1, 'HARAC', 'HARIS', 'HOR', 'HYM', 'HIA', 'HEM')) and not at(0, 'CHORE'):
+                    add('K')
+                elif (at(0, 'VAN ', 'VON ', 'SCH') or at(index - 2, 'ORCHES', 'ARCHIT', 'ORCHID')
+                      or text[index + 2] in 'TS'
+                      or ((index == 0 or text[index - 1] in 'AOUE') and text[index + 2] in 'LRNMBHFVW ')):
+                    add('K')
+                elif index > 0:
+                    add('K') if at(0, 'MC') else add('X', 'K')
+                else:
+                    add('X')
+                index += 2
+            elif at(index, 'CZ') and not at(index - 2, 'WICZ'):
+                add('S', 'X')
+                index += 2
+            elif at(index + 1, 'CIA'):
+                add('X')
+                index += 3
+            elif at(index, 'CC') and not (index == 1 and text[0] == 'M'):
+                if text[index + 2] in 'IEH' and not at(index + 2, 'HU'):
+                    if (index == 1 and text[0] == 'A') or at(index - 1, 'UCCEE', 'UCCES'):
+                        add('KS')
+                    else:
+                        add('X')
+                    index += 3
+                else:
+                    add('K')
+                    index += 2
+            elif at(index, 'CK', 'CG', 'CQ'):
+                add('K')
+                index += 2
+            elif at(index, 'CI', 'CE', 'CY'):
+                add('S', 'X') if at(index, 'CIO', 'CIE', 'CIA') else add('S')
+                index += 2
+            else:
+                add('K')
+                if at(index + 1, ' C', ' Q', ' G'):
+                    index += 3
+                elif text[index + 1] in 'CKQ' and not at(index + 1, 'CE', 'CI'):
+                    index += 2
+                else:
+                    index += 1
+
+        elif char == 'D':
+            if at(index, 'DG'):
+                if text[index + 2] in 'IEY':
+                    add('J')
+                    index += 3
+                else:
+                    add('TK')
+                    index += 2
+            else:
+                add('T')
+                index += 2 if at(index, 'DT', 'DD') else 1
+
+        elif char == 'F':
+            add('F')
+            index += 2 if text[index + 1] == 'F' else 1
+
+        elif char == 'G':
+            if text[index + 1] == 'H':
+                if index > 0 and not vowel(index - 1):
+                    add('K')
+                elif index == 0:
+                    add('J') if text[index + 2] == 'I' else add('K')
+                elif ((index > 1 and text[index - 2] in 'BHD') or (index > 2 and text[index - 3] in 'BHD')
+                      or (index > 3 and text[index - 4] in 'BH')):
+                    pass  # Hugh, bough, broughton
+                elif index > 2 and text[index - 1] == 'U' and text[index - 3] in 'CGLRT':
+                    add('F')  # laugh, tough
+                elif index > 0 and text[index - 1] != 'I':
+                    add('K')
+                index += 2
+            elif text[index + 1] == 'N':
+                if index == 1 and vowel(0) and not slavo_germanic:
+                    add('KN', 'N')
+                elif not at(index + 2, 'EY') and text[index + 1] != 'Y' and not slavo_germanic:
+                    add('N', 'KN')
+                else:
+                    add('KN')
+                index += 2
+            elif at(index + 1, 'LI') and not slavo_germanic:
+                add('KL', 'L')
+                index += 2
+            elif index == 0 and (text[1] == 'Y' or at(1, 'ES', 'EP', 'EB', 'EL', 'EY', 'IB', 'IL', 'IN', 'IE', 'EI', 'ER')):
+                add('K', 'J')
+                index += 2
+            elif ((at(index + 1, 'ER') or text[index + 1] == 'Y') and not at(0, 'DANGER', 'RANGER', 'MANGER')
+                  and text[index - 1] not in 'EI' and not at(index - 1, 'RGY', 'OGY')):
+                add('K', 'J')
+                index += 2
+            elif text[index + 1] in 'EIY' or at(index - 1, 'AGGI', 'OGGI'):
+                if at(0, 'VAN ', 'VON ', 'SCH') or at(index + 1, 'ET'):
+                    add('K')
+                elif at(index + 1, 'IER'):
+                    add('J')
+                else:
+                    add('J', 'K')
+                index += 2
+            else:
+                add('K')
+                index += 2 if text[index + 1] == 'G' else 1
+
+        elif char == 'H':
+            if (index == 0 or vowel(index - 1)) and vowel(index + 1):
+                add('H')
+                index += 2
+            else:
+                index += 1
+
+        elif char == 'J':
+            if at(index, 'JOSE') or at(0, 'SAN '):
+                add('H') if (index == 0 and text[index + 4] == ' ') or at(0, 'SAN ') else add('J', 'H')
+            elif index == 0:
+                add('J', 'A')
+            elif vowel(index - 1) and not slavo_germanic and text[index + 1] in 'AO':
+                add('J', 'H')
+            elif index == last:
+                add('J', '')
+            elif text[index + 1] not in 'LTKSNMBZ' and text[index - 1] not in 'SKL':
+                add('J')
+            index += 2 if text[index + 1] == 'J' else 1
+
+        elif char == 'K':
+            add('K')
+            index += 2 if text[index + 1] == 'K' else 1
+
+        elif char == 'L':
+            if text[index + 1] == 'L':
+                if ((index == length - 3 and at(index - 1, 'ILLO', 'ILLA', 'ALLE'))
+                        or ((at(last - 1, 'AS', 'OS') or text[last] in 'AO') and at(index - 1, 'ALLE'))):
+                    add('L', '')
+                else:
+                    add('L')
+                index += 2
+            else:
+                add('L')
+                index += 1
+
+        elif char == 'M':
+            add('M')
+            if (at(index - 1, 'UMB') and (index + 1 == last or at(index + 2, 'ER'))) or text[index + 1] == 'M':
+                index += 2
+            else:
+                index += 1
+
+        elif char == 'N':
+            add('N')
+            index += 2 if text[index + 1] == 'N' else 1
+
+        elif char == 'Ñ':
+            add('N')
+            index += 1
+
+        elif char == 'P':
+            if text[index + 1] == 'H':
+                add('F')
+                index += 2
+            else:
+                add('P')
+                index += 2 if text[index + 1] in 'PB' else 1
+
+        elif char == 'Q':
+            add('K')
+            index += 2 if text[index + 1] == 'Q' else 1
+
+        elif char == 'R':
+            if index == last and not slavo_germanic and at(index - 2, 'IE') and not at(index - 4, 'ME', 'MA'):
+                add('', 'R')
+            else:
+                add('R')
+            index += 2 if text[index + 1] == 'R' else 1
+
+        elif char == 'S':
+            if at(index - 1, 'ISL', 'YSL'):
+                index += 1  # island, carlysle
+            elif index == 0 and at(index, 'SUGAR'):
+                add('X', 'S')
+                index += 1
+            elif at(index, 'SH'):
+                add('S') if at(index + 1, 'HEIM', 'HOEK', 'HOLM', 'HOLZ') else add('X')
+                index += 2
+            elif at(index, 'SIO', 'SIA', 'SIAN'):
+                add('S') if slavo_germanic else add('S', 'X')
+                index += 3
+            elif (index == 0 and text[index + 1] in 'MNLW') or text[index + 1] == 'Z':
+                add('S', 'X')
+                index += 2 if text[index + 1] == 'Z' else 1
+            elif at(index, 'SC'):
+                if text[index + 2] == 'H':
+                    if at(index + 3, 'OO', 'ER', 'EN', 'UY', 'ED', 'EM'):
+                        add('X', 'SK') if at(index + 3, 'ER', 'EN') else add('SK')
+                    elif index == 0 and not vowel(3) and text[3] != 'W':
+                        add('X', 'S')
+                    else:
+                        add('X')
+                elif text[index + 2] in 'IEY':
+                    add('S')
+                else:
+                    add('SK')
+                index += 3
+            else:
+                if index == last and at(index - 2, 'AI', 'OI'):
+                    add('', 'S')
+                else:
+                    add('S')
+                index += 2 if text[index + 1] in 'SZ' else 1
+
+        elif char == 'T':
+            if at(index, 'TION', 'TIA', 'TCH'):
+                add('X')
+                index += 3
+            elif at(index, 'TH', 'TTH'):
+                if at(index + 2, 'OM', 'AM') or at(0, 'VAN ', 'VON ', 'SCH'):
+                    add('T')
+                else:
+                    add('0', 'T')
+                index += 2
+            else:
+                add('T')
+                index += 2 if text[index + 1] in 'TD' else 1
+
+        elif char == 'V':
+            add('F')
+            index += 2 if text[index + 1] == 'V' else 1
+
+        elif char == 'W':
+            if at(index, 'WR'):
+                add('R')
+                index += 2
+            else:
+                if index == 0 and (vowel(1) or at(index, 'WH')):
+                    add('A', 'F') if vowel(1) else add('A')
+                if (index == last and vowel(index - 1)) or at(index - 1, 'EWSKI', 'EWSKY', 'OWSKI', 'OWSKY') \
+                        or at(0, 'SCH'):
+                    add('', 'F')
+                elif at(index, 'WICZ', 'WITZ'):
+                    add('TS', 'FX')
+                    index += 3
+                index += 1
+
+        elif char == 'X':
+            if not (index == last and (at(index - 3, 'IAU', 'EAU') or at(index - 2, 'AU', 'OU'))):
+                add('KS')
+            index += 2 if text[index + 1] in 'CX' else 1
+
+        elif char == 'Z':
+            if text[index + 1] == 'H':
+                add('J')
+                index += 2
+            else:
+                if at(index + 1, 'ZO', 'ZI', 'ZA') or (slavo_germanic and index > 0 and text[index - 1] != 'T'):
+                    add('S', 'TS')
+                else:
+                    add('S')
+                index += 2 if text[index + 1] == 'Z' else 1
+
+        else:
+            index += 1
+
+    return ''.join(primary)[:max_length], ''.join(secondary)[:max_length]
+
+
+def levenshtein(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Edit distance by Hyyrö's bit-parallel algorithm: one pass over `a` with
+    a column of the DP matrix for `b` held in the bits of an integer. Returns
+    limit + 1 straight away when the lengths alone differ by more than limit.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    positive, negative = (1 << len(b)) - 1, 0
+    last = 1 << (len(b) - 1)
+    score = len(b)
+    for char in a:
+        match = masks.get(char, 0)
+        x = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        up = negative | ~(horizontal | positive)
+        down = positive & horizontal
+        if up & last:
+            score += 1
+        elif down & last:
+            score -= 1
+        up = (up << 1) | 1
+        down <<= 1
+        positive = down | ~(x | up)
+        negative = up & x
+    return score
+
+
+def compact(text: str) -> str:
+    """Lower case without spaces or punctuation, so "you tube" and "youtube" are the same string"""
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+
+def bigrams(form: str) -> Set[str]:
+    padded = f"^{form}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class PhoneticIndex:
+    """
+    Near-miss lookup over a fixed set of names, for transcripts the
+    recognizer mangled ("you tube", "get hub", "linked in").
+
+    Names are indexed by their Double Metaphone keys and by their letter
+    bigrams. A query is compacted (spaces dropped); its candidates are the
+    names sharing a key plus the few sharing the most bigrams, and only those
+    get an edit distance. The score is string similarity (one minus the edit
+    distance over the longer length), raised towards 1.0 when the sounds
+    match: halfway for the primary key, a little less for the alternate.
+    Everything is built up front and recent queries are remembered, so a
+    lookup takes microseconds.
+    """
+
+    def __init__(self, names: Iterable[str], key_length: int = 6, candidates: int = 4, memory: int = 1024):
+        self.key_length = key_length
+        self.candidates = candidates
+        self.memory = memory
+        self.names: Dict[str, str] = {}  # compact form -> name
+        self.form_keys: Dict[str, Tuple[str, str]] = {}
+        self.keys: Dict[str, Set[str]] = {}  # metaphone key -> compact forms
+        self.grams: Dict[str, List[str]] = {}  # bigram -> compact forms
+        self.gram_counts: Dict[str, int] = {}
+        self.recent: Dict[str, Optional[Tuple[str, float]]] = {}
+        for name in names:
+            form = compact(name)
+            if not form or form in self.names:
+                continue
+            self.names[form] = name
+            self.form_keys[form] = double_metaphone(form, key_length)
+            for key in set(self.form_keys[form]) - {''}:
+                self.keys.setdefault(key, set()).add(form)
+            grams = bigrams(form)
+            self.gram_counts[form] = len(grams)
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(form)
+        self.max_length = max((len(form) for form in self.names), default=0)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def sounds_like(self, text: str, name: str) -> bool:
+        """Whether text and name share their primary Double Metaphone key"""
+        primary = double_metaphone(compact(text), self.key_length)[0]
+        return bool(primary) and primary == self.form_keys.get(compact(name), ('',))[0]
+
+    def match(self, text: str) -> Optional[Tuple[str, float]]:
+        """(name, confidence 0-1) of the closest name, or None if nothing is close"""
+        form = compact(text)
+        if form in self.recent:
+            return self.recent[form]
+        result = self._match(form)
+        if len(self.recent) >= self.memory:
+            self.recent.clear()
+        self.recent[form] = result
+        return result
+
+    def _match(self, form: str) -> Optional[Tuple[str, float]]:
+        if not form or len(form) > 2 * self.max_length:
+            return None
+        if form in self.names:
+            return self.names[form], 1.0
+        primary, alternate = double_metaphone(form, self.key_length)
+        candidates = set(self.keys.get(primary, ()))
+        if alternate:
+            candidates.update(self.keys.get(alternate, ()))
+        grams = bigrams(form)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self.grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        dice = sorted(((2 * count / (len(grams) + self.gram_counts[candidate]), candidate)
+                       for candidate, count in shared.items()), reverse=True)
+        candidates.update(candidate for score, candidate in dice[:self.candidates] if score >= 0.3)
+
+        best = None
+        for candidate in candidates:
+            longest = max(len(form), len(candidate))
+            # Past half the length the similarity is too low to matter
+            distance = levenshtein(form, candidate, limit=longest // 2)
+            similarity = max(0.0, 1.0 - distance / longest)
+            keys = self.form_keys[candidate]
+            if primary and primary == keys[0]:
+                sound = 1.0
+            elif {primary, alternate} & set(keys) - {''}:
+                sound = 0.8
+            else:
+                sound = 0.0
+            confidence = similarity + (1.0 - similarity) * sound / 2
+            if best is None or confidence > best[1]:
+                best = (self.names[candidate], confidence)
+        return best
+
+    def find(self, text: str, max_words: int = 3) -> Optional[Tuple[str, float, int, int]]:
+        """
+        Best (name, confidence, start, end) over every run of up to max_words
+        words in text, as word indexes; longer runs win ties.
+        """
+        words = text.lower().split()
+        best = None
+        for start in range(len(words)):
+            for end in range(start + 1, min(len(words), start + max_words) + 1):
+                result = self.match(' '.join(words[start:end]))
+                if result is not None and (best is None or (result[1], end - start) > (best[1], best[3] - best[2])):
+                    best = (result[0], result[1], start, end)
+        return best
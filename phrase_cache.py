@@ -0,0 +1,282 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, List, Optional, Set
+
+from metrics import metrics
+
+# Said the same way every time
+FIXED_PHRASES = [
+    "Yes, how can I help you?",
+    "Goodbye!",
+    "Volume muted",
+    "Volume unmuted",
+    "Alarm ringing!",
+    "There is nothing to snooze",
+    "Could not check battery status",
+    "Opening website",
+    "Sorry, I couldn't execute that command.",
+]
+
+PERCENT_TEMPLATES = [
+    "Volume increased to {} percent",
+    "Volume decreased to {} percent",
+    "Volume set to {} percent",
+    "Current volume is at {} percent",
+]
+
+CATALOG_TEMPLATES = [
+    ("Opening {}", ('special_folders', 'websites', 'applications')),
+    ("Closed {}", ('websites', 'applications')),
+]
+
+
+def standard_phrases(catalog=None, wake_word: str = "maya") -> List[str]:
+    """
+    What Maya says without asking Gemma, most frequent first: fixed phrases,
+    then every catalog entry, then every volume percentage.
+    """
+    phrases = list(FIXED_PHRASES)
+    phrases.append(f"Voice Assistant activated. Say '{wake_word}' to wake me up.")
+    phrases.append(f"Going back to sleep. Say '{wake_word}' to wake me up.")
+    if catalog is not None:
+        for template, kinds in CATALOG_TEMPLATES:
+            for kind in kinds:
+                phrases.extend(template.format(name) for name in catalog.names(kind))
+    for template in PERCENT_TEMPLATES:
+        phrases.extend(template.format(percent) for percent in range(101))
+    return phrases
+
+
+def voice_key(engine, rate: int, volume: float) -> str:
+    """What rendered audio depends on besides the text"""
+    try:
+        voice = engine.getProperty('voice')
+    except Exception:
+        voice = None
+    return f"{voice}|{rate}|{volume}"
+
+
+def wav_seconds(path: str) -> float:
+    with wave.open(path, 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate() or 1)
+
+
+class WavPlayer:
+    """Plays a WAV file; play() blocks until it ends or `stop` is set, and returns False if stopped"""
+    name = "player"
+
+    def play(self, path: str, stop: threading.Event) -> bool:
+        raise NotImplementedError
+
+
+class WinsoundPlayer(WavPlayer):
+    name = "winsound"
+
+    def play(self, path: str, stop: threading.Event) -> bool:
+        import winsound
+
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        if stop.wait(wav_seconds(path)):
+            winsound.PlaySound(None, winsound.SND_PURGE)
+            return False
+        return True
+
+
+class CommandPlayer(WavPlayer):
+    """paplay, aplay or afplay in a subprocess, terminated on stop"""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.name = os.path.basename(command)
+
+    def play(self, path: str, stop: threading.Event) -> bool:
+        process = subprocess.Popen([self.command, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        while True:
+            try:
+                process.wait(timeout=0.02)
+                return process.returncode == 0
+            except subprocess.TimeoutExpired:
+                if stop.is_set():
+                    process.terminate()
+                    process.wait()
+                    return False
+
+
+def default_player() -> Optional[WavPlayer]:
+    if sys.platform == 'win32':
+        return WinsoundPlayer()
+    for command in ('paplay', 'aplay', 'afplay'):
+        path = shutil.which(command)
+        if path:
+            return CommandPlayer(path)
+    return None
+
+
+class PhraseCache:
+    """
+    Pre-synthesized audio for the phrases Maya says over and over. Each phrase
+    is rendered to a WAV file once, by the TTS thread while it has nothing to
+    say, and afterwards played directly instead of going through the speech
+    engine again. Files are named after a hash of the voice, rate, volume and
+    text, so changing the voice renders afresh rather than playing the old
+    one. The directory is kept under max_mb by evicting the least recently
+    played files; play order survives restarts through the files' mtimes.
+
+    `phrases` are rendered in the background, in order; texts matching one of
+    the templates (a catalog entry added later, say) are rendered after their
+    first use.
+    """
+
+    def __init__(self, phrases: Iterable[str] = (), cache_dir: str = ".phrase_cache", max_mb: float = 64,
+                 player: Optional[WavPlayer] = None, templates: Iterable[str] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.player = player if player is not None else default_player()
+        self.phrases: Set[str] = set()
+        self.pending: Deque[str] = deque()
+        self.failed: Set[str] = set()
+        if templates is None:
+            templates = PERCENT_TEMPLATES + [template for template, kinds in CATALOG_TEMPLATES]
+        self.patterns = [re.compile(re.escape(template).replace(re.escape('{}'), '.+') + '$') for template in templates]
+        self.files: "OrderedDict[str, int]" = OrderedDict()  # file name -> bytes, least recently played first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.evictions = 0
+        self._scan()
+        for phrase in phrases:
+            self.add(phrase)
+
+    @property
+    def enabled(self) -> bool:
+        return self.player is not None and self.max_bytes > 0
+
+    def add(self, phrase: str):
+        """Render phrase in the background (if it isn't on disk already) and use it from then on"""
+        if phrase not in self.phrases:
+            self.phrases.add(phrase)
+            self.pending.append(phrase)
+
+    def cacheable(self, text: str) -> bool:
+        return text in self.phrases or any(pattern.match(text) for pattern in self.patterns)
+
+    def path(self, text: str, voice_key: str) -> str:
+        digest = hashlib.sha1(f"{voice_key}|{text}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def lookup(self, text: str, voice_key: str) -> Optional[str]:
+        """Path of the rendered phrase, or None; a miss on a cacheable phrase queues it for rendering"""
+        if not self.enabled or not self.cacheable(text):
+            return None
+        path = self.path(text, voice_key)
+        name = os.path.basename(path)
+        with self.lock:
+            found = name in self.files
+            if found:
+                self.files.move_to_end(name)
+        if found and os.path.exists(path):
+            self.hits += 1
+            metrics.inc('tts_phrase_cache_total', outcome='hit')
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+        self.misses += 1
+        metrics.inc('tts_phrase_cache_total', outcome='miss')
+        if text not in self.failed:
+            if text in self.phrases:
+                self._forget(name)
+            self.phrases.add(text)
+            self.pending.appendleft(text)  # wanted now, so ahead of the background list
+        return None
+
+    def play(self, path: str, stop: threading.Event) -> bool:
+        return self.player.play(path, stop)
+
+    def next_render(self, voice_key: str) -> Optional[str]:
+        """Next pending phrase that isn't on disk yet, or None"""
+        while self.enabled and self.pending:
+            text = self.pending.popleft()
+            if text in self.failed:
+                continue
+            with self.lock:
+                if os.path.basename(self.path(text, voice_key)) not in self.files:
+                    return text
+        return None
+
+    def render(self, text: str, voice_key: str, engine) -> bool:
+        """Synthesize text to its file with a pyttsx3-compatible engine; call on the engine's thread"""
+        path = self.path(text, voice_key)
+        tmp_path = path[:-len('.wav')] + '.tmp.wav'
+        started = time.perf_counter()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            engine.save_to_file(text, tmp_path)
+            engine.runAndWait()
+            wav_seconds(tmp_path)  # the engine wrote a readable WAV file
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error rendering phrase '{text}': {e}")
+            self.failed.add(text)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        metrics.observe('tts_phrase_render_seconds', time.perf_counter() - started)
+        self.renders += 1
+        self._store(os.path.basename(path), os.path.getsize(path))
+        return True
+
+    def stats(self):
+        return {
+            'player': self.player.name if self.player is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'renders': self.renders,
+            'pending': len(self.pending),
+            'files': len(self.files),
+            'megabytes': round(self.total_bytes / (1024 * 1024), 2),
+            'evictions': self.evictions,
+        }
+
+    def _scan(self):
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.name.endswith('.wav') and not entry.name.endswith('.tmp.wav')]
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            self._store(entry.name, entry.stat().st_size)
+
+    def _store(self, name: str, size: int):
+        evicted = []
+        with self.lock:
+            self.total_bytes += size - self.files.pop(name, 0)
+            self.files[name] = size
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                oldest, oldest_size = self.files.popitem(last=False)
+                self.total_bytes -= oldest_size
+                evicted.append(oldest)
+        for oldest in evicted:
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, oldest))
+            except OSError:
+                pass
+
+    def _forget(self, name: str):
+        with self.lock:
+            self.total_bytes -= self.files.pop(name, 0)
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from response_stream import GenerationCancelled
+from metrics import metrics
+from startup import profile
+from tts_worker import PRIORITY_CHAT, PRIORITY_NORMAL
+
+if TYPE_CHECKING:
+    from voice_assistant import VoiceAssistant
+
+
+class AsyncVoicePipeline:
+    """
+    Runs the assistant as asyncio stages connected by bounded queues:
+
+        capture -> recognize -> route -> generate -> speak
+
+    Every blocking library call (microphone, recognizers, command handlers,
+    Ollama) runs in an executor and speech goes through the TTS worker, so the microphone keeps listening
+    while an answer is being generated or spoken. The capture queue drops its
+    oldest phrase when recognition falls behind; the other queues apply
+    backpressure by making the producer wait. A new utterance cancels the
+    reply still in flight: its Ollama stream is closed and its unspoken
+    sentences are discarded.
+    """
+
+    def __init__(self, assistant: "VoiceAssistant", queue_size: int = 4):
+        self.assistant = assistant
+        self.queue_size = queue_size
+        self.turn = 0  # bumped to cancel the reply in flight
+        self.dropped_audio = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stopping = threading.Event()
+
+    def run(self):
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.assistant.speech_output = None
+            self.assistant.shutdown()
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.audio_queue = asyncio.Queue(self.queue_size)
+        self.text_queue = asyncio.Queue(self.queue_size)
+        self.reply_queue = asyncio.Queue(self.queue_size)
+        self.speech_queue = asyncio.PriorityQueue(self.queue_size * 4)
+        self.speech_sequence = itertools.count()
+        self.capture_executor = ThreadPoolExecutor(1, thread_name_prefix='capture')
+        self.asr_executor = ThreadPoolExecutor(1, thread_name_prefix='asr')
+        self.work_executor = ThreadPoolExecutor(4, thread_name_prefix='work')
+
+        assistant = self.assistant
+        assistant.speech_output = self.speak_threadsafe
+        assistant.speak(f"Voice Assistant activated. Say '{assistant.wake_word}' to wake me up.")
+        assistant.scheduler.start()
+        profile.mark('ready')
+        assistant.warm_up()
+
+        tasks = [
+            asyncio.create_task(self.capture_stage()),
+            asyncio.create_task(self.recognize_stage()),
+            asyncio.create_task(self.route_stage()),
+            asyncio.create_task(self.generate_stage()),
+            asyncio.create_task(self.speak_stage()),
+            asyncio.create_task(self.sleep_watch()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.stopping.set()
+            for task in tasks:
+                task.cancel()
+            for executor in (self.capture_executor, self.asr_executor, self.work_executor):
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def in_executor(self, executor, func, *args):
+        return await self.loop.run_in_executor(executor, func, *args)
+
+    def cancel_reply(self):
+        self.turn += 1
+        self.assistant.interrupt_speech()
+
+    def speak_threadsafe(self, text: str, priority: int = PRIORITY_NORMAL, turn: Optional[int] = None):
+        """speak() replacement: queue text for the TTS stage from any thread"""
+        item = (priority, next(self.speech_sequence), turn, text)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.loop.create_task(self.speech_queue.put(item))
+        else:
+            # Blocks the calling worker while the speech queue is full
+            asyncio.run_coroutine_threadsafe(self.speech_queue.put(item), self.loop).result()
+
+    # Stages
+
+    async def capture_stage(self):
+        await self.in_executor(self.capture_executor, self.capture_loop)
+
+    def capture_loop(self):
+        with self.assistant.open_audio_source() as source:
+            print("Listening... (async pipeline)")
+            while not self.stopping.is_set():
+                try:
+                    audio = self.assistant.capture_audio(source)
+                except Exception as e:
+                    print(f"Listening error: {e}")
+                    continue
+                if audio is None:
+                    continue
+                if self.assistant.tts.busy and not self.assistant.barge_in:
+                    continue  # most likely Maya hearing herself
+                self.loop.call_soon_threadsafe(self.offer_audio, audio)
+
+    def offer_audio(self, audio):
+        if self.audio_queue.full():
+            self.audio_queue.get_nowait()
+            self.dropped_audio += 1
+            metrics.inc('audio_dropped_total')
+            print(f"Recognition is behind, dropped {self.dropped_audio} phrase(s) so far")
+        self.audio_queue.put_nowait(audio)
+
+    async def recognize_stage(self):
+        while True:
+            audio = await self.audio_queue.get()
+            try:
+                command = await self.in_executor(self.asr_executor, self.assistant.transcribe, audio)
+            except Exception as e:
+                print(f"Recognition error: {e}")
+                continue
+            if command:
+                await self.text_queue.put(command)
+
+    async def route_stage(self):
+        assistant = self.assistant
+        while True:
+            command = await self.text_queue.get()
+            try:
+                if not assistant.is_active:
+                    if assistant.wake_word in command:
+                        await self.in_executor(self.work_executor, assistant.wake)
+                    continue
+
+                # Whatever the user says now supersedes the reply still being spoken
+                self.cancel_reply()
+                if assistant.is_exit_command(command):
+                    await self.in_executor(self.work_executor, assistant.go_to_sleep, "Goodbye!")
+                    continue
+
+                assistant.begin_turn(command)
+                executed = await self.in_executor(
+                    self.work_executor, assistant.executor.try_execute_command, command, assistant
+                )
+                if not executed:
+                    await self.reply_queue.put((self.turn, command))
+            except Exception as e:
+                print(f"Error: {e}")
+
+    async def generate_stage(self):
+        while True:
+            turn, command = await self.reply_queue.get()
+            if turn != self.turn:
+                continue
+            try:
+                await self.in_executor(self.work_executor, self.respond, turn, command)
+            except GenerationCancelled:
+                print("Reply cancelled by a newer utterance")
+            except Exception as e:
+                print(f"Error: {e}")
+
+    def respond(self, turn: int, command: str):
+        assistant = self.assistant
+
+        def on_sentence(sentence):
+            if turn != self.turn:
+                raise GenerationCancelled()
+            self.speak_threadsafe(sentence, PRIORITY_CHAT, turn)
+
+        assistant.set_status("Thinking...")
+        try:
+            if assistant.stream_responses:
+                assistant.stream_gemma_response(command, on_sentence)
+            else:
+                on_sentence(assistant.get_gemma_response(command))
+        finally:
+            assistant.set_status("")
+
+    async def speak_stage(self):
+        while True:
+            priority, _, turn, text = await self.speech_queue.get()
+            if turn is not None and turn != self.turn:
+                continue  # sentence from a cancelled reply
+            try:
+                await asyncio.wrap_future(self.assistant.tts.say(text, priority))
+            except Exception as e:
+                print(f"Speech error: {e}")
+
+    async def sleep_watch(self):
+        while True:
+            await asyncio.sleep(1)
+            if self.assistant.sleep_due():
+                self.cancel_reply()
+                await self.in_executor(
+                    self.work_executor, self.assistant.go_to_sleep,
+                    f"Going back to sleep. Say '{self.assistant.wake_word}' to wake me up."
+                )
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share an entry"""
+    prompt = re.sub(r"[^\w\s']", ' ', prompt.lower())
+    return ' '.join(prompt.split())
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of model replies with a per-entry TTL.
+    Keys combine the normalized prompt, the model name and the generation
+    options. When a path is given the cache is loaded from and saved to that
+    JSON file so it survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if self.path:
+            self.load()
+
+    def make_key(self, prompt: str, model: str, options: Optional[Dict[str, Any]] = None) -> str:
+        return json.dumps([normalize_prompt(prompt), model, options or {}], sort_keys=True)
+
+    def get(self, prompt: str, model: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        key = self.make_key(prompt, model, options)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry['expires'] <= time.time():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['reply']
+
+    def has(self, prompt: str, model: str, options: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether get() would hit, without counting a hit or miss"""
+        key = self.make_key(prompt, model, options)
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and entry['expires'] > time.time()
+
+    def put(self, prompt: str, model: str, options: Optional[Dict[str, Any]], reply: str, ttl: Optional[float] = None):
+        key = self.make_key(prompt, model, options)
+        with self.lock:
+            self.entries[key] = {'reply': reply, 'expires': time.time() + (ttl if ttl is not None else self.ttl)}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        if self.path:
+            self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        if self.path:
+            self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"Error loading response cache: {e}")
+            return
+        now = time.time()
+        with self.lock:
+            # Entries are stored oldest first, so insertion order restores the LRU order
+            for key, entry in stored:
+                if entry.get('expires', 0) > now:
+                    self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        with self.lock:
+            snapshot = list(self.entries.items())
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving response cache: {e}")
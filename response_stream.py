@@ -0,0 +1,91 @@
+import re
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class GenerationCancelled(Exception):
+    """Raised from an on_sentence callback to abandon a reply mid-stream"""
+
+
+class SentenceSplitter:
+    """
+    Incrementally splits streamed text into sentences.
+    A sentence is complete once a '.', '!' or '?' is followed by whitespace,
+    which matches the split used for non-streamed replies.
+    """
+    _boundary = re.compile(r'(?<=[.!?])\s+')
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        parts = self._boundary.split(self.buffer)
+        # The last part has no trailing whitespace yet, so it may still grow
+        self.buffer = parts.pop()
+        return [p.strip() for p in parts if p.strip()]
+
+    def flush(self) -> List[str]:
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
+
+
+def clean_sentence(sentence: str) -> str:
+    # Remove unwanted '*' characters, same as the non-streamed reply cleanup
+    return sentence.replace('*', '').strip()
+
+
+def stream_sentences(chunks: Iterable, max_sentences: int = 3, stop_marker: str = "User:") -> Iterator[str]:
+    """
+    Yield cleaned sentences from an Ollama streaming response as soon as they
+    are complete. Once max_sentences have been produced (or the model starts
+    writing the next "User:" turn) the upstream stream is closed, which drops
+    the HTTP connection and makes Ollama abort generation server-side.
+    """
+    splitter = SentenceSplitter()
+    produced = 0
+    stopped = False
+    try:
+        for chunk in chunks:
+            text = chunk['response'] or ''
+            if stop_marker and stop_marker in splitter.buffer + text:
+                text = (splitter.buffer + text).split(stop_marker)[0]
+                splitter.buffer = ""
+                stopped = True
+            for sentence in splitter.feed(text):
+                sentence = clean_sentence(sentence)
+                if not sentence:
+                    continue
+                yield sentence
+                produced += 1
+                if produced >= max_sentences:
+                    return
+            if stopped or chunk.get('done'):
+                break
+        for sentence in splitter.flush():
+            sentence = clean_sentence(sentence)
+            if sentence and produced < max_sentences:
+                yield sentence
+                produced += 1
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def speak_stream(chunks: Iterable, on_sentence: Callable[[str], None], max_sentences: int = 3) -> str:
+    """
+    Hand each finished sentence to on_sentence (usually the TTS) and return
+    the full reply once the stream ends or the sentence budget is reached.
+    """
+    start = time.time()
+    first_sentence_at: Optional[float] = None
+    sentences = []
+    for sentence in stream_sentences(chunks, max_sentences=max_sentences):
+        if first_sentence_at is None:
+            first_sentence_at = time.time() - start
+            print(f"First sentence ready after {first_sentence_at:.2f}s")
+        sentences.append(sentence)
+        on_sentence(sentence)
+    return ' '.join(sentences)
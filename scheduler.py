@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class ScheduledEntry:
+    id: int
+    kind: str  # 'alarm' or 'reminder'
+    text: str
+    label: str  # the time as the user said it
+    due: float  # epoch seconds
+    repeat: float = 0.0  # seconds between occurrences, 0 for one-off entries
+
+
+class Scheduler:
+    """
+    Runs every alarm and reminder from a single thread.
+    Pending entries sit in a min-heap ordered by due time; the thread sleeps
+    on a condition variable until the earliest one is due or the heap changes.
+    Cancelled entries are dropped lazily when they reach the top of the heap.
+    When a path is given, entries are stored in SQLite and replayed on start,
+    so alarms survive a restart. Entries that came due while the assistant was
+    not running fire as soon as it starts.
+    """
+
+    def __init__(self, callback: Callable[[ScheduledEntry], None], path: Optional[str] = None):
+        self.callback = callback
+        self.path = path
+        self.heap = []
+        self.entries: Dict[int, ScheduledEntry] = {}
+        self.ids = itertools.count(1)
+        self.last_fired: Optional[ScheduledEntry] = None
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.db = None
+        if self.path:
+            self._open_db()
+
+    def _open_db(self):
+        try:
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY, kind TEXT, text TEXT, label TEXT, due REAL, repeat REAL)"
+            )
+            self.db.commit()
+            rows = self.db.execute("SELECT id, kind, text, label, due, repeat FROM entries").fetchall()
+        except Exception as e:
+            print(f"Error opening schedule database {self.path}: {e}")
+            self.db = None
+            return
+        for row in rows:
+            entry = ScheduledEntry(*row)
+            self.entries[entry.id] = entry
+            self.heap.append((entry.due, entry.id))
+        heapq.heapify(self.heap)
+        if rows:
+            self.ids = itertools.count(max(row[0] for row in rows) + 1)
+
+    def _store(self, entry: ScheduledEntry):
+        if self.db is None:
+            return
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (id, kind, text, label, due, repeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.id, entry.kind, entry.text, entry.label, entry.due, entry.repeat)
+            )
+            self.db.commit()
+        except Exception as e:
+            print(f"Error saving scheduled {entry.kind}: {e}")
+
+    def _delete(self, entry_id: int):
+        if self.db is None:
+            return
+        try:
+            self.db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            self.db.commit()
+        except Exception as e:
+            print(f"Error deleting scheduled entry {entry_id}: {e}")
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+    def add(self, kind: str, text: str, label: str, due: float, repeat: float = 0.0) -> ScheduledEntry:
+        with self.condition:
+            entry = ScheduledEntry(next(self.ids), kind, text, label, due, repeat)
+            self.entries[entry.id] = entry
+            heapq.heappush(self.heap, (entry.due, entry.id))
+            self._store(entry)
+            self.condition.notify()
+        return entry
+
+    def cancel(self, entry_id: int) -> bool:
+        with self.condition:
+            entry = self.entries.pop(entry_id, None)
+            if entry is None:
+                return False
+            self._delete(entry_id)
+            self._compact()
+            self.condition.notify()
+        return True
+
+    def snooze(self, entry_id: int, seconds: float) -> Optional[ScheduledEntry]:
+        """Re-arm the entry that fired last as a one-off, or push a pending entry back"""
+        fired = self.last_fired
+        if fired is not None and fired.id == entry_id:
+            return self.add(fired.kind, fired.text, fired.label, time.time() + seconds)
+        with self.condition:
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return None
+            entry.due = max(entry.due, time.time()) + seconds
+            heapq.heappush(self.heap, (entry.due, entry.id))
+            self._store(entry)
+            self.condition.notify()
+        return entry
+
+    def pending(self, kind: Optional[str] = None) -> List[ScheduledEntry]:
+        with self.condition:
+            entries = [e for e in self.entries.values() if kind is None or e.kind == kind]
+        return sorted(entries, key=lambda e: e.due)
+
+    def _compact(self):
+        # Rebuild the heap once cancelled or rescheduled leftovers outnumber live entries
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [(e.due, e.id) for e in self.entries.values()]
+            heapq.heapify(self.heap)
+
+    def _pop_due(self) -> Optional[ScheduledEntry]:
+        """Wait until the earliest entry is due and return it; None when stopping"""
+        with self.condition:
+            while self.running:
+                while self.heap:
+                    due, entry_id = self.heap[0]
+                    entry = self.entries.get(entry_id)
+                    if entry is None or entry.due != due:
+                        heapq.heappop(self.heap)  # cancelled or rescheduled
+                        continue
+                    break
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                delay = self.heap[0][0] - time.time()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                due, entry_id = heapq.heappop(self.heap)
+                entry = self.entries[entry_id]
+                if entry.repeat > 0:
+                    # Skip occurrences missed while the assistant was not running
+                    while entry.due <= time.time():
+                        entry.due += entry.repeat
+                    heapq.heappush(self.heap, (entry.due, entry.id))
+                    self._store(entry)
+                else:
+                    del self.entries[entry_id]
+                    self._delete(entry_id)
+                fired = ScheduledEntry(entry.id, entry.kind, entry.text, entry.label, due, entry.repeat)
+                self.last_fired = fired
+                return fired
+        return None
+
+    def _run(self):
+        while True:
+            entry = self._pop_due()
+            if entry is None:
+                return
+            try:
+                self.callback(entry)
+            except Exception as e:
+                print(f"Error running scheduled {entry.kind}: {e}")
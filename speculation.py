@@ -0,0 +1,96 @@
+import queue
+import re
+import threading
+import time
+from typing import Optional
+
+from metrics import metrics
+
+_QUESTION_START = re.compile(
+    r"(?:what|who|whom|whose|why|how|when|where|which|is|are|was|were|can|could|would|should|do|does|did|"
+    r"will|tell me|explain|describe|define|give me|i think|i feel|let's|hello|hi|hey|thanks|thank you)\b")
+
+# Words that command phrases are built around; any of them means routing may claim the utterance
+_COMMAND_WORD = re.compile(
+    r"\b(?:open|start|launch|close|exit|quit|search|find|volume|mute|unmute|fade|battery|power|shutdown|"
+    r"restart|reboot|sleep|lock|alarm|alarms|remind|reminder|reminders|snooze|leetcode|leet|program)\b")
+
+
+def likely_conversational(text: str) -> bool:
+    """
+    Cheap guess, ahead of routing, that an utterance is a question or chat
+    for Gemma rather than a command. It only decides whether to start the
+    model early, so a wrong guess costs a discarded generation, not a wrong
+    answer.
+    """
+    text = ' '.join(text.lower().split())
+    return bool(_QUESTION_START.match(text)) and not _COMMAND_WORD.search(text)
+
+
+class SpeculativeReply:
+    """
+    A Gemma stream started before routing has finished. A background thread
+    reads the chunks into a queue, so generation makes progress while the
+    command router and handlers run; the reply then iterates like the stream
+    it wraps. discard() (a command claimed the utterance) or close() (enough
+    sentences were spoken) closes the stream at once, even while the model is
+    still loading, which aborts the request on the server.
+    """
+
+    _END = object()
+
+    def __init__(self, chunks, prompt: str):
+        self.chunks = chunks
+        self.prompt = prompt  # as sent to the model, after joke and context handling
+        self.started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.stopped = threading.Event()
+        self.items: "queue.Queue" = queue.Queue()
+        self.thread = threading.Thread(target=self._read, name='speculative-llm', daemon=True)
+        self.thread.start()
+
+    @property
+    def final(self):
+        return self.chunks.final
+
+    def _read(self):
+        try:
+            for chunk in self.chunks:
+                self.items.put(chunk)
+                if self.stopped.is_set():
+                    break
+        except Exception as e:
+            self.items.put(e)
+        finally:
+            self.finished_at = time.perf_counter()
+            self.chunks.close()
+            self.items.put(self._END)
+
+    def __iter__(self):
+        while True:
+            item = self.items.get()
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        self.stopped.set()
+        self.chunks.close()  # unblocks a read still waiting on the model
+
+    def use(self) -> float:
+        """Called when the reply is taken up; returns how far ahead generation got"""
+        saved = time.perf_counter() - self.started
+        metrics.inc('speculative_total', outcome='used')
+        metrics.observe('speculative_saved_seconds', saved)
+        return saved
+
+    def discard(self) -> float:
+        """A command claimed the utterance; returns the generation time thrown away"""
+        self.stopped.set()
+        self.chunks.close()
+        wasted = (self.finished_at or time.perf_counter()) - self.started
+        metrics.inc('speculative_total', outcome='discarded')
+        metrics.observe('speculative_wasted_seconds', wasted)
+        return wasted
@@ -0,0 +1,155 @@
+"""
+Startup helpers: lazily imported modules and the --startup-profile report.
+"""
+import builtins
+import contextlib
+import sys
+import threading
+import time
+import types
+from typing import List, Tuple
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access, e.g.
+
+        pyautogui = lazy_import('pyautogui')
+
+    so that importing this file does not pay for pyautogui until a command
+    actually needs it (or warm_up() loads it in the background).
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lock'] = threading.Lock()
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    # __import__ rather than importlib, so the startup profile sees it
+                    __import__(self.__name__)
+                    module = sys.modules[self.__name__]
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def load_now(*modules):
+    """Import lazy modules immediately, e.g. from a background warm-up thread"""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
+
+
+class StartupProfile:
+    """
+    Records how long imports, initializers and background warm-up steps take
+    and when milestones (such as 'ready') are reached, relative to process
+    start. Nothing is recorded unless enable() was called.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.enabled = False
+        self.records: List[Tuple[str, str, float, float, str]] = []  # kind, name, start offset, seconds, thread
+        self.marks: List[Tuple[str, float]] = []
+        self.lock = threading.Lock()
+        self._original_import = None
+        self._local = threading.local()
+
+    def enable(self, trace_imports: bool = True):
+        self.enabled = True
+        if trace_imports:
+            self.trace_imports()
+
+    def _record(self, kind: str, name: str, start: float, seconds: float):
+        with self.lock:
+            self.records.append((kind, name, start - self.started, seconds, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def step(self, kind: str, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(kind, name, start, time.perf_counter() - start)
+
+    def mark(self, name: str):
+        if self.enabled:
+            with self.lock:
+                if name not in dict(self.marks):
+                    self.marks.append((name, time.perf_counter() - self.started))
+
+    def trace_imports(self):
+        """Time every module imported from now on (self time, excluding nested imports)"""
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        local = self._local
+
+        def traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            stack = local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self._record('import', name, start, elapsed - nested)
+
+        builtins.__import__ = traced_import
+
+    def stop_tracing(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, top_imports: int = 15) -> str:
+        with self.lock:
+            records = list(self.records)
+            marks = list(self.marks)
+        lines = ["Startup profile (milliseconds)"]
+        for name, offset in marks:
+            lines.append(f"  {name:<32} at {offset * 1000:8.1f}")
+
+        ready = dict(marks).get('ready')
+        imports = [r for r in records if r[0] == 'import']
+        if imports:
+            before_ready = [r for r in imports if ready is None or r[2] <= ready]
+            lines.append(f"  imports before ready: {sum(r[3] for r in before_ready) * 1000:.1f} ms in "
+                         f"{len(before_ready)} modules, {len(imports)} in total; slowest:")
+            for kind, name, offset, seconds, thread in sorted(imports, key=lambda r: -r[3])[:top_imports]:
+                lines.append(f"    {name:<30} {seconds * 1000:8.1f}  at {offset * 1000:8.1f}  [{thread}]")
+        for kind in ('init', 'warm-up'):
+            steps = [r for r in records if r[0] == kind]
+            if steps:
+                lines.append(f"  {kind}:")
+            for _, name, offset, seconds, thread in steps:
+                lines.append(f"    {name:<30} {seconds * 1000:8.1f}  at {offset * 1000:8.1f}  [{thread}]")
+        return '\n'.join(lines)
+
+
+profile = StartupProfile()
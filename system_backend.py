@@ -0,0 +1,41 @@
+import os
+import subprocess
+import webbrowser
+
+from startup import lazy_import, load_now
+
+psutil = lazy_import('psutil')
+
+
+class SystemBackend:
+    """
+    The operating-system side effects CommandExecutor needs: opening URLs,
+    folders and programs, shell commands and the battery state. Kept behind
+    one object so a fake can be swapped in (see fake_backends.py) and the
+    executor can run headless, e.g. in the benchmark harness.
+    """
+
+    def warm_up(self):
+        load_now(psutil)
+
+    def open_url(self, url: str):
+        webbrowser.open(url)
+
+    def open_path(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        os.startfile(path)
+        return True
+
+    def launch(self, command: str):
+        subprocess.Popen(command)
+
+    def shell(self, command: str):
+        os.system(command)
+
+    def kill(self, process_name: str):
+        subprocess.call(f'taskkill /f /im {process_name}', shell=True)
+
+    def battery(self):
+        """psutil-style battery object (percent, power_plugged) or None"""
+        return psutil.sensors_battery()
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from phonetic_index import PhoneticIndex
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.json')
+
+# When two names of equal length match, the earlier kind wins (same order open_target used to scan in)
+CATALOG_KINDS = ('special_folders', 'websites', 'applications')
+# What 'close' can act on: a site's tab or an app's window, never a folder
+CLOSABLE_KINDS = ('websites', 'applications')
+
+
+@dataclass
+class CatalogMatch:
+    kind: str
+    name: str
+    value: Any
+    start: int
+    end: int
+    confidence: float = 1.0
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a set of names.
+    All names are found in a single pass over the text, and only matches that
+    start and end on word boundaries are reported.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[str]] = [[]]
+        for name in names:
+            self._add(name)
+        self._build_links()
+
+    def _add(self, name: str):
+        node = 0
+        for char in name:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        self.outputs[node].append(name)
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, name) for every whole-word occurrence"""
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for name in self.outputs[node]:
+                start, end = index + 1 - len(name), index + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, end):
+                    matches.append((start, end, name))
+        return matches
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+class TargetCatalog:
+    """
+    Folders, websites and applications that open/close commands can target.
+    Loaded from a JSON config file into one PatternMatcher per kind. The file's
+    mtime is checked at most every check_interval seconds and only the kinds
+    whose entries changed are re-indexed, so edits apply without a restart.
+    Each kind also has a PhoneticIndex for names the recognizer got nearly
+    right ("you tube", "get hub"); see fuzzy_lookup().
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.entries: Dict[str, Dict[str, Any]] = {kind: {} for kind in CATALOG_KINDS}
+        self.matchers: Dict[str, PatternMatcher] = {kind: PatternMatcher([]) for kind in CATALOG_KINDS}
+        self.phonetic: Dict[str, PhoneticIndex] = {kind: PhoneticIndex([]) for kind in CATALOG_KINDS}
+        self.mtime = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> List[str]:
+        """Re-read the config file and re-index changed kinds; returns the kinds that changed"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading target catalog {self.path}: {e}")
+            return []
+
+        changed = []
+        with self.lock:
+            first_load = self.mtime is None
+            self.mtime = mtime
+            for kind in CATALOG_KINDS:
+                section = {normalize_name(name): value for name, value in data.get(kind, {}).items()}
+                if kind == 'special_folders':
+                    section = {name: os.path.expanduser(path) for name, path in section.items()}
+                if section != self.entries[kind]:
+                    self.entries[kind] = section
+                    self.matchers[kind] = PatternMatcher(section.keys())
+                    self.phonetic[kind] = PhoneticIndex(section.keys())
+                    changed.append(kind)
+        if changed and not first_load:
+            print(f"Target catalog reloaded: {', '.join(changed)}")
+        return changed
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self.reload()
+
+    def lookup(self, text: str, kinds: Iterable[str] = CATALOG_KINDS) -> Optional[CatalogMatch]:
+        """Return the longest catalog name found in text, or None"""
+        self.maybe_reload()
+        text = normalize_name(text)
+        best = None
+        best_key = None
+        with self.lock:
+            for priority, kind in enumerate(CATALOG_KINDS):
+                if kind not in kinds:
+                    continue
+                for start, end, name in self.matchers[kind].find_all(text):
+                    key = (end - start, -priority, -start)
+                    if best_key is None or key > best_key:
+                        best_key = key
+                        best = CatalogMatch(kind, name, self.entries[kind][name], start, end)
+        return best
+
+    def fuzzy_lookup(self, text: str, kinds: Iterable[str] = CATALOG_KINDS,
+                     min_confidence: float = 0.75) -> Optional[CatalogMatch]:
+        """
+        The catalog name that sounds or is spelled most like some run of up to
+        three words in text, if its confidence reaches min_confidence. For
+        when lookup() found nothing.
+        """
+        self.maybe_reload()
+        text = normalize_name(text)
+        words = text.split()
+        best = None
+        with self.lock:
+            for kind in CATALOG_KINDS:
+                if kind not in kinds:
+                    continue
+                found = self.phonetic[kind].find(text)
+                if found is None or found[1] < min_confidence or (best is not None and found[1] <= best.confidence):
+                    continue
+                name, confidence, first, last = found
+                start = len(' '.join(words[:first])) + (1 if first else 0)
+                end = start + len(' '.join(words[first:last]))
+                best = CatalogMatch(kind, name, self.entries[kind][name], start, end, confidence)
+        return best
+
+    def names(self, kind: str) -> List[str]:
+        with self.lock:
+            return list(self.entries[kind])
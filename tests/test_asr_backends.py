@@ -0,0 +1,54 @@
+import time
+
+from asr_backends import RecognizerManager
+from fake_backends import ScriptedASRBackend, ScriptedAudio
+
+AUDIO = ScriptedAudio("open youtube")
+
+
+def manager(mode, cloud_delay=2.0, cloud_fail=False):
+    cloud = ScriptedASRBackend(cloud_delay, confidence=0.9, name="cloud", remote=True, fail=cloud_fail)
+    offline = ScriptedASRBackend(0.05, confidence=0.5, name="offline")
+    return RecognizerManager([cloud, offline], mode=mode, hedge_after=0.2, answer_after=0.5)
+
+
+def timed(asr):
+    started = time.perf_counter()
+    result = asr.recognize(AUDIO)
+    return result, time.perf_counter() - started
+
+
+def test_hedged_returns_offline_result_at_answer_deadline():
+    asr = manager("hedged")
+    result, elapsed = timed(asr)
+    assert result.backend == "offline"
+    assert 0.45 < elapsed < 1.0
+    asr.close()
+
+
+def test_race_returns_offline_result_at_answer_deadline():
+    asr = manager("race")
+    result, elapsed = timed(asr)
+    assert result.backend == "offline"
+    assert 0.45 < elapsed < 1.0
+    asr.close()
+
+
+def test_confident_cloud_result_wins_when_in_time():
+    asr = manager("race", cloud_delay=0.1)
+    result, elapsed = timed(asr)
+    assert result.backend == "cloud"
+    assert elapsed < 0.4
+    asr.close()
+
+
+def test_open_breaker_goes_straight_to_offline():
+    asr = manager("hedged", cloud_delay=0.0, cloud_fail=True)
+    for _ in range(3):
+        asr.recognize(AUDIO)
+    assert asr.breakers["cloud"].state == "open"
+    result, elapsed = timed(asr)
+    assert result.backend == "offline"
+    assert elapsed < 0.2
+    assert asr.stats()["cloud"]["calls"] == 3
+    asr.close()
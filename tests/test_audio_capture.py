@@ -0,0 +1,42 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('speech_recognition')
+
+from audio_capture import RingBuffer  # noqa: E402
+
+
+def samples(start, end):
+    return np.arange(start, end, dtype=np.int16)
+
+
+def test_view_across_the_wrap_is_contiguous():
+    ring = RingBuffer(8)
+    ring.write(samples(0, 6))
+    ring.write(samples(6, 11))  # wraps: 8, 9, 10 land at the front
+    view = ring.view(4, 11)
+    assert view.tolist() == list(range(4, 11))
+    assert view.base is ring.data  # no copy
+
+
+def test_view_is_clamped_to_what_is_still_buffered():
+    ring = RingBuffer(8)
+    ring.write(samples(0, 13))
+    assert ring.view(0, 20).tolist() == list(range(5, 13))
+    assert ring.view(10, 12).tolist() == [10, 11]
+
+
+def test_write_longer_than_capacity_keeps_the_tail():
+    ring = RingBuffer(4)
+    ring.write(samples(0, 3))
+    ring.write(samples(3, 13))
+    assert ring.written == 13
+    assert ring.view(0, 13).tolist() == [9, 10, 11, 12]
+
+
+def test_many_small_writes():
+    ring = RingBuffer(5)
+    for start in range(0, 40, 3):
+        ring.write(samples(start, start + 3))
+        end = start + 3
+        assert ring.view(0, end).tolist() == list(range(max(end - 5, 0), end))
@@ -0,0 +1,39 @@
+from command_executor import CommandExecutor
+from fake_backends import FakeSystemBackend, FakeWindowBackend
+
+
+class Assistant:
+    def __init__(self):
+        self.said = []
+
+    def speak(self, text, *args, **kwargs):
+        self.said.append(text)
+
+
+class StuckWindowBackend(FakeWindowBackend):
+    """A browser that ignores Ctrl+W"""
+
+    def hotkey(self, *keys):
+        if keys != ('ctrl', 'w'):
+            super().hotkey(*keys)
+
+
+def close_youtube(windows):
+    executor = CommandExecutor(system=FakeSystemBackend(windows), windows=windows)
+    executor.close_timeout = 0.2
+    windows.open_window("Google Chrome", ["GitHub", "YouTube"])
+    assistant = Assistant()
+    executor.close_site_tab("youtube", "https://www.youtube.com", assistant)
+    return assistant.said
+
+
+def test_closes_tab_in_background():
+    windows = FakeWindowBackend()
+    assert close_youtube(windows) == ["Closed youtube"]
+    assert windows.open_windows[0].tabs == ["GitHub"]
+
+
+def test_reports_tab_that_did_not_close():
+    windows = StuckWindowBackend()
+    assert close_youtube(windows) == ["I tried to close youtube, but it still seems to be open"]
+    assert "YouTube" in windows.open_windows[0].tabs
@@ -0,0 +1,17 @@
+from conversation import ConversationContext, is_follow_up
+
+
+def test_follow_ups():
+    assert is_follow_up("and how many people live there")
+    assert is_follow_up("tell me more")
+    assert not is_follow_up("what is the capital of france")
+    assert not is_follow_up("why is the sky blue")
+
+
+def test_digest_follows_history():
+    conversation = ConversationContext()
+    empty = conversation.digest()
+    conversation.add("what is the capital of france", "Paris.")
+    assert conversation.digest() != empty
+    conversation.clear()
+    assert conversation.digest() == empty
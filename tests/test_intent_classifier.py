@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from command_executor import CommandExecutor
+from fake_backends import FakeSystemBackend, FakeWindowBackend
+from intent_router import ParsedCommand
+from intent_classifier import IntentClassifier
+
+# Questions and chat that share words with commands; none of them may act
+CHAT = [
+    "silence of the lambs",
+    "show me a picture of a cat",
+    "is it too loud in a jet",
+    "take me to youtube",
+    "what is the volume of a cube",
+    "tell me about the battery of a car",
+    "who sings turn it up",
+    "how do i kill a process in linux",
+    "end of the world",
+    "the end",
+    "is the sound of music a good film",
+    "what does mute mean",
+    "how loud can a lion roar",
+    "be quiet please said the teacher",
+]
+
+COMMANDS = [
+    ("could you crank the sound up a bit", 'volume_up'),
+    ("bring the volume down a bit", 'volume_down'),
+    ("kill the sound please", 'mute'),
+    ("turn the sound back on", 'unmute'),
+    ("how much juice do i have left", 'battery'),
+    ("postpone the alarm please", 'snooze'),
+]
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return IntentClassifier()
+
+
+@pytest.mark.parametrize('text', CHAT)
+def test_chat_is_not_classified(classifier, text):
+    assert classifier.classify(text) is None
+
+
+@pytest.mark.parametrize('text,intent', COMMANDS)
+def test_paraphrased_commands(classifier, text, intent):
+    assert classifier.classify(text)[0] == intent
+
+
+def test_target_comes_after_the_verb(classifier):
+    windows = FakeWindowBackend()
+    executor = CommandExecutor(system=FakeSystemBackend(windows), windows=windows, classifier=classifier)
+    guess = executor.classify(ParsedCommand('unknown', {}, "pull up youtube"))
+    assert (guess.intent, guess.get('target')) == ('open', 'youtube')
+    assert executor.classify(ParsedCommand('unknown', {}, "show me a picture of a cat")) is None
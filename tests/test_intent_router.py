@@ -0,0 +1,55 @@
+import pytest
+
+from intent_router import CommandSpec, IntentRouter
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize('text,intent,slots', [
+    ("Open  YouTube", 'open', {'target': 'youtube'}),
+    ("close notepad", 'close', {'target': 'notepad'}),
+    ("please increase volume", 'volume_up', {}),
+    ("volume down a bit", 'volume_down', {}),
+    ("unmute", 'unmute', {}),
+    ("mute", 'mute', {}),
+    ("what is the volume level", 'volume_level', {}),
+    ("set an alarm for 7:30 am every day", 'set_alarm', {'time': '7:30 am', 'repeat': 'every day'}),
+    ("set alarm for 6 pm", 'set_alarm', {'time': '6 pm'}),
+    ("remind me to call mom at 5 pm", 'set_reminder', {'text': 'call mom', 'time': '5 pm'}),
+    ("cancel all alarms", 'cancel_schedule', {'kind': 'alarm'}),
+    ("list my reminders", 'list_schedule', {'kind': 'reminder'}),
+    ("snooze for 10 minutes", 'snooze', {'minutes': '10'}),
+    ("search cats on youtube", 'youtube_search', {'query': 'cats'}),
+    ("search python decorators on google", 'search', {'query': 'python decorators', 'target': 'google'}),
+    ("fade the volume to 20 percent over 3 seconds", 'volume_set', {'level': '20', 'seconds': '3'}),
+    ("leet code problem number 42", 'leetcode_problem', {'problem_num': '42'}),
+    ("write a program on binary search", 'write_program', {'topic': 'binary search'}),
+])
+def test_routes_commands(router, text, intent, slots):
+    parsed = router.route(text)
+    assert (parsed.intent, parsed.slots) == (intent, slots)
+
+
+@pytest.mark.parametrize('text,intent', [
+    ("open powerpoint", 'open'),  # 'power' only counts as a whole word
+    ("how much power is left", 'battery'),
+    ("open the lock screen settings", 'open'),  # earlier rows win
+])
+def test_table_order_and_whole_words(router, text, intent):
+    assert router.route(text).intent == intent
+
+
+def test_unknown_keeps_the_text(router):
+    parsed = router.route("what is the capital of France")
+    assert not parsed.is_command
+    assert parsed.get('target') == "what is the capital of france"
+
+
+def test_custom_table():
+    router = IntentRouter([CommandSpec('greet', r'hello (?P<name>\w+)'), CommandSpec('bye', r'bye', anchored=False)])
+    assert router.route("hello maya").slots == {'name': 'maya'}
+    assert router.route("ok bye then").intent == 'bye'
+    assert router.route("goodbye").intent == 'unknown'
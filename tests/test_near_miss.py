@@ -0,0 +1,41 @@
+import pytest
+
+from intent_router import IntentRouter
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize('text', ["volume", "cute", "mutt", "batter", "muted", "battery okay"])
+def test_other_words_are_not_commands(router, text):
+    assert router.near_miss(text) is None
+
+
+@pytest.mark.parametrize('text,intent', [
+    ("increased volume", 'volume_up'),
+    ("un mute", 'unmute'),
+    ("clothes notepad", 'close'),
+])
+def test_misheard_commands(router, text, intent):
+    assert router.near_miss(text).intent == intent
+
+
+@pytest.fixture(scope='module')
+def executor():
+    from command_executor import CommandExecutor
+    from fake_backends import FakeSystemBackend, FakeWindowBackend
+
+    windows = FakeWindowBackend()
+    return CommandExecutor(system=FakeSystemBackend(windows), windows=windows)
+
+
+@pytest.mark.parametrize('text,expected', [
+    ("clothes notepad", ('close', 'notepad')),
+    ("opun downloads", ('open', 'downloads')),
+    ("clothes downloads", None),  # a folder can be opened, not closed
+])
+def test_near_miss_targets_what_the_verb_acts_on(executor, text, expected):
+    guess = executor.near_miss(executor.router.route(text))
+    assert (guess and (guess.intent, guess.get('target'))) == expected
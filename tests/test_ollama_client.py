@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('ollama')
+
+from fake_ollama import FakeOllamaServer  # noqa: E402
+from ollama_client import OllamaClient  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    started = []
+
+    def make(**kwargs):
+        fake = FakeOllamaServer(**kwargs).start()
+        started.append(fake)
+        return fake
+
+    yield make
+    for fake in started:
+        fake.stop()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def read_in_background(stream):
+    chunks = []
+
+    def read():
+        for chunk in stream:
+            chunks.append(chunk)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    return reader, chunks
+
+
+def test_close_unblocks_a_stalled_read(server):
+    fake = server(reply="one two three", token_delay=1.0)
+    llm = OllamaClient(model='fake', host=fake.url)
+    stream = llm.stream("hello")
+    reader, chunks = read_in_background(stream)
+    assert wait_for(lambda: stream.lines is not None and stream.reading)  # waiting for the first word
+    started = time.perf_counter()
+    stream.close()
+    reader.join(timeout=2)
+    assert not reader.is_alive()
+    assert time.perf_counter() - started < 0.5
+    assert chunks == []
+    assert stream.final is None
+    assert wait_for(lambda: fake.aborted == 1)  # noticed on the server's next write
+    assert llm.stats()['errors'] == 0
+
+
+def test_close_while_loading_hands_out_nothing(server):
+    fake = server(load_delay=0.3)
+    llm = OllamaClient(model='fake', host=fake.url)
+    stream = llm.stream("hello")
+    reader, chunks = read_in_background(stream)
+    time.sleep(0.1)
+    stream.close()
+    reader.join(timeout=2)
+    assert not reader.is_alive()
+    assert chunks == []
+
+
+def test_finished_streams_share_one_connection(server):
+    fake = server(reply="hi there", token_delay=0.0)
+    llm = OllamaClient(model='fake', host=fake.url)
+    for _ in range(3):
+        stream = llm.stream("hello")
+        assert ''.join(c['response'] for c in stream) == "hi there"
+        assert stream.final['done']
+    assert fake.connections == 1
+    assert llm.stats()['requests'] == 3
+
+
+def test_speculative_streams_are_counted_apart(server):
+    fake = server(reply="hi there", token_delay=0.0)
+    llm = OllamaClient(model='fake', host=fake.url)
+    list(llm.stream("hello", speculative=True))
+    stats = llm.stats()
+    assert stats['requests'] == 0
+    assert stats['speculative']['requests'] == 1
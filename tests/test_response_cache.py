@@ -0,0 +1,62 @@
+import response_cache
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock)
+    cache = ResponseCache(ttl=60)
+    cache.put("What is the capital of France?", 'gemma', None, "Paris.")
+    cache.put("how far is the moon", 'gemma', None, "About 384,000 km.", ttl=5)
+
+    clock.now += 30
+    assert cache.get("what is the capital of france", 'gemma') == "Paris."
+    assert not cache.has("how far is the moon", 'gemma')
+    assert cache.get("how far is the moon", 'gemma') is None
+
+    clock.now += 30
+    assert cache.get("What is the capital of France?", 'gemma') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['expirations']) == (0, 1, 2, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("one", 'gemma', None, "1")
+    cache.put("two", 'gemma', None, "2")
+    assert cache.get("one", 'gemma') == "1"  # "two" is now the oldest
+    cache.put("three", 'gemma', None, "3")
+
+    assert cache.get("two", 'gemma') is None
+    assert cache.get("one", 'gemma') == "1"
+    assert cache.get("three", 'gemma') == "3"
+    assert cache.stats()['evictions'] == 1
+
+
+def test_model_and_options_are_part_of_the_key():
+    cache = ResponseCache()
+    cache.put("hello", 'gemma', {'temperature': 0.2}, "Hi!")
+    assert cache.get("hello", 'gemma', {'temperature': 0.2}) == "Hi!"
+    assert cache.get("hello", 'gemma') is None
+    assert cache.get("hello", 'llama', {'temperature': 0.2}) is None
+
+
+def test_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = ResponseCache(max_entries=2, path=path)
+    cache.put("one", 'gemma', None, "1")
+    cache.put("two", 'gemma', None, "2")
+    cache.put("three", 'gemma', None, "3")
+
+    restored = ResponseCache(max_entries=2, path=path)
+    assert restored.get("one", 'gemma') is None
+    assert restored.get("two", 'gemma') == "2"
+    assert restored.get("three", 'gemma') == "3"
@@ -0,0 +1,84 @@
+import queue
+import time
+
+from scheduler import Scheduler
+
+
+def collect(path=None):
+    fired = queue.Queue()
+    return Scheduler(lambda entry: fired.put(entry), path), fired
+
+
+def drain(fired, count, timeout=2.0):
+    return [fired.get(timeout=timeout) for _ in range(count)]
+
+
+def test_fires_in_due_order_and_skips_cancelled():
+    scheduler, fired = collect()
+    now = time.time()
+    scheduler.add('reminder', "third", "", now + 0.15)
+    scheduler.add('alarm', "first", "", now + 0.05)
+    scheduler.add('alarm', "second", "", now + 0.1)
+    dropped = scheduler.add('alarm', "dropped", "", now + 0.08)
+    assert scheduler.cancel(dropped.id)
+    assert not scheduler.cancel(dropped.id)
+    assert [e.text for e in scheduler.pending()] == ["first", "second", "third"]
+    scheduler.start()
+    try:
+        assert [e.text for e in drain(fired, 3)] == ["first", "second", "third"]
+        assert fired.empty()
+        assert scheduler.pending() == []
+        assert scheduler.last_fired.text == "third"
+    finally:
+        scheduler.stop()
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'schedule.db')
+    scheduler, _ = collect(path)
+    now = time.time()
+    missed = scheduler.add('alarm', "", "7 am", now - 60)
+    later = scheduler.add('reminder', "water the plants", "6 pm", now + 3600)
+    cancelled = scheduler.add('alarm', "", "8 am", now + 7200)
+    scheduler.cancel(cancelled.id)
+
+    restored, fired = collect(path)
+    assert [(e.id, e.label) for e in restored.pending()] == [(missed.id, "7 am"), (later.id, "6 pm")]
+    added = restored.add('alarm', "", "9 am", now + 9000)
+    assert added.id not in (missed.id, later.id)
+    restored.start()
+    try:
+        assert drain(fired, 1)[0].id == missed.id  # came due while not running
+    finally:
+        restored.stop()
+
+    assert [e.id for e in collect(path)[0].pending()] == [later.id, added.id]
+
+
+def test_repeating_entry_skips_missed_occurrences(tmp_path):
+    path = str(tmp_path / 'schedule.db')
+    scheduler, fired = collect(path)
+    now = time.time()
+    daily = scheduler.add('alarm', "", "7 am", now - 2.5 * 86400, repeat=86400)
+    scheduler.start()
+    try:
+        assert drain(fired, 1)[0].id == daily.id
+        time.sleep(0.1)
+        assert fired.empty()  # one ring, not one per missed day
+    finally:
+        scheduler.stop()
+    (stored,) = collect(path)[0].pending()
+    assert now < stored.due <= now + 86400
+
+
+def test_snooze_rearms_the_entry_that_fired():
+    scheduler, fired = collect()
+    scheduler.add('alarm', "", "now", time.time())
+    scheduler.start()
+    try:
+        entry = drain(fired, 1)[0]
+        snoozed = scheduler.snooze(entry.id, 0.05)
+        assert snoozed.id != entry.id
+        assert drain(fired, 1)[0].id == snoozed.id
+    finally:
+        scheduler.stop()
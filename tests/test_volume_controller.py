@@ -0,0 +1,95 @@
+import subprocess
+import sys
+
+import pytest
+
+from volume_backends import MemoryBackend, own_pids
+from volume_controller import VolumeController
+
+
+class DuckRecorder(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.ducks = []
+
+    def duck_others(self, factor):
+        self.ducks.append(factor)
+        return super().duck_others(factor)
+
+    def restore_others(self):
+        self.ducks.append(None)
+        super().restore_others()
+
+
+@pytest.fixture
+def controller():
+    controllers = []
+
+    def make(backend, **kwargs):
+        controller = VolumeController(backend, **kwargs)
+        controller.warm_up()
+        controllers.append(controller)
+        return controller
+
+    yield make
+    for controller in controllers:
+        controller.stop()
+
+
+def test_bursts_are_coalesced_into_one_write(controller):
+    backend = MemoryBackend(level=0.5, latency=0.01)
+    volume = controller(backend, coalesce_ms=100)
+    for _ in range(3):
+        volume.increase_volume()
+    assert volume.get_volume() == 0.8
+    assert backend.writes == 0  # the device has not been touched yet
+    assert volume.flush(timeout=2)
+    assert (backend.level, backend.writes) == (0.8, 1)
+    assert volume.stats()['coalesced'] == 2
+
+
+def test_writes_only_what_changed(controller):
+    backend = MemoryBackend(level=0.5)
+    volume = controller(backend, coalesce_ms=0)
+    volume.set_volume(0.5)
+    volume.mute()
+    assert volume.flush(timeout=2)
+    assert (backend.writes, backend.level, backend.muted) == (1, 0.5, True)
+
+
+def test_nested_ducking_restores_after_the_last_unduck(controller):
+    backend = DuckRecorder()
+    volume = controller(backend, duck_factor=0.25)
+    volume.duck()
+    volume.duck()
+    assert volume.flush(timeout=2)
+    volume.unduck()
+    assert volume.flush(timeout=2)
+    assert backend.duck_factor == 0.25
+    volume.unduck()
+    volume.unduck()  # unbalanced calls do not go negative
+    assert volume.flush(timeout=2)
+    assert backend.ducks == [0.25, None]
+    volume.duck()
+    assert volume.flush(timeout=2)
+    assert backend.ducks == [0.25, None, 0.25]
+
+
+def test_external_changes_update_the_cache(controller):
+    backend = MemoryBackend(level=0.5)
+    volume = controller(backend)
+    seen = []
+    volume.subscribe(lambda level, muted: seen.append((level, muted)))
+    backend.change_externally(0.2, muted=True)
+    assert volume.get_volume() == 0.2
+    assert seen == [(0.2, True)]
+    assert backend.writes == 0
+
+
+def test_own_pids_include_phrase_players():
+    player = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+    try:
+        assert player.pid in own_pids()
+    finally:
+        player.kill()
+        player.wait()
@@ -0,0 +1,190 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from metrics import metrics
+from phrase_cache import PhraseCache, voice_key
+from startup import profile
+
+# Lower numbers are spoken first
+PRIORITY_ALARM = 0
+PRIORITY_NORMAL = 5
+PRIORITY_CHAT = 10
+
+
+class TTSWorker:
+    """
+    Owns the pyttsx3 engine on a single thread and speaks queued text in
+    priority order, so alarms jump ahead of chit-chat and no other thread ever
+    touches the engine. say() returns immediately with a Future that resolves
+    to True once the text has been spoken, or False if it was interrupted.
+    interrupt() stops the current utterance (barge-in) and drops queued
+    chit-chat; alarms and other higher-priority items are kept.
+
+    With a PhraseCache, fixed and templated phrases are played from
+    pre-rendered audio, and the cache's pending phrases are rendered one at a
+    time while there is nothing to say.
+    """
+
+    def __init__(self, rate: int = 150, volume: float = 1.0, engine_factory: Optional[Callable] = None,
+                 phrase_cache: Optional[PhraseCache] = None):
+        self.rate = rate
+        self.volume = volume
+        self.engine_factory = engine_factory  # pyttsx3.init unless given (e.g. a fake engine)
+        self.phrase_cache = phrase_cache
+        self.voice_key = None  # voice, rate and volume the cached audio was rendered with
+        self.render_idle = 1.0  # a render holds up speech queued meanwhile, so wait for a lull
+        self.last_spoken = 0.0
+        self.on_speaking: Optional[Callable[[bool], None]] = None  # True before speech starts, False once nothing is left to say
+        self.in_speech = False
+        self.queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.interrupted = threading.Event()
+        self.speaking = False
+        self.engine = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='tts', daemon=True)
+        self.thread.start()
+
+    def say(self, text: str, priority: int = PRIORITY_NORMAL) -> Future:
+        future = Future()
+        self.queue.put((priority, next(self.sequence), text, future))
+        return future
+
+    def speak_now(self, text: str, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> bool:
+        """Blocking say()"""
+        return self.say(text, priority).result(timeout)
+
+    @property
+    def busy(self) -> bool:
+        return self.speaking or not self.queue.empty()
+
+    def wait_idle(self, timeout: Optional[float] = None):
+        """Block until the queue has drained (or timeout)"""
+        marker = self.say(None, priority=PRIORITY_CHAT + 1)
+        try:
+            marker.result(timeout)
+        except Exception:
+            pass
+
+    def interrupt(self, keep_priority: int = PRIORITY_NORMAL):
+        """Stop the current utterance and drop queued items less urgent than keep_priority"""
+        kept = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            priority, _, text, future = item
+            if priority <= keep_priority or text is None:
+                kept.append(item)
+            else:
+                future.cancel()
+            self.queue.task_done()
+        for item in kept:
+            self.queue.put(item)
+        if self.speaking:
+            self.interrupted.set()
+
+    def stop(self):
+        self.interrupt(keep_priority=-1)
+        self.queue.put((-1, next(self.sequence), None, None))
+
+    def _set_in_speech(self, speaking: bool):
+        if speaking == self.in_speech:
+            return
+        self.in_speech = speaking
+        if self.on_speaking is not None:
+            try:
+                self.on_speaking(speaking)
+            except Exception as e:
+                print(f"Error in speech callback: {e}")
+
+    def _speech_queued(self) -> bool:
+        with self.queue.mutex:
+            return any(item[2] is not None for item in self.queue.queue)
+
+    def _on_word(self, name, location, length):
+        # pyttsx3 only allows stopping from inside its own callbacks
+        if self.interrupted.is_set() and self.engine is not None:
+            self.engine.stop()
+
+    def _next_item(self):
+        """Next queued item; once nothing has been said for render_idle seconds, render pending phrases meanwhile"""
+        while True:
+            if self.phrase_cache is None or self.engine is None or not self.phrase_cache.pending:
+                return self.queue.get()
+            wait = self.last_spoken + self.render_idle - time.perf_counter()
+            try:
+                return self.queue.get(timeout=wait) if wait > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                if wait > 0:
+                    continue
+            text = self.phrase_cache.next_render(self.voice_key)
+            if text is not None:
+                self.phrase_cache.render(text, self.voice_key, self.engine)
+
+    def _speak(self, text: str):
+        path = None
+        if self.phrase_cache is not None and self.engine is not None:
+            path = self.phrase_cache.lookup(text, self.voice_key)
+        if path is not None:
+            print(f"Assistant: {text}")
+            self.phrase_cache.play(path, self.interrupted)
+        elif self.engine:
+            print(f"Assistant: {text}")
+            self.engine.say(text)
+            self.engine.runAndWait()
+        else:
+            print(f"Assistant (No TTS Engine): {text}")
+
+    def _run(self):
+        try:
+            # Imported and initialized here, so startup never waits for the speech engine
+            with profile.step('init', 'pyttsx3 engine'):
+                if self.engine_factory is None:
+                    import pyttsx3
+                    self.engine_factory = pyttsx3.init
+                self.engine = self.engine_factory()
+                self.engine.setProperty('rate', self.rate)
+                self.engine.setProperty('volume', self.volume)
+                self.engine.connect('started-word', self._on_word)
+                self.voice_key = voice_key(self.engine, self.rate, self.volume)
+        except Exception as e:
+            print(f"Error initializing pyttsx3 engine: {e}")
+            self.engine = None
+        self.ready.set()
+
+        while True:
+            priority, _, text, future = self._next_item()
+            try:
+                if future is None:
+                    self._set_in_speech(False)
+                    return  # stop()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if text is None:
+                    future.set_result(True)  # wait_idle() marker
+                    continue
+                self.interrupted.clear()
+                self._set_in_speech(True)
+                self.speaking = True
+                started = time.perf_counter()
+                try:
+                    self._speak(text)
+                except Exception as e:
+                    print(f"Speech error: {e}")
+                finally:
+                    self.speaking = False
+                    self.last_spoken = time.perf_counter()
+                metrics.observe('tts_seconds', time.perf_counter() - started, priority=priority)
+                if self.interrupted.is_set():
+                    metrics.inc('tts_interrupts_total')
+                if not self._speech_queued():
+                    self._set_in_speech(False)
+                future.set_result(not self.interrupted.is_set())
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,367 @@
+"""
+All Tk state lives on one long-lived UI thread. Other threads never touch Tk;
+they put commands (show, hide, status, call) on a queue that the Tk loop
+drains every few milliseconds.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FrameCache:
+    """
+    Decodes an animated GIF once into flattened RGB frames, optionally
+    downscaled and palette-reduced, and stores them on disk as a single PNG
+    strip plus a JSON index. The cache key covers the source file's size and
+    mtime and the processing options, so editing the GIF or changing scale or
+    colors rebuilds it. Later starts load one PNG instead of decoding and
+    compositing every GIF frame.
+    """
+
+    def __init__(self, path: str, cache_dir: str = ".frame_cache", scale: float = 1.0,
+                 colors: int = 0, background=(255, 255, 255)):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.scale = scale
+        self.colors = colors  # 0 keeps full colour
+        self.background = background
+        self.from_cache = False
+
+    def _key(self) -> str:
+        stat = os.stat(self.path)
+        payload = f"{os.path.abspath(self.path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.scale}|{self.colors}|{self.background}"
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def load(self) -> List["Image.Image"]:
+        key = self._key()
+        strip_path = os.path.join(self.cache_dir, f"{key}.png")
+        index_path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            frames = self._read(strip_path, index_path)
+            self.from_cache = True
+            return frames
+        except (OSError, ValueError, KeyError):
+            pass
+        frames = self._decode()
+        self.from_cache = False
+        try:
+            self._write(frames, strip_path, index_path)
+        except OSError as e:
+            print(f"Error writing frame cache: {e}")
+        return frames
+
+    def _decode(self) -> List["Image.Image"]:
+        from PIL import Image, ImageSequence
+
+        frames = []
+        with Image.open(self.path) as gif:
+            for frame in ImageSequence.Iterator(gif):
+                rgba = frame.convert('RGBA')
+                flat = Image.new('RGBA', rgba.size, tuple(self.background) + (255,))
+                flat.alpha_composite(rgba)
+                flat = flat.convert('RGB')
+                if self.scale != 1.0:
+                    size = (max(1, round(flat.width * self.scale)), max(1, round(flat.height * self.scale)))
+                    flat = flat.resize(size, Image.LANCZOS)
+                frames.append(flat)
+        if self.colors and frames:
+            # One palette for the whole animation, so frames don't flicker
+            strip = self._strip(frames).quantize(self.colors)
+            frames = self._split(strip, len(frames))
+        return frames
+
+    def _strip(self, frames: List["Image.Image"]) -> "Image.Image":
+        from PIL import Image
+
+        width, height = frames[0].size
+        strip = Image.new(frames[0].mode, (width * len(frames), height))
+        if frames[0].mode == 'P':
+            strip.putpalette(frames[0].getpalette())
+        for i, frame in enumerate(frames):
+            strip.paste(frame, (i * width, 0))
+        return strip
+
+    @staticmethod
+    def _split(strip: "Image.Image", count: int) -> List["Image.Image"]:
+        width = strip.width // count
+        return [strip.crop((i * width, 0, (i + 1) * width, strip.height)) for i in range(count)]
+
+    def _read(self, strip_path: str, index_path: str) -> List["Image.Image"]:
+        from PIL import Image
+
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        with Image.open(strip_path) as strip:
+            strip.load()
+            return self._split(strip, index['count'])
+
+    def _write(self, frames: List["Image.Image"], strip_path: str, index_path: str):
+        if not frames:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = strip_path + '.tmp'
+        self._strip(frames).save(tmp_path, format='PNG')
+        os.replace(tmp_path, strip_path)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.path, 'count': len(frames), 'size': list(frames[0].size)}, f)
+        os.replace(tmp_path, index_path)
+
+
+class HeadlessUI:
+    """Stands in for UIThread where there is no screen, e.g. server sessions"""
+
+    def start(self):
+        return self
+
+    def show(self):
+        pass
+
+    def hide(self):
+        pass
+
+    def preload(self):
+        pass
+
+    def set_status(self, text: str):
+        pass
+
+    def call(self, func: Callable, *args):
+        pass
+
+    def stop(self, timeout: float = 2.0):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class UIThread:
+    """
+    Runs the Tk root and the animated overlay on a single thread, started on
+    first use. show(), hide(), set_status() and call() can be used from any
+    thread. Frames come from a FrameCache; the first frame is displayed as
+    soon as it is converted and the rest are converted in the background of
+    the Tk loop. Time-to-first-frame and memory use are recorded in stats().
+    """
+
+    def __init__(self, gif_path: str = "voice.gif", frame_ms: int = 100, scale: float = 1.0,
+                 colors: int = 0, cache_dir: str = ".frame_cache", poll_ms: int = 20):
+        self.frame_cache = FrameCache(gif_path, cache_dir, scale, colors)
+        self.frame_ms = frame_ms
+        self.poll_ms = poll_ms
+        self.commands: "queue.Queue" = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.visible = False
+        self.failed = False  # no display: commands are ignored
+        self.first_show_at = None
+        self._stats: Dict[str, Any] = {}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='ui', daemon=True)
+                self.thread.start()
+        return self
+
+    def _post(self, *command):
+        self.start()
+        if self.failed:
+            return
+        self.commands.put(command)
+
+    def show(self):
+        if self.first_show_at is None:
+            self.first_show_at = time.perf_counter()
+        self._post('show')
+
+    def hide(self):
+        if self.thread is not None and not self.failed:
+            self.commands.put(('hide',))
+
+    def preload(self):
+        """Start the UI thread and load the frames without showing the overlay"""
+        self._post('preload')
+
+    def set_status(self, text: str):
+        """Short status line under the animation, e.g. 'Thinking...'"""
+        self._post('status', text)
+
+    def call(self, func: Callable, *args):
+        """Run func(root, *args) on the UI thread, e.g. to open another window"""
+        self._post('call', func, args)
+
+    def stop(self, timeout: float = 2.0):
+        if self.thread is not None and not self.failed:
+            self.commands.put(('stop',))
+            self.thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+    # Everything below runs on the UI thread
+
+    def _run(self):
+        try:
+            import tkinter as tk
+            self.tk = tk
+            self.root = tk.Tk()
+        except Exception as e:
+            print(f"Error starting UI thread: {e}")
+            self.failed = True
+            self.ready.set()
+            self._discard_commands()
+            return
+        root = self.root
+        root.withdraw()
+        root.overrideredirect(True)
+        root.config(bg='white')
+        try:
+            root.wm_attributes("-topmost", True)
+            root.wm_attributes("-transparentcolor", "white")
+        except tk.TclError:
+            pass  # not supported by every window manager
+        self.label = tk.Label(root, bg='white')
+        self.label.pack()
+        self.status_label = tk.Label(root, bg='white', font=("Arial", 10))
+        self.photos = []
+        self.pending_frames = []
+        self.frame_index = 0
+        self.animating = False
+        self.ready.set()
+        root.after(self.poll_ms, self._drain)
+        try:
+            root.mainloop()
+        finally:
+            self.photos = []
+            self.pending_frames = []
+
+    def _discard_commands(self):
+        while True:
+            try:
+                self.commands.get_nowait()
+            except queue.Empty:
+                return
+
+    def _drain(self):
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                name = command[0]
+                if name == 'show':
+                    self._show()
+                elif name == 'preload':
+                    self._prepare()
+                elif name == 'hide':
+                    self._hide()
+                elif name == 'status':
+                    self._set_status(command[1])
+                elif name == 'call':
+                    command[1](self.root, *command[2])
+                elif name == 'stop':
+                    self.root.destroy()
+                    return
+            except Exception as e:
+                print(f"UI error: {e}")
+        self.root.after(self.poll_ms, self._drain)
+
+    def _load_frames(self):
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            frames = self.frame_cache.load()
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+        self._stats['load_seconds'] = round(time.perf_counter() - start, 4)
+        self._stats['from_disk_cache'] = self.frame_cache.from_cache
+        self._stats['load_peak_python_bytes'] = peak
+        self._stats['frames'] = len(frames)
+        if frames:
+            width, height = frames[0].size
+            # Tk keeps 4 bytes per pixel for every PhotoImage
+            self._stats['frame_bytes'] = 4 * width * height * len(frames)
+            self._stats['frame_size'] = [width, height]
+        return frames
+
+    def _prepare(self) -> bool:
+        if not self.photos:
+            frames = self._load_frames()
+            if not frames:
+                return False
+            self.pending_frames = frames[1:]
+            self.photos.append(self._photo(frames[0]))
+            self._place(*frames[0].size)
+            if self.pending_frames:
+                self.root.after(0, self._convert_pending)
+        return True
+
+    def _show(self):
+        if not self._prepare():
+            return
+        self.root.deiconify()
+        self.visible = True
+        if not self.animating:
+            self.animating = True
+            self._animate()
+        if 'time_to_first_frame' not in self._stats and self.first_show_at is not None:
+            self.root.update_idletasks()
+            elapsed = time.perf_counter() - self.first_show_at
+            self._stats['time_to_first_frame'] = round(elapsed, 4)
+            print(f"Overlay first frame after {elapsed * 1000:.0f} ms")
+
+    def _photo(self, frame):
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(frame, master=self.root)
+
+    def _convert_pending(self, batch: int = 8):
+        """Convert a few frames per Tk tick, so commands keep being handled"""
+        for frame in self.pending_frames[:batch]:
+            self.photos.append(self._photo(frame))
+        # Drop the PIL copies once Tk holds the pixels
+        self.pending_frames = self.pending_frames[batch:]
+        if self.pending_frames:
+            self.root.after(1, self._convert_pending)
+
+    def _place(self, width: int, height: int):
+        self.root.update_idletasks()
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        x = (screen_width - width) // 2
+        y = screen_height - height - 50
+        self.root.geometry(f"+{x}+{y}")
+
+    def _hide(self):
+        self.visible = False
+        self.root.withdraw()
+
+    def _set_status(self, text: str):
+        self.status_label.config(text=text)
+        if text:
+            self.status_label.pack()
+        else:
+            self.status_label.pack_forget()
+
+    def _animate(self):
+        if not self.visible or not self.photos:
+            self.animating = False
+            return
+        self.frame_index %= len(self.photos)
+        self.label.config(image=self.photos[self.frame_index])
+        self.frame_index += 1
+        self.root.after(self.frame_ms, self._animate)
@@ -1,61 +1,134 @@
 from volume_controller import VolumeController
 from command_executor import CommandExecutor
-import speech_recognition as sr
 import time
-import threading
-import tkinter as tk
-from PIL import Image, ImageTk
-import ollama
-import pyttsx3
 import re
+import contextlib
+import threading
+from response_stream import GenerationCancelled, SentenceSplitter, speak_stream
+from response_cache import ResponseCache
+from scheduler import Scheduler, ScheduledEntry
+from asr_backends import RecognizerManager
+from tts_worker import TTSWorker, PRIORITY_ALARM, PRIORITY_CHAT, PRIORITY_NORMAL
+from ui_thread import UIThread
+from startup import lazy_import, profile
+from ollama_client import OllamaClient
+from conversation import ConversationContext, is_follow_up
+from metrics import metrics
+from speculation import SpeculativeReply, likely_conversational
+
+sr = lazy_import('speech_recognition')
+
+
 class VoiceAssistant:
-    def __init__(self, volume_controller: VolumeController, command_executor: CommandExecutor):
-        self.recognizer = sr.Recognizer()
+    def __init__(self, volume_controller: VolumeController, command_executor: CommandExecutor,
+                 response_cache: ResponseCache = None, schedule_path: str = None,
+                 llm: OllamaClient = None, tts: TTSWorker = None, asr: RecognizerManager = None, ui: UIThread = None):
+        self._recognizer = None  # for the microphone; speech_recognition loads on first use or warm-up
+        self.asr = asr if asr is not None else RecognizerManager.default()
         self.volume_controller = volume_controller
         self.executor = command_executor
         self.wake_word = "maya"
         self.is_active = False
         self.last_command_time = time.time()
         self.sleep_timeout = 300  # 5 minutes timeout before going back to sleep
-        self.gif_root = None
-        self.gif_thread = None
-        self.gif_active = False
-        self.conversation_history = []  
-        self.max_history = 1  
-        self.alarms = []  
-        self.reminders = []  
+        self.ui = ui if ui is not None else UIThread("voice.gif")  # Owns every Tk call; started on first show
+        self.conversation = ConversationContext(max_tokens=512)  # History sent to Gemma, within a token budget
+        self.scheduler = Scheduler(self._on_scheduled, path=schedule_path)  # Single thread for all alarms and reminders
         self.last_joke = None  
-        
-        try:
-            self.engine = pyttsx3.init()
-            self.engine.setProperty('rate', 150)
-            self.engine.setProperty('volume', 1.0)
-        except Exception as e:
-            print(f"Error initializing pyttsx3 engine: {e}")
-            self.engine = None
+        self.stream_responses = True  # Speak sentences as soon as Gemma produces them
+        self.max_sentences = 3
+        self.speech_output = None  # When set, speak() hands text to it instead of using the engine
+        self.continuous_capture = None  # audio_capture.ContinuousCapture, replaces per-phrase microphone listening
+        self.wake_spotter = None  # wake_word.WakeWordSpotter, checks for the wake word locally while asleep
+        self.model = 'gemma:2b'
+        self.generate_options = {'temperature': 0.5, 'max_tokens': 100}  # Reduced temperature and limited tokens for faster, shorter responses
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
+        self.barge_in = False  # Keep listening while speaking; new speech interrupts the reply
+        self.tts = tts if tts is not None else TTSWorker(rate=150, volume=1.0)  # Only this worker's thread touches pyttsx3
+        self.duck_during_speech = True  # Lower other applications while Maya talks
+        self.speculative = False  # Start Gemma alongside routing for utterances that look conversational
+        self.speculation_stats = {'used': 0, 'discarded': 0, 'saved_seconds': 0.0, 'wasted_seconds': 0.0}
+        self.tts.on_speaking = self._on_speaking
+        # Shared, pooled Ollama client; the model stays loaded for as long as Maya stays awake
+        self.llm = llm if llm is not None else OllamaClient(model=self.model)
+        self.llm.keep_alive = self.sleep_timeout
+
+    def _build_prompt(self, prompt):
+        """Return (prompt, full_prompt, context) with the joke and conversation context applied"""
+        # Instruction for concise answers
+        instruction = "Provide a concise and clear answer in 2-3 sentences."
+
+        # If prompt is to get another joke, add context to avoid repetition
+        if prompt.strip().lower() in ['another', 'another joke', 'tell me another joke']:
+            if self.last_joke:
+                prompt = f"Tell me a new joke different from this one: {self.last_joke}"
+            else:
+                prompt = "Tell me a joke"
+
+        full_prompt, context = self.conversation.build(instruction, prompt)
+        return prompt, full_prompt, context
+
+    def _is_cacheable(self, prompt):
+        """Jokes are expected to differ every time, so they don't use the cache"""
+        prompt_lower = prompt.strip().lower()
+        if prompt_lower in ['another', 'another joke', 'tell me another joke']:
+            return False
+        return 'joke' not in prompt_lower
+
+    def _cache_prompt(self, prompt):
+        """
+        What a reply is cached under. A follow-up question depends on the
+        conversation so far, so its key carries a digest of the history;
+        anything else is cached on its own, whatever came before.
+        """
+        if self.conversation and is_follow_up(prompt):
+            return f"{prompt}\n[conversation {self.conversation.digest()}]"
+        return prompt
+
+    def _cached_reply(self, prompt):
+        if self.response_cache is None or not self._is_cacheable(prompt):
+            return None
+        reply = self.response_cache.get(self._cache_prompt(prompt), self.model, self.generate_options)
+        metrics.inc('response_cache_total', result='miss' if reply is None else 'hit')
+        return reply
+
+    def _cache_reply(self, prompt, reply):
+        if self.response_cache is not None and reply and self._is_cacheable(prompt):
+            self.response_cache.put(self._cache_prompt(prompt), self.model, self.generate_options, reply)
+
+    def _remember_reply(self, prompt, reply, context=None):
+        # context: Ollama's token state after a completed generation, reused for the next turn
+        self.conversation.add(prompt, reply, context)
+
+        # Update last joke if the prompt was a joke request
+        if any(kw in prompt.lower() for kw in ['joke', 'another joke', 'new joke']):
+            self.last_joke = reply
+
+    def _canned_reply(self, prompt):
+        if prompt.strip().lower() in ["what is your name", "who are you"]:
+            return "My name is Maya, and I was created and developed by the VoxFusion team."
+        return None
 
     def get_gemma_response(self, prompt):
         """Get response from Gemma model through Ollama"""
-        if prompt.strip().lower() in ["what is your name", "who are you"]:
-            return "My name is Maya, and I was created and developed by the VoxFusion team."
+        canned = self._canned_reply(prompt)
+        if canned is not None:
+            return canned
+
+        cached = self._cached_reply(prompt)
+        if cached is not None:
+            self._remember_reply(prompt, cached)
+            return cached
 
         try:
-            # Instruction for concise answers
-            instruction = "Provide a concise and clear answer in 2-3 sentences."
-            
-            # If prompt is to get another joke, add context to avoid repetition
-            if prompt.strip().lower() in ['another', 'another joke', 'tell me another joke']:
-                if self.last_joke:
-                    prompt = f"Tell me a new joke different from this one: {self.last_joke}"
-                else:
-                    prompt = "Tell me a joke"
+            original_prompt = prompt
+            prompt, full_prompt, context = self._build_prompt(prompt)
             
-            full_prompt = f"{instruction}\nUser: {prompt}\nAssistant:"
-            
-            response = ollama.generate(
-                model='gemma:2b',
-                prompt=full_prompt,
-                options={'temperature': 0.5, 'max_tokens': 100}  # Reduced temperature and limited tokens for faster, shorter responses
+            response = self.llm.generate(
+                full_prompt,
+                options=self.generate_options,
+                model=self.model,
+                context=context
             )
             
             # Clean up the response
@@ -67,174 +140,254 @@ class VoiceAssistant:
             
             # Truncate reply to 2 or 3 sentences
             sentences = re.split(r'(?<=[.!?]) +', reply)
-            if len(sentences) > 3:
-                reply = ' '.join(sentences[:3])
-            
-            # Update conversation history
-            self.conversation_history.append({
-                'user': prompt,
-                'assistant': reply
-            })
-
-            # Update last joke if the prompt was a joke request
-            if any(kw in prompt.lower() for kw in ['joke', 'another joke', 'new joke']):
-                self.last_joke = reply
+            truncated = len(sentences) > self.max_sentences
+            if truncated:
+                reply = ' '.join(sentences[:self.max_sentences])
             
+            self._cache_reply(original_prompt, reply)
+            # A truncated reply no longer matches the model's context
+            self._remember_reply(prompt, reply, None if truncated else response.get('context'))
             return reply
         except Exception as e:
             print(f"Error getting Gemma response: {e}")
+            metrics.inc('llm_fallbacks_total')
             return "I'm sorry, I couldn't process that right now."
 
-    def show_gif(self):
-        if self.gif_root is not None:
-            try:
-                self.gif_root.deiconify()
-                self.gif_active = True
-                return
-            except:
-                self.gif_root = None
-
-        def run_gif():
-            self.gif_root = tk.Tk()
-            self.gif_root.overrideredirect(True)
-            self.gif_root.wm_attributes("-topmost", True)
-            self.gif_root.wm_attributes("-transparentcolor", "white")
-            self.gif_root.config(bg='white')
-
-            screen_width = self.gif_root.winfo_screenwidth()
-            screen_height = self.gif_root.winfo_screenheight()
+    def stream_gemma_response(self, prompt, on_sentence=None, speculation=None):
+        """
+        Stream the Gemma response and pass every finished sentence to
+        on_sentence (speak by default) while the rest is still generating.
+        The request is aborted server-side once max_sentences are spoken.
+        A speculation (see speculate()) is taken up instead of starting a new request.
+        """
+        on_sentence = on_sentence or (lambda sentence: self.speak(sentence, PRIORITY_CHAT))
+        canned = self._canned_reply(prompt)
+        if canned is not None:
+            on_sentence(canned)
+            return canned
+
+        cached = None if speculation is not None else self._cached_reply(prompt)
+        if cached is not None:
+            splitter = SentenceSplitter()
+            for sentence in splitter.feed(cached) + splitter.flush():
+                on_sentence(sentence)
+            self._remember_reply(prompt, cached)
+            return cached
+
+        spoken = []
+        try:
+            original_prompt = prompt
+            if speculation is not None:
+                prompt, chunks = speculation.prompt, speculation
+                self.speculation_stats['used'] += 1
+                self.speculation_stats['saved_seconds'] += speculation.use()
+            else:
+                prompt, full_prompt, context = self._build_prompt(prompt)
+
+                chunks = self.llm.stream(
+                    full_prompt,
+                    options=self.generate_options,
+                    model=self.model,
+                    context=context
+                )
+
+            def emit(sentence):
+                spoken.append(sentence)
+                on_sentence(sentence)
+
+            reply = speak_stream(chunks, emit, max_sentences=self.max_sentences)
+            self._cache_reply(original_prompt, reply)
+            # chunks.final is only set when the model finished rather than being cut off
+            final = chunks.final
+            self._remember_reply(prompt, reply, final.get('context') if final is not None else None)
+            return reply
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            print(f"Error streaming Gemma response: {e}")
+            metrics.inc('llm_fallbacks_total')
+            if not spoken:
+                reply = "I'm sorry, I couldn't process that right now."
+                on_sentence(reply)
+                return reply
+            return ' '.join(spoken)
 
-            gif = Image.open("voice.gif")
-            frames = []
-            try:
-                while True:
-                    frames.append(ImageTk.PhotoImage(gif.copy()))
-                    gif.seek(len(frames))
-            except EOFError:
-                pass
-
-            self.label = tk.Label(self.gif_root, bg='white')
-            self.label.pack()
-
-            x = (screen_width - gif.width) // 2
-            y = screen_height - gif.height - 50
-            self.gif_root.geometry(f"{gif.width}x{gif.height}+{x}+{y}")
-
-            def update(index=0):
-                if not hasattr(self, 'gif_root') or not self.gif_root.winfo_exists():
-                    return
-                if not self.gif_active:
-                    return
-                self.label.config(image=frames[index])
-                self.gif_root.after(100, update, (index + 1) % len(frames))
-
-            self.gif_active = True
-            update()
-            self.gif_root.mainloop()
-
-        self.gif_thread = threading.Thread(target=run_gif, daemon=True)
-        self.gif_thread.start()
+    def show_gif(self):
+        self.ui.show()
 
     def hide_gif(self):
-        self.gif_active = False
-        if self.gif_root is not None and self.gif_root.winfo_exists():
-            try:
-                self.gif_root.withdraw()
-            except:
-                pass
-
-    def speak(self, text):
-        if self.engine:
-            print(f"Assistant: {text}")
-            self.engine.say(text)
-            self.engine.runAndWait()
+        self.ui.hide()
+
+    def set_status(self, text: str):
+        self.ui.set_status(text)
+
+    def speak(self, text, priority=PRIORITY_NORMAL):
+        """Queue text for speech and return a Future; alarms use PRIORITY_ALARM to jump the queue"""
+        if self.speech_output is not None:
+            # Another component (e.g. the async pipeline) schedules speech
+            self.speech_output(text, priority)
+            return None
+        return self.tts.say(text, priority)
+
+    def say(self, text, priority=PRIORITY_NORMAL):
+        """Speak text and block until it has been spoken (or interrupted)"""
+        return self.tts.speak_now(text, priority)
+
+    def _on_speaking(self, speaking):
+        if not self.duck_during_speech:
+            return
+        if speaking:
+            self.volume_controller.duck()
+        else:
+            self.volume_controller.unduck()
+
+    def interrupt_speech(self):
+        """Barge-in: the user started talking, so stop the current reply"""
+        if self.tts.busy:
+            self.tts.interrupt()
+
+    @property
+    def recognizer(self) -> "sr.Recognizer":
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def open_audio_source(self):
+        """Microphone context for capture_audio; continuous capture owns its own input"""
+        if self.continuous_capture is not None:
+            return contextlib.nullcontext()
+        return sr.Microphone()
+
+    def capture_audio(self, source):
+        """Record one phrase from an open microphone; returns None if nobody spoke"""
+        start = time.perf_counter()
+        if self.continuous_capture is not None:
+            audio = self.continuous_capture.next_audio(timeout=3)
         else:
-            print(f"Assistant (No TTS Engine): {text}")
+            try:
+                self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
+                audio = self.recognizer.listen(source, timeout=3, phrase_time_limit=5)
+            except sr.WaitTimeoutError:
+                audio = None
+        if audio is not None:
+            metrics.observe('capture_seconds', time.perf_counter() - start)
+        return audio
+
+    def recognize(self, audio):
+        """Transcribe captured audio with the ASR backends (cloud first, offline as fallback)"""
+        result = self.asr.recognize(audio)
+        if result is None:
+            return None
+        print(f"You said ({result.backend}, {result.latency:.2f}s): {result.text}")
+        return result.text
+
+    def transcribe(self, audio):
+        """
+        While asleep with a local wake word spotter, only the spotter sees the
+        audio; cloud recognition starts once the wake word has been heard.
+        """
+        if not self.is_active and self.wake_spotter is not None:
+            return self.wake_word if self.wake_spotter.detect_audio(audio) else None
+        return self.recognize(audio)
 
     def listen(self):
         """Continuous listening with silent operation when not active"""
-        with sr.Microphone() as source:
+        with self.open_audio_source() as source:
             print("Listening... (silent mode)")
             while True:
                 try:
-                    self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                    audio = self.recognizer.listen(source, timeout=3, phrase_time_limit=5)
-                    
-                    try:
-                        command = self.recognizer.recognize_google(audio).lower()
-                        print(f"You said: {command}")
-                        return command
-                    except sr.UnknownValueError:
-                        return None
-                    except sr.RequestError:
-                        try:
-                            command = self.recognizer.recognize_sphinx(audio).lower()
-                            print(f"You said (offline): {command}")
-                            return command
-                        except sr.UnknownValueError:
-                            return None
-
-                except sr.WaitTimeoutError:
-                    continue
+                    audio = self.capture_audio(source)
+                    if audio is None:
+                        continue
+                    return self.transcribe(audio)
                 except Exception as e:
                     print(f"Listening error: {e}")
                     return None
 
-    def set_alarm(self, alarm_time_str: str):
+    @property
+    def alarms(self):
+        return self.scheduler.pending('alarm')
+
+    @property
+    def reminders(self):
+        return self.scheduler.pending('reminder')
+
+    def _schedule(self, kind: str, text: str, time_str: str, repeat: bool = False):
+        """Add an alarm or reminder to the scheduler; returns None if the time is too close"""
+        due = time.mktime(self.parse_time(time_str))
+        if due - time.time() < 1:
+            self.speak("The specified time is in the past or too close. Please specify a future time.")
+            return None
+        return self.scheduler.add(kind, text, time_str, due, repeat=24 * 3600 if repeat else 0)
+
+    def set_alarm(self, alarm_time_str: str, repeat: bool = False):
         """
         Set an alarm for the specified time string in format HH:MM (24-hour or 12-hour with am/pm).
+        A repeating alarm rings at that time every day.
         """
         try:
-            alarm_time = self.parse_time(alarm_time_str)
-            now = time.localtime()
-            alarm_seconds = alarm_time.tm_hour * 3600 + alarm_time.tm_min * 60
-            now_seconds = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
-            delay = alarm_seconds - now_seconds
-            if delay < 0:
-                delay += 24 * 3600  # Alarm for next day
-
-            if delay < 1:
-                self.speak("The specified time is in the past or too close. Please specify a future time.")
-                return
-
-            timer = threading.Timer(delay, self.alarm_triggered)
-            timer.daemon = True
-            timer.start()
-            self.alarms.append(timer)
-            self.speak(f"Alarm set for {alarm_time_str}")
+            if self._schedule('alarm', "Alarm ringing!", alarm_time_str, repeat):
+                self.speak(f"Alarm set for {alarm_time_str}{' every day' if repeat else ''}")
         except Exception as e:
             self.speak(f"Sorry, I couldn't set the alarm for {alarm_time_str}")
 
     def alarm_triggered(self):
-        self.speak("Alarm ringing!")
+        self.speak("Alarm ringing!", PRIORITY_ALARM)
 
-    def set_reminder(self, reminder_text: str, reminder_time_str: str):
+    def set_reminder(self, reminder_text: str, reminder_time_str: str, repeat: bool = False):
         """
         Set a reminder with text and time string.
         """
         try:
-            reminder_time = self.parse_time(reminder_time_str)
-            now = time.localtime()
-            reminder_seconds = reminder_time.tm_hour * 3600 + reminder_time.tm_min * 60
-            now_seconds = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
-            delay = reminder_seconds - now_seconds
-            if delay < 0:
-                delay += 24 * 3600  # Reminder for next day
-
-            if delay < 1:
-                self.speak("The specified time is in the past or too close. Please specify a future time.")
-                return
-
-            timer = threading.Timer(delay, self.reminder_triggered, args=(reminder_text,))
-            timer.daemon = True
-            timer.start()
-            self.reminders.append(timer)
-            self.speak(f"Reminder set for {reminder_time_str}: {reminder_text}")
+            if self._schedule('reminder', reminder_text, reminder_time_str, repeat):
+                self.speak(f"Reminder set for {reminder_time_str}: {reminder_text}")
         except Exception as e:
             self.speak(f"Sorry, I couldn't set the reminder for {reminder_time_str}")
 
     def reminder_triggered(self, reminder_text: str):
-        self.speak(f"Reminder: {reminder_text}")
+        self.speak(f"Reminder: {reminder_text}", PRIORITY_ALARM)
+
+    def _on_scheduled(self, entry: ScheduledEntry):
+        if entry.kind == 'alarm':
+            self.alarm_triggered()
+        else:
+            self.reminder_triggered(entry.text)
+
+    def cancel_scheduled(self, kind: str, time_str: str = ''):
+        """Cancel every pending alarm or reminder, or only those at the given time"""
+        entries = self.scheduler.pending(kind)
+        if time_str:
+            try:
+                wanted = time.strftime('%H:%M', self.parse_time(time_str))
+            except ValueError:
+                self.speak(f"Sorry, I didn't understand the time {time_str}")
+                return
+            entries = [e for e in entries if time.strftime('%H:%M', time.localtime(e.due)) == wanted]
+        if not entries:
+            self.speak(f"You have no {kind}s to cancel")
+            return
+        for entry in entries:
+            self.scheduler.cancel(entry.id)
+        self.speak(f"Cancelled {len(entries)} {kind}{'s' if len(entries) > 1 else ''}")
+
+    def list_scheduled(self, kind: str):
+        entries = self.scheduler.pending(kind)
+        if not entries:
+            self.speak(f"You have no {kind}s")
+            return
+        descriptions = []
+        for entry in entries[:5]:
+            when = time.strftime('%I:%M %p', time.localtime(entry.due)).lstrip('0')
+            descriptions.append(when if kind == 'alarm' else f"{entry.text} at {when}")
+        more = f", and {len(entries) - 5} more" if len(entries) > 5 else ""
+        self.speak(f"You have {len(entries)} {kind}{'s' if len(entries) > 1 else ''}: {', '.join(descriptions)}{more}")
+
+    def snooze(self, minutes: int = 5):
+        fired = self.scheduler.last_fired
+        if fired is None or self.scheduler.snooze(fired.id, minutes * 60) is None:
+            self.speak("There is nothing to snooze")
+            return
+        self.speak(f"Snoozed for {minutes} minutes")
 
     def parse_time(self, time_str: str):
         """
@@ -270,55 +423,176 @@ class VoiceAssistant:
 
         return parsed_time.timetuple()
 
+    def warm_up(self):
+        """
+        Load what the first commands need on a background thread, once the
+        activated prompt is out, instead of before it.
+        """
+        def run():
+            steps = [
+                ('ollama client', lambda: self.llm.client),
+                ('speech recognition', self.asr.warm_up),
+                ('volume control', self.volume_controller.warm_up),
+                ('command modules', self.executor.warm_up),
+                ('overlay frames', self.ui.preload),
+            ]
+            for name, func in steps:
+                with profile.step('warm-up', name):
+                    try:
+                        func()
+                    except Exception as e:
+                        print(f"Warm-up error ({name}): {e}")
+            profile.mark('warmed up')
+            if profile.enabled:
+                print(profile.report())
+                profile.stop_tracing()
+
+        threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+    def wake(self):
+        metrics.inc('wakes_total', source='spotter' if self.wake_spotter is not None else 'asr')
+        self.is_active = True
+        self.last_command_time = time.time()
+        # Load Gemma while the user is still saying what they want
+        self.llm.keep_alive = self.sleep_timeout
+        self.llm.preload()
+        self.show_gif()
+        self.speak("Yes, how can I help you?")
+
+    def go_to_sleep(self, message: str):
+        self.is_active = False
+        self.hide_gif()
+        self.speak(message)
+        print(f"Conversation: {self.conversation.stats()}")
+        if self.speculative:
+            print(f"Speculative replies: {self.speculation_stats}")
+        self.conversation.clear()
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+        print(f"Ollama: {self.llm.stats()}")
+
+    def sleep_due(self) -> bool:
+        return self.is_active and time.time() - self.last_command_time > self.sleep_timeout
+
+    def is_exit_command(self, command: str) -> bool:
+        return command.lower() in ['exit', 'quit', 'bye', 'stop', 'go to sleep']
+
+    def begin_turn(self, command: str):
+        """Bookkeeping shared by every turn handled while awake"""
+        self.last_command_time = time.time()
+
+        if command.strip().lower() not in ['another', 'another joke', 'tell me another joke']:
+            self.last_joke = None
+
+    def speculate(self, command: str):
+        """
+        In speculative mode, start streaming Gemma's answer before routing when
+        the utterance looks conversational. Returns a SpeculativeReply for
+        respond() to take up, or None.
+        """
+        if not (self.speculative and self.stream_responses and likely_conversational(command)):
+            return None
+        if self._canned_reply(command) is not None:
+            return None
+        if (self.response_cache is not None and self._is_cacheable(command)
+                and self.response_cache.has(self._cache_prompt(command), self.model, self.generate_options)):
+            return None
+        try:
+            prompt, full_prompt, context = self._build_prompt(command)
+            chunks = self.llm.stream(full_prompt, options=self.generate_options, model=self.model, context=context,
+                                     speculative=True)
+            return SpeculativeReply(chunks, prompt)
+        except Exception as e:
+            print(f"Error starting speculative response: {e}")
+            return None
+
+    def discard_speculation(self, speculation):
+        self.speculation_stats['discarded'] += 1
+        self.speculation_stats['wasted_seconds'] += speculation.discard()
+
+    def respond(self, command: str, speculation=None):
+        """Answer a conversational (non-command) utterance with Gemma"""
+        self.set_status("Thinking...")
+        try:
+            if self.stream_responses:
+                self.stream_gemma_response(command, speculation=speculation)
+            else:
+                response = self.get_gemma_response(command)
+                self.speak(response, PRIORITY_CHAT)
+        finally:
+            self.set_status("")
+
+    def handle_command(self, command: str):
+        """Act on one recognized utterance: the wake word, going to sleep, a command or a question"""
+        if not self.is_active and self.wake_word in command:
+            self.wake()
+            return
+
+        if self.is_active:
+            if self.is_exit_command(command):
+                self.go_to_sleep("Goodbye!")
+                return
+
+            # Start Gemma early if this looks like a question; routing may still claim it
+            speculation = self.speculate(command)
+            self.begin_turn(command)
+
+            # First try to execute as a command
+            try:
+                command_executed = self.executor.try_execute_command(command, self)
+            except BaseException:
+                if speculation is not None:
+                    self.discard_speculation(speculation)
+                raise
+
+            # If not a command, use Gemma for conversational response
+            if not command_executed:
+                self.respond(command, speculation)
+            elif speculation is not None:
+                self.discard_speculation(speculation)
+
     def run(self):
         self.speak(f"Voice Assistant activated. Say '{self.wake_word}' to wake me up.")
+        self.scheduler.start()
+        profile.mark('ready')
+        self.warm_up()
         while True:
             try:
+                if not self.barge_in:
+                    # Don't let the microphone pick up Maya's own voice
+                    self.tts.wait_idle()
                 command = self.listen()
 
                 if not command:
-                    if self.is_active and time.time() - self.last_command_time > self.sleep_timeout:
-                        self.is_active = False
-                        self.hide_gif()
-                        self.speak("Going back to sleep. Say 'alexa' to wake me up.")
-                        self.conversation_history = []
+                    if self.sleep_due():
+                        self.go_to_sleep(f"Going back to sleep. Say '{self.wake_word}' to wake me up.")
                     continue
 
-                if not self.is_active and self.wake_word in command:
-                    self.is_active = True
-                    self.last_command_time = time.time()
-                    self.show_gif()
-                    self.speak("Yes, how can I help you?")
-                    continue
-
-                if self.is_active:
-                    if command.lower() in ['exit', 'quit', 'bye', 'stop', 'go to sleep']:
-                        self.speak("Goodbye!")
-                        self.is_active = False
-                        self.hide_gif()
-                        self.conversation_history = []
-                        continue
-
-                    self.last_command_time = time.time()
-                    
-                    if command.strip().lower() not in ['another', 'another joke', 'tell me another joke']:
-                        self.last_joke = None
-                    
-                    # First try to execute as a command
-                    command_executed = self.executor.try_execute_command(command, self)
-                    
-                    # If not a command, use Gemma for conversational response
-                    if not command_executed:
-                        response = self.get_gemma_response(command)
-                        self.speak(response)
+                self.handle_command(command)
 
             except KeyboardInterrupt:
-                self.speak("Goodbye!")
-                self.hide_gif()
-                if self.gif_root is not None:
-                    self.gif_root.destroy()
+                self.shutdown()
                 break
             except Exception as e:
                 print(f"Error: {e}")
                 continue
+
+    def shutdown(self):
+        self.say("Goodbye!")
+        self.hide_gif()
+        self.scheduler.stop()
+        self.tts.stop()
+        self.volume_controller.stop()
+        print(f"Volume: {self.volume_controller.stats()}")
+        self.asr.close()
+        print(f"ASR backends: {self.asr.stats()}")
+        if self.tts.phrase_cache is not None:
+            print(f"Phrase cache: {self.tts.phrase_cache.stats()}")
+        if self.executor.classifier is not None:
+            print(f"Intent classifier: {self.executor.classifier.stats()}")
+        if self.wake_spotter is not None:
+            print(f"Wake word spotter: {self.wake_spotter.stats()}")
+        self.ui.stop()
+        if self.ui.stats():
+            print(f"GIF overlay: {self.ui.stats()}")
     pass
\ No newline at end of file
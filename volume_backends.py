@@ -0,0 +1,313 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# callback(level, muted) for changes made outside the assistant
+ChangeCallback = Callable[[float, bool], None]
+
+
+def own_pids() -> Set[int]:
+    """
+    This process and its children, whose audio is never ducked: cached
+    phrases play through a paplay/aplay/afplay child (see phrase_cache).
+    """
+    pids = {os.getpid()}
+    try:
+        import psutil
+
+        pids.update(child.pid for child in psutil.Process().children(recursive=True))
+        return pids
+    except Exception:
+        pass
+    # no psutil: walk /proc (PulseAudio hosts), else only this process is known
+    parents = {}
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else ():
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    grew = True
+    while grew:
+        found = {pid for pid, ppid in parents.items() if ppid in pids}
+        grew = bool(found - pids)
+        pids |= found
+    return pids
+
+
+class VolumeBackend:
+    """
+    Master volume of the default output device. VolumeController calls every
+    method from its own 'volume' thread, so implementations need not be
+    thread-safe (except for the callbacks they fire).
+    """
+    name = "backend"
+
+    def thread_init(self):
+        """Called once on the thread that will make all other calls"""
+
+    def warm_up(self):
+        """Import whatever the backend needs ahead of the first command"""
+
+    def read(self) -> Tuple[float, bool]:
+        """Current (level 0.0-1.0, muted)"""
+        raise NotImplementedError
+
+    def set_level(self, level: float):
+        raise NotImplementedError
+
+    def set_mute(self, muted: bool):
+        raise NotImplementedError
+
+    def watch(self, callback: ChangeCallback) -> bool:
+        """Report external changes through callback; False if the backend cannot"""
+        return False
+
+    def duck_others(self, factor: float) -> bool:
+        """Scale every other application's volume by factor; False if unsupported"""
+        return False
+
+    def restore_others(self):
+        """Undo duck_others()"""
+
+
+class PycawBackend(VolumeBackend):
+    """Windows Core Audio through pycaw/comtypes"""
+    name = "pycaw"
+
+    def __init__(self):
+        self.endpoint = None
+        self.callback = None
+        self.ducked: List[Tuple[object, float]] = []
+
+    def thread_init(self):
+        import comtypes
+        comtypes.CoInitialize()
+
+    def warm_up(self):
+        import comtypes
+        import pycaw.pycaw
+
+    @property
+    def volume(self):
+        if self.endpoint is None:
+            from ctypes import cast, POINTER
+            from comtypes import CLSCTX_ALL
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+            devices = AudioUtilities.GetSpeakers()
+            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            self.endpoint = cast(interface, POINTER(IAudioEndpointVolume))
+        return self.endpoint
+
+    def read(self) -> Tuple[float, bool]:
+        return self.volume.GetMasterVolumeLevelScalar(), bool(self.volume.GetMute())
+
+    def set_level(self, level: float):
+        self.volume.SetMasterVolumeLevelScalar(level, None)
+
+    def set_mute(self, muted: bool):
+        self.volume.SetMute(1 if muted else 0, None)
+
+    def watch(self, callback: ChangeCallback) -> bool:
+        try:
+            from pycaw.callbacks import AudioEndpointVolumeCallback
+        except ImportError:
+            return False  # older pycaw
+
+        class Notify(AudioEndpointVolumeCallback):
+            def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+                callback(new_volume, bool(new_mute))
+
+        # Keep a reference, or COM would release the callback
+        self.callback = Notify()
+        self.volume.RegisterControlChangeNotify(self.callback)
+        return True
+
+    def duck_others(self, factor: float) -> bool:
+        from pycaw.pycaw import AudioUtilities
+
+        self.restore_others()
+        skip = own_pids()
+        for session in AudioUtilities.GetAllSessions():
+            if session.Process is None or session.Process.pid in skip:
+                continue
+            volume = session.SimpleAudioVolume
+            original = volume.GetMasterVolume()
+            volume.SetMasterVolume(original * factor, None)
+            self.ducked.append((volume, original))
+        return True
+
+    def restore_others(self):
+        for volume, original in self.ducked:
+            try:
+                volume.SetMasterVolume(original, None)
+            except Exception as e:
+                print(f"Error restoring session volume: {e}")
+        self.ducked = []
+
+
+class PulseAudioBackend(VolumeBackend):
+    """Default sink through pactl (PulseAudio, or PipeWire's pulse server)"""
+    name = "pulseaudio"
+    sink = "@DEFAULT_SINK@"
+
+    def __init__(self):
+        self.monitor = None
+        self.ducked: Dict[str, int] = {}
+
+    def _pactl(self, *args: str) -> str:
+        return subprocess.run(('pactl',) + args, capture_output=True, text=True, check=True).stdout
+
+    def read(self) -> Tuple[float, bool]:
+        percent = re.search(r'(\d+)%', self._pactl('get-sink-volume', self.sink))
+        muted = 'yes' in self._pactl('get-sink-mute', self.sink)
+        return (int(percent.group(1)) / 100 if percent else 0.0), muted
+
+    def set_level(self, level: float):
+        self._pactl('set-sink-volume', self.sink, f"{round(level * 100)}%")
+
+    def set_mute(self, muted: bool):
+        self._pactl('set-sink-mute', self.sink, '1' if muted else '0')
+
+    def watch(self, callback: ChangeCallback) -> bool:
+        try:
+            self.monitor = subprocess.Popen(['pactl', 'subscribe'], stdout=subprocess.PIPE, text=True)
+        except OSError:
+            return False
+
+        def follow():
+            for line in self.monitor.stdout:
+                if "'change' on sink #" in line:
+                    try:
+                        callback(*self.read())
+                    except Exception as e:
+                        print(f"Error reading volume: {e}")
+
+        threading.Thread(target=follow, name='pactl-subscribe', daemon=True).start()
+        return True
+
+    def _sink_inputs(self) -> Dict[str, Tuple[int, str]]:
+        """sink input id -> (volume percent, process id)"""
+        inputs = {}
+        for block in self._pactl('list', 'sink-inputs').split('Sink Input #')[1:]:
+            index = block.split('\n', 1)[0].strip()
+            percent = re.search(r'Volume:.*?(\d+)%', block)
+            pid = re.search(r'application\.process\.id = "(\d+)"', block)
+            if percent:
+                inputs[index] = (int(percent.group(1)), pid.group(1) if pid else '')
+        return inputs
+
+    def duck_others(self, factor: float) -> bool:
+        self.restore_others()
+        skip = {str(pid) for pid in own_pids()}
+        for index, (percent, pid) in self._sink_inputs().items():
+            if pid in skip:
+                continue
+            self._pactl('set-sink-input-volume', index, f"{round(percent * factor)}%")
+            self.ducked[index] = percent
+        return True
+
+    def restore_others(self):
+        for index, percent in self.ducked.items():
+            try:
+                self._pactl('set-sink-input-volume', index, f"{percent}%")
+            except subprocess.CalledProcessError:
+                pass  # the stream has ended
+        self.ducked = {}
+
+
+class AlsaBackend(VolumeBackend):
+    """ALSA mixer control through amixer; no per-application volumes, so no ducking"""
+    name = "alsa"
+
+    def __init__(self, control: str = "Master"):
+        self.control = control
+
+    def _amixer(self, *args: str) -> str:
+        return subprocess.run(('amixer', '-M') + args, capture_output=True, text=True, check=True).stdout
+
+    def read(self) -> Tuple[float, bool]:
+        output = self._amixer('get', self.control)
+        percent = re.search(r'\[(\d+)%\]', output)
+        return (int(percent.group(1)) / 100 if percent else 0.0), '[off]' in output
+
+    def set_level(self, level: float):
+        self._amixer('-q', 'set', self.control, f"{round(level * 100)}%")
+
+    def set_mute(self, muted: bool):
+        self._amixer('-q', 'set', self.control, 'mute' if muted else 'unmute')
+
+
+class MemoryBackend(VolumeBackend):
+    """
+    In-memory volume for machines without an audio stack and for benchmarks.
+    `latency` simulates the cost of each device call.
+    """
+    name = "memory"
+
+    def __init__(self, level: float = 0.5, muted: bool = False, latency: float = 0.0):
+        self.level = level
+        self.muted = muted
+        self.latency = latency
+        self.duck_factor = None
+        self.callback = None
+        self.reads = 0
+        self.writes = 0
+
+    def _device_call(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def read(self) -> Tuple[float, bool]:
+        self._device_call()
+        self.reads += 1
+        return self.level, self.muted
+
+    def set_level(self, level: float):
+        self._device_call()
+        self.writes += 1
+        self.level = level
+
+    def set_mute(self, muted: bool):
+        self._device_call()
+        self.writes += 1
+        self.muted = muted
+
+    def watch(self, callback: ChangeCallback) -> bool:
+        self.callback = callback
+        return True
+
+    def change_externally(self, level: float, muted: Optional[bool] = None):
+        """Simulate another program (or the keyboard) changing the volume"""
+        self.level = level
+        if muted is not None:
+            self.muted = muted
+        if self.callback is not None:
+            self.callback(self.level, self.muted)
+
+    def duck_others(self, factor: float) -> bool:
+        self.duck_factor = factor
+        return True
+
+    def restore_others(self):
+        self.duck_factor = None
+
+
+def default_backend() -> VolumeBackend:
+    if sys.platform == 'win32':
+        return PycawBackend()
+    if shutil.which('pactl'):
+        return PulseAudioBackend()
+    if shutil.which('amixer'):
+        return AlsaBackend()
+    print("No volume control found (pycaw, pactl or amixer); volume changes will only be simulated")
+    return MemoryBackend()
@@ -1,36 +1,266 @@
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+import threading
+import time
+from typing import Callable, List, Optional
+
+from metrics import metrics
+from volume_backends import VolumeBackend, default_backend
+
 
 class VolumeController:
-    # ...existing code from VolumeController class...
-    def __init__(self):
-        self.devices = AudioUtilities.GetSpeakers()
-        self.interface = self.devices.Activate(
-            IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        self.volume = cast(self.interface, POINTER(IAudioEndpointVolume))
-    
-    def get_volume(self):
-        return self.volume.GetMasterVolumeLevelScalar()
-    
-    def set_volume(self, level):
-        self.volume.SetMasterVolumeLevelScalar(level, None)
-    
-    def increase_volume(self, amount=0.1):
-        current = self.get_volume()
-        new_level = min(1.0, current + amount)
-        self.set_volume(new_level)
-        return new_level
-    
-    def decrease_volume(self, amount=0.1):
-        current = self.get_volume()
-        new_level = max(0.0, current - amount)
-        self.set_volume(new_level)
-        return new_level
-    
+    """
+    Master volume through a pluggable backend (pycaw, PulseAudio, ALSA or in
+    memory, see volume_backends.py).
+
+    Level and mute state are cached: reads never touch the device, and
+    changes made elsewhere arrive through the backend's change notifications.
+    Every device call happens on one 'volume' thread. Commands only update the
+    cache and return; the thread writes the latest value once the commands
+    have paused for coalesce_ms, so "volume up, volume up, volume up" is a
+    single write. ramp_to() fades in steps of `tick` seconds without blocking
+    the caller, and duck()/unduck() lower other applications while the
+    assistant speaks.
+    """
+
+    def __init__(self, backend: Optional[VolumeBackend] = None, coalesce_ms: int = 40,
+                 tick: float = 0.05, duck_factor: float = 0.3):
+        self.backend = backend if backend is not None else default_backend()
+        self.coalesce = coalesce_ms / 1000
+        self.tick = tick
+        self.duck_factor = duck_factor
+        self.condition = threading.Condition()
+        self.level = 0.0
+        self.muted = False
+        self.written = (None, None)  # (level, muted) last sent to the device
+        self.dirty_since = None  # first change not yet written
+        self.pending_changes = 0
+        self.ramp = None  # (from, to, started, seconds)
+        self.ramp_next_at = 0.0
+        self.duck_depth = 0
+        self.ducked = False
+        self.stopping = False
+        self.loaded = threading.Event()
+        self.listeners: List[Callable[[float, bool], None]] = []
+        self.thread = None
+        self.writes = 0
+        self.coalesced = 0
+        self.external_changes = 0
+
+    def warm_up(self):
+        """Import the backend's modules and read the device state ahead of the first command"""
+        self.backend.warm_up()
+        self._start()
+        self.loaded.wait(timeout=5)
+
+    def subscribe(self, callback: Callable[[float, bool], None]):
+        """callback(level, muted) after every change, ours or external"""
+        self.listeners.append(callback)
+
+    # Commands (any thread; they only touch the cache)
+
+    def get_volume(self) -> float:
+        self._wait_loaded()
+        return self.level
+
+    def set_volume(self, level: float) -> float:
+        return self._change_level(lambda current: level)
+
+    def increase_volume(self, amount: float = 0.1) -> float:
+        return self._change_level(lambda current: current + amount)
+
+    def decrease_volume(self, amount: float = 0.1) -> float:
+        return self._change_level(lambda current: current - amount)
+
     def mute(self):
-        self.volume.SetMute(1, None)
-    
+        self._set_mute(True)
+
     def unmute(self):
-        self.volume.SetMute(0, None)
-    pass
\ No newline at end of file
+        self._set_mute(False)
+
+    def ramp_to(self, level: float, seconds: float):
+        """Fade to level over seconds; returns at once. Any later set cancels the fade."""
+        self._wait_loaded()
+        with self.condition:
+            now = time.perf_counter()
+            self.ramp = (self.level, min(1.0, max(0.0, level)), now, max(seconds, 0.0))
+            self.ramp_next_at = now
+            self.condition.notify_all()
+
+    def duck(self):
+        """Lower other applications (nested calls need as many unduck() calls)"""
+        self._start()
+        with self.condition:
+            self.duck_depth += 1
+            self.condition.notify_all()
+
+    def unduck(self):
+        with self.condition:
+            self.duck_depth = max(0, self.duck_depth - 1)
+            self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until pending writes, fades and ducking have reached the device"""
+        if self.thread is None:
+            return True
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.dirty_since is None and self.ramp is None and self.ducked == bool(self.duck_depth),
+                timeout)
+
+    def stop(self, timeout: float = 2.0):
+        """Write what is pending, restore ducked applications and end the thread"""
+        if self.thread is None:
+            return
+        with self.condition:
+            if self.ramp is not None:
+                self.ramp = None
+                self._mark_dirty()
+            self.duck_depth = 0
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'backend': self.backend.name,
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'external_changes': self.external_changes,
+        }
+
+    def _change_level(self, compute: Callable[[float], float]) -> float:
+        self._wait_loaded()
+        with self.condition:
+            self.ramp = None
+            self.level = round(min(1.0, max(0.0, compute(self.level))), 4)
+            self._mark_dirty()
+            level = self.level
+        self._notify()
+        return level
+
+    def _set_mute(self, muted: bool):
+        self._wait_loaded()
+        with self.condition:
+            self.muted = muted
+            self._mark_dirty()
+        self._notify()
+
+    def _mark_dirty(self):
+        # Called with the condition held
+        if self.dirty_since is None:
+            self.dirty_since = time.perf_counter()
+        self.pending_changes += 1
+        self.condition.notify_all()
+
+    def _notify(self):
+        for callback in list(self.listeners):
+            try:
+                callback(self.level, self.muted)
+            except Exception as e:
+                print(f"Error in volume listener: {e}")
+
+    def _on_external_change(self, level: float, muted: bool):
+        with self.condition:
+            if self.dirty_since is not None or self.ramp is not None:
+                return  # our own pending value wins
+            if (level, muted) == (self.level, self.muted):
+                return
+            self.level, self.muted = level, muted
+            self.written = (level, muted)
+            self.external_changes += 1
+        self._notify()
+
+    # Volume thread
+
+    def _start(self):
+        if self.thread is None:
+            with self.condition:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name='volume', daemon=True)
+                    self.thread.start()
+
+    def _wait_loaded(self):
+        self._start()
+        if not self.loaded.wait(timeout=5):
+            print("Volume device did not respond; using the last known level")
+
+    def _next_action(self):
+        """(action, seconds to wait); called with the condition held"""
+        now = time.perf_counter()
+        if self.ducked != bool(self.duck_depth):
+            return 'duck', None
+        if self.ramp is not None:
+            return ('ramp', None) if now >= self.ramp_next_at else (None, self.ramp_next_at - now)
+        if self.dirty_since is not None:
+            due = self.dirty_since + self.coalesce
+            return ('write', None) if now >= due or self.stopping else (None, due - now)
+        return ('stop', None) if self.stopping else (None, None)
+
+    def _run(self):
+        try:
+            self.backend.thread_init()
+            level, muted = self.backend.read()
+            with self.condition:
+                self.level, self.muted = level, muted
+                self.written = (level, muted)
+            if not self.backend.watch(self._on_external_change):
+                print(f"Volume backend '{self.backend.name}' has no change notifications; "
+                      f"changes made elsewhere will not be seen")
+        except Exception as e:
+            print(f"Error reading volume: {e}")
+        self.loaded.set()
+
+        while True:
+            with self.condition:
+                while True:
+                    action, wait = self._next_action()
+                    if action is not None:
+                        break
+                    self.condition.wait(wait)
+                if action == 'stop':
+                    return
+                if action == 'duck':
+                    self.ducked = bool(self.duck_depth)
+                    ducked = self.ducked
+                elif action == 'ramp':
+                    start_level, end_level, started, seconds = self.ramp
+                    progress = 1.0 if seconds <= 0 else min(1.0, (time.perf_counter() - started) / seconds)
+                    self.level = start_level + (end_level - start_level) * progress
+                    if progress >= 1.0:
+                        self.ramp = None
+                    else:
+                        self.ramp_next_at = time.perf_counter() + self.tick
+                    level, muted = self.level, self.muted
+                else:
+                    if self.pending_changes > 1:
+                        self.coalesced += self.pending_changes - 1
+                        metrics.inc('volume_coalesced_total', self.pending_changes - 1)
+                    self.pending_changes = 0
+                    self.dirty_since = None
+                    level, muted = self.level, self.muted
+
+            try:
+                if action == 'duck':
+                    if ducked:
+                        self.backend.duck_others(self.duck_factor)
+                    else:
+                        self.backend.restore_others()
+                else:
+                    self._write(level, muted)
+            except Exception as e:
+                print(f"Error setting volume: {e}")
+            if action == 'ramp':
+                self._notify()
+            with self.condition:
+                self.condition.notify_all()  # wake flush()
+
+    def _write(self, level: float, muted: bool):
+        written_level, written_muted = self.written
+        started = time.perf_counter()
+        if level != written_level:
+            self.backend.set_level(level)
+            self.writes += 1
+        if muted != written_muted:
+            self.backend.set_mute(muted)
+            self.writes += 1
+        self.written = (level, muted)
+        metrics.observe('volume_write_seconds', time.perf_counter() - started)
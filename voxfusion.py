@@ -1,12 +1,131 @@
-from voice_assistant import VoiceAssistant
-from volume_controller import VolumeController
-from command_executor import CommandExecutor
+import argparse
+
+from startup import profile
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VoxFusion voice assistant")
+    parser.add_argument("--engine", choices=["serial", "async", "server"], default="serial",
+                        help="serial: listen, answer and speak in turn; async: keep listening while answering; "
+                             "server: answer many thin clients over HTTP (see assistant_server.py)")
+    parser.add_argument("--server-port", type=int, default=8765, help="with --engine server, the port to listen on")
+    parser.add_argument("--server-workers", type=int, default=8, help="with --engine server, turns handled at once")
+    parser.add_argument("--capture", choices=["phrase", "continuous"], default="phrase",
+                        help="continuous: ring-buffer capture with voice activity detection")
+    parser.add_argument("--input-wav", help="with --capture continuous, read audio from this WAV file instead of the microphone")
+    parser.add_argument("--wake-templates", help="directory of WAV recordings of the wake word for local spotting")
+    parser.add_argument("--wake-threshold", type=float, default=12.0)
+    parser.add_argument("--asr-mode", choices=["hedged", "race", "best"], default="hedged",
+                        help="hedged: Google first, Sphinx if it is slow; race: both at once; best: highest confidence")
+    parser.add_argument("--sphinx-workers", type=int, default=2,
+                        help="processes decoding with offline Sphinx, each with the model loaded (0: in-process)")
+    parser.add_argument("--speculative", action="store_true",
+                        help="start Gemma while routing utterances that look like questions; discarded if a command claims them")
+    parser.add_argument("--phrase-cache-mb", type=float, default=64,
+                        help="disk space for pre-rendered fixed and templated phrases (0: always synthesize)")
+    parser.add_argument("--intent-classifier", choices=["hashing", "ollama", "off"], default="off",
+                        help="embedding classifier for commands the patterns miss (hashing: no model; ollama: --embedding-model)")
+    parser.add_argument("--embedding-model", default="nomic-embed-text",
+                        help="with --intent-classifier ollama, the embedding model to use")
+    parser.add_argument("--ollama-host", help="Ollama server URL (default: OLLAMA_HOST or http://127.0.0.1:11434)")
+    parser.add_argument("--fake-ollama", action="store_true",
+                        help="answer with the built-in stand-in server instead of a real model")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve latency histograms and counters on http://127.0.0.1:PORT/metrics (0: off)")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print per-import and per-init startup cost once background warm-up has finished")
+    args = parser.parse_args()
+
+    if args.startup_profile:
+        profile.enable()
+
+    if args.metrics_port:
+        from metrics import MetricsServer, metrics
+        metrics.enable()
+        print(f"Metrics on {MetricsServer(metrics, port=args.metrics_port).start().url}/metrics")
+
+    # Imported after argument parsing so --startup-profile can time them
+    with profile.step('init', 'import assistant modules'):
+        from voice_assistant import VoiceAssistant
+        from volume_controller import VolumeController
+        from command_executor import CommandExecutor
+        from response_cache import ResponseCache
+        from ollama_client import OllamaClient
+
+    ollama_host = args.ollama_host
+    if args.fake_ollama:
+        from fake_ollama import FakeOllamaServer
+        ollama_host = FakeOllamaServer(load_delay=1.0).start().url
+
+    if args.engine == "server":
+        # No microphone, speaker or overlay here: clients bring their own
+        with profile.step('init', 'AssistantServer'):
+            from asr_backends import RecognizerManager
+            from assistant_server import AssistantServer
+            server = AssistantServer(OllamaClient(host=ollama_host, max_connections=args.server_workers),
+                                     RecognizerManager.default(mode=args.asr_mode, sphinx_workers=args.sphinx_workers),
+                                     ResponseCache(max_entries=256, ttl=24 * 3600, path="response_cache.json"),
+                                     port=args.server_port, workers=args.server_workers)
+        server.serve_forever()
+        raise SystemExit(0)
+
     # Initialize components
-    volume_controller = VolumeController()
-    command_executor = CommandExecutor()
-    voice_assistant = VoiceAssistant(volume_controller, command_executor)
+    with profile.step('init', 'VolumeController'):
+        volume_controller = VolumeController()
+
+    def build_classifier():
+        # Called from the executor's background warm-up, so numpy loads after 'ready'
+        try:
+            from intent_classifier import HashingEmbedder, IntentClassifier, OllamaEmbedder
+        except ImportError as e:
+            print(f"Intent classifier unavailable ({e}); unmatched commands go to Gemma")
+            return None
+        if args.intent_classifier == "ollama":
+            return IntentClassifier(OllamaEmbedder(OllamaClient(host=ollama_host), args.embedding_model))
+        return IntentClassifier(HashingEmbedder())
+
+    with profile.step('init', 'CommandExecutor'):
+        command_executor = CommandExecutor(
+            classifier_factory=build_classifier if args.intent_classifier != "off" else None)
+    with profile.step('init', 'ResponseCache'):
+        response_cache = ResponseCache(max_entries=256, ttl=24 * 3600, path="response_cache.json")
+    with profile.step('init', 'TTSWorker'):
+        from phrase_cache import PhraseCache, standard_phrases
+        from tts_worker import TTSWorker
+        phrase_cache = None
+        if args.phrase_cache_mb > 0:
+            phrase_cache = PhraseCache(standard_phrases(command_executor.catalog), max_mb=args.phrase_cache_mb)
+            if not phrase_cache.enabled:
+                print("No audio player found (winsound, paplay, aplay or afplay); phrases will be synthesized each time")
+        tts = TTSWorker(rate=150, volume=1.0, phrase_cache=phrase_cache)
+    with profile.step('init', 'RecognizerManager'):
+        from asr_backends import RecognizerManager
+        asr = RecognizerManager.default(mode=args.asr_mode, sphinx_workers=args.sphinx_workers)
+    with profile.step('init', 'VoiceAssistant'):
+        voice_assistant = VoiceAssistant(volume_controller, command_executor, response_cache,
+                                         schedule_path="schedule.db", llm=OllamaClient(host=ollama_host),
+                                         tts=tts, asr=asr)
+
+    voice_assistant.speculative = args.speculative
+
+    if args.capture == "continuous" or args.input_wav:
+        with profile.step('init', 'ContinuousCapture'):
+            from audio_capture import ContinuousCapture, MicrophoneSource, WavFileSource
+            source = WavFileSource(args.input_wav, realtime=True) if args.input_wav else MicrophoneSource()
+            voice_assistant.continuous_capture = ContinuousCapture(
+                source,
+                on_speech_start=voice_assistant.interrupt_speech,
+                echo_guard=lambda: voice_assistant.tts.busy,
+            ).start()
+        voice_assistant.barge_in = True
+
+    if args.wake_templates:
+        with profile.step('init', 'WakeWordSpotter'):
+            from wake_word import WakeWordSpotter
+            voice_assistant.wake_spotter = WakeWordSpotter.from_directory(args.wake_templates, args.wake_threshold)
 
     # Start the voice assistant
-    voice_assistant.run()
\ No newline at end of file
+    if args.engine == "async":
+        from pipeline import AsyncVoicePipeline
+        AsyncVoicePipeline(voice_assistant).run()
+    else:
+        voice_assistant.run()
@@ -0,0 +1,217 @@
+"""
+On-device wake-word spotting: MFCC features matched against recorded
+templates of the wake word with subsequence DTW. Runs on raw samples, so
+idle audio never has to be sent to a cloud recognizer.
+
+    python wake_word.py evaluate --templates wake_templates --corpus wake_corpus
+
+The corpus directory holds positive/ (contains the wake word) and negative/
+(does not) subdirectories of 16-bit WAV files.
+"""
+import argparse
+import glob
+import os
+import time
+import wave
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples.astype(np.float32), wav.getframerate()
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            bank[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            bank[m - 1, k] = (right - k) / max(1, right - center)
+    return bank
+
+
+@lru_cache(maxsize=8)
+def _dct_matrix(n_mels: int, n_mfcc: int) -> np.ndarray:
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+
+def mfcc(samples: np.ndarray, sample_rate: int, n_mfcc: int = 13, n_mels: int = 26,
+         frame_ms: int = 25, hop_ms: int = 10) -> np.ndarray:
+    """(frames, n_mfcc - 1) MFCCs without c0, with cepstral mean normalization"""
+    samples = np.asarray(samples, dtype=np.float32)
+    frame_len = sample_rate * frame_ms // 1000
+    hop = sample_rate * hop_ms // 1000
+    if len(samples) < frame_len:
+        return np.zeros((0, n_mfcc - 1), dtype=np.float32)
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    n_frames = 1 + (len(emphasized) - frame_len) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        emphasized, shape=(n_frames, frame_len),
+        strides=(emphasized.strides[0] * hop, emphasized.strides[0])
+    ) * np.hamming(frame_len).astype(np.float32)
+    n_fft = 1 << (frame_len - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+    energies = np.log(power @ _mel_filterbank(sample_rate, n_fft, n_mels).T + 1e-6)
+    coefficients = energies @ _dct_matrix(n_mels, n_mfcc).T
+    coefficients = coefficients[:, 1:]
+    return coefficients - coefficients.mean(axis=0)
+
+
+def subsequence_dtw(template: np.ndarray, features: np.ndarray) -> float:
+    """
+    Average per-frame distance of the best alignment of the whole template
+    against any stretch of features. Steps (1,0), (1,1) and (1,2) allow up to
+    2x speed differences and let each template row be computed in one
+    vectorized operation.
+    """
+    n, m = len(template), len(features)
+    if n == 0 or m == 0:
+        return float('inf')
+    cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    previous = cost[0].copy()  # free start anywhere in features
+    for i in range(1, n):
+        best = previous.copy()
+        best[1:] = np.minimum(best[1:], previous[:-1])
+        best[2:] = np.minimum(best[2:], previous[:-2])
+        previous = cost[i] + best
+    return float(previous.min() / n)
+
+
+class WakeWordSpotter:
+    """
+    Matches utterances against MFCC templates of the wake word.
+    Keeps track of the CPU time it uses, so idle cost can be reported as a
+    real-time factor (CPU seconds per second of audio examined).
+    """
+
+    def __init__(self, templates: Optional[List[np.ndarray]] = None, sample_rate: int = 16000, threshold: float = 12.0):
+        self.templates = list(templates or [])
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.cpu_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.checks = 0
+        self.hits = 0
+        self.started = time.monotonic()
+
+    @classmethod
+    def from_directory(cls, directory: str, threshold: float = 12.0) -> "WakeWordSpotter":
+        spotter = cls(threshold=threshold)
+        for path in sorted(glob.glob(os.path.join(directory, '*.wav'))):
+            spotter.enroll(path)
+        if not spotter.templates:
+            raise ValueError(f"No wake word templates found in {directory}")
+        return spotter
+
+    def enroll(self, path: str):
+        samples, sample_rate = read_wav(path)
+        self.sample_rate = sample_rate
+        self.templates.append(mfcc(self._trim(samples), sample_rate))
+
+    def _trim(self, samples: np.ndarray) -> np.ndarray:
+        """Drop leading and trailing silence from a template recording"""
+        frame = self.sample_rate // 100
+        if len(samples) < frame * 3:
+            return samples
+        energy = np.sqrt(np.mean(samples[:len(samples) // frame * frame].reshape(-1, frame) ** 2, axis=1))
+        voiced = np.nonzero(energy > energy.max() * 0.1)[0]
+        if len(voiced) == 0:
+            return samples
+        return samples[voiced[0] * frame:(voiced[-1] + 1) * frame]
+
+    def score(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> float:
+        """Lowest DTW distance to any template (lower is a better match)"""
+        start = time.process_time()
+        sample_rate = sample_rate or self.sample_rate
+        features = mfcc(samples, sample_rate)
+        best = min((subsequence_dtw(t, features) for t in self.templates), default=float('inf'))
+        self.cpu_seconds += time.process_time() - start
+        self.audio_seconds += len(samples) / sample_rate
+        self.checks += 1
+        return best
+
+    def detect(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> bool:
+        score = self.score(samples, sample_rate)
+        hit = score <= self.threshold
+        if hit:
+            self.hits += 1
+            print(f"Wake word detected (score {score:.2f})")
+        return hit
+
+    def detect_audio(self, audio) -> bool:
+        """detect() for a speech_recognition AudioData"""
+        samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+        return self.detect(samples.astype(np.float32), audio.sample_rate)
+
+    def stats(self) -> Dict[str, float]:
+        wall = time.monotonic() - self.started
+        return {
+            'checks': self.checks,
+            'hits': self.hits,
+            'cpu_seconds': self.cpu_seconds,
+            'audio_seconds': self.audio_seconds,
+            'real_time_factor': self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+            'cpu_percent_of_wall': 100.0 * self.cpu_seconds / wall if wall else 0.0,
+        }
+
+
+def evaluate(spotter: WakeWordSpotter, corpus_dir: str, thresholds: Optional[List[float]] = None) -> List[Dict[str, float]]:
+    """False-accept / false-reject rates over corpus_dir/positive and corpus_dir/negative"""
+    scores = {}
+    for label in ('positive', 'negative'):
+        scores[label] = []
+        for path in sorted(glob.glob(os.path.join(corpus_dir, label, '*.wav'))):
+            samples, sample_rate = read_wav(path)
+            scores[label].append(spotter.score(samples, sample_rate))
+    if not scores['positive'] or not scores['negative']:
+        raise ValueError(f"{corpus_dir} needs WAV files in both positive/ and negative/")
+
+    results = []
+    for threshold in thresholds or [spotter.threshold]:
+        false_rejects = sum(s > threshold for s in scores['positive'])
+        false_accepts = sum(s <= threshold for s in scores['negative'])
+        results.append({
+            'threshold': threshold,
+            'false_reject_rate': false_rejects / len(scores['positive']),
+            'false_accept_rate': false_accepts / len(scores['negative']),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wake word spotter tools")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    evaluate_parser = subparsers.add_parser("evaluate", help="measure false-accept/false-reject rates on a WAV corpus")
+    evaluate_parser.add_argument("--templates", required=True, help="directory of wake word recordings")
+    evaluate_parser.add_argument("--corpus", required=True, help="directory with positive/ and negative/ WAV files")
+    evaluate_parser.add_argument("--thresholds", type=float, nargs="*", default=[8, 10, 12, 14, 16])
+    args = parser.parse_args()
+
+    spotter = WakeWordSpotter.from_directory(args.templates)
+    for row in evaluate(spotter, args.corpus, args.thresholds):
+        print(f"threshold {row['threshold']:6.2f}  FRR {row['false_reject_rate']:6.1%}  FAR {row['false_accept_rate']:6.1%}")
+    stats = spotter.stats()
+    print(f"CPU: {stats['cpu_seconds']:.2f}s for {stats['audio_seconds']:.1f}s of audio "
+          f"(real-time factor {stats['real_time_factor']:.3f})")
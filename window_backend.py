@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from startup import lazy_import, load_now
+
+gw = lazy_import('pygetwindow')
+pyautogui = lazy_import('pyautogui')
+
+
+def wait_until(condition: Callable[[], bool], timeout: float, interval: float = 0.02) -> bool:
+    """Poll condition until it holds or the deadline passes; returns whether it held"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if condition():
+                return True
+        except Exception:
+            pass
+        if time.perf_counter() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+class WindowBackend:
+    """
+    Top-level windows and the keystrokes sent to them, through pygetwindow
+    and pyautogui. Kept behind one object so a fake can be swapped in (see
+    fake_backends.py) and window commands can run headless.
+    """
+
+    def warm_up(self):
+        load_now(gw, pyautogui)
+
+    def windows(self) -> List:
+        return [window for window in gw.getAllWindows() if window.title]
+
+    def active_window(self):
+        return gw.getActiveWindow()
+
+    def title(self, window) -> str:
+        """Current title, or '' once the window has gone"""
+        try:
+            return window.title or ''
+        except Exception:
+            return ''
+
+    def activate(self, window):
+        if getattr(window, 'isMinimized', False):
+            window.restore()
+        window.activate()
+
+    def close(self, window):
+        window.close()
+
+    def hotkey(self, *keys: str):
+        pyautogui.hotkey(*keys)
+
+
+class WindowIndex:
+    """
+    Cached (title, window) list so a close command enumerates the desktop
+    once instead of once per browser and pattern. The cache is refreshed on
+    demand once it is older than max_age, when a lookup misses on a snapshot
+    older than min_age, or after invalidate(), which open and close commands
+    call because they change the window list.
+    """
+
+    def __init__(self, backend: WindowBackend, max_age: float = 5.0, min_age: float = 0.25):
+        self.backend = backend
+        self.max_age = max_age
+        self.min_age = min_age
+        self.lock = threading.Lock()
+        self.entries: List[Tuple[str, object]] = []
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.lookups = 0
+
+    def invalidate(self):
+        with self.lock:
+            self.refreshed_at = None
+
+    def refresh(self):
+        windows = self.backend.windows()
+        with self.lock:
+            self.entries = [(self.backend.title(window).lower(), window) for window in windows]
+            self.refreshed_at = time.perf_counter()
+            self.refreshes += 1
+
+    def _age(self) -> float:
+        with self.lock:
+            return float('inf') if self.refreshed_at is None else time.perf_counter() - self.refreshed_at
+
+    def find(self, needles: Sequence[str]) -> List:
+        """Windows whose title contains any of the (lowercase) needles"""
+        self.lookups += 1
+        needles = [needle for needle in needles if needle]
+        if self._age() > self.max_age:
+            self.refresh()
+        with self.lock:
+            found = [window for title, window in self.entries if any(needle in title for needle in needles)]
+        if not found and self._age() > self.min_age:
+            self.refresh()
+            with self.lock:
+                found = [window for title, window in self.entries if any(needle in title for needle in needles)]
+        return found
+
+    def stats(self):
+        return {'windows': len(self.entries), 'lookups': self.lookups, 'refreshes': self.refreshes}